@@ -0,0 +1,132 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import models, transaction
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+from .tokens import CLAIMS
+
+USER_CACHE_ALIAS = getattr(settings, 'USER_CACHE_ALIAS', 'default')
+USER_CACHE_TIMEOUT = getattr(settings, 'USER_CACHE_TIMEOUT', 60)
+
+# what the user cache keeps of a user, never the row with its password hash
+CACHED_FIELDS = ('id', 'username', 'role', 'is_staff', 'is_active')
+
+
+def user_cache_key(user_id):
+    return f'user-claims:{user_id}'
+
+
+def get_cached_claims(user_id):
+    """
+    Returns the ``CACHED_FIELDS`` of a user as a dict from the user cache,
+    shared by every worker, loading them on a miss. Raises
+    ``User.DoesNotExist``.
+    """
+    cache = caches[USER_CACHE_ALIAS]
+    key = user_cache_key(user_id)
+    claims = cache.get(key)
+    if claims is None:
+        claims = User.objects.values(*CACHED_FIELDS).get(**{api_settings.USER_ID_FIELD: user_id})
+        cache.set(key, claims, USER_CACHE_TIMEOUT)
+    return claims
+
+
+def forget_cached_user(user_id):
+    cache = caches[USER_CACHE_ALIAS]
+    key = user_cache_key(user_id)
+    # forgotten again on commit so a user loaded from the old row while the
+    # transaction was open is not served afterwards
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class ClaimsUser:
+    """
+    Lightweight ``request.user`` built from the signed token claims.
+
+    ``id``/``pk``, ``username``, ``role`` and ``is_staff`` come from the token,
+    ``is_active`` from the user cache. Any other attribute is read from the
+    full user, which is selected once per request and only when a view
+    actually asks for it. Compares equal to the ``User`` row with the same
+    primary key.
+    """
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, pk, username, role, is_staff):
+        self.id = self.pk = uuid.UUID(str(pk))
+        self.username = username
+        self.role = role
+        self.is_staff = is_staff
+        self._user = None
+
+    @classmethod
+    def from_token(cls, token):
+        return cls(token[api_settings.USER_ID_CLAIM], token['username'], token['role'], token['is_staff'])
+
+    def __str__(self):
+        return self.username
+
+    def __eq__(self, other):
+        if isinstance(other, ClaimsUser):
+            return self.pk == other.pk
+        if isinstance(other, models.Model):
+            return isinstance(other, User) and self.pk == other.pk
+        if isinstance(other, AnonymousUser):
+            return False
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    @cached_property
+    def is_active(self):
+        return get_cached_claims(self.pk)['is_active']
+
+    def get_user(self):
+        if self._user is None:
+            self._user = User.objects.get(pk=self.pk)
+        return self._user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that does not select the user row on every request.
+
+    Tokens minted by ``api_authentication.tokens`` carry the claims needed
+    for ``ClaimsUser``. Older tokens get theirs from the user cache.
+    Role changes and deactivation reach requests once the short-lived access
+    token is renewed, see ``ClaimsTokenRefreshSerializer``.
+    """
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if all(claim in validated_token for claim in CLAIMS):
+            try:
+                return ClaimsUser.from_token(validated_token)
+            except ValueError:
+                raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        try:
+            claims = get_cached_claims(validated_token[api_settings.USER_ID_CLAIM])
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not claims['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        user = ClaimsUser(claims['id'], claims['username'], claims['role'], claims['is_staff'])
+        user.is_active = claims['is_active']
+        return user
@@ -27,6 +27,12 @@ class JWTSessionAuthentication:
         return jwt_authenticator.authenticate_header(request)
 
 
+class IsAdminOrTeacher(BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated
+                    and (request.user.is_staff or request.user.role == 'teacher'))
+
+
 class IsAdminOrOwnerTeacher(BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated
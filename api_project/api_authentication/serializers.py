@@ -1,8 +1,8 @@
-from rest_framework import serializers, status
+from rest_framework import serializers
 from django.contrib.auth import authenticate, login, logout
+from django.db import transaction
 from .models import User
-from django.urls import reverse
-import requests
+from .tokens import obtain_token_pair, blacklist_refresh_token
     
 
 class UserSerializer(serializers.ModelSerializer):
@@ -56,22 +56,15 @@ class ChangePasswordSerializer(serializers.Serializer):
         user = request.user
         
         refresh_token = self.validated_data['refresh']
-        access_token = request.META.get('HTTP_AUTHORIZATION').split(' ')[1]
         
         try:
             new_password = self.validated_data['new_password']
-            user.set_password(new_password)            
-            
-            blacklist_url = request.build_absolute_uri(reverse('token-blacklist'))       
-            blacklist_data = {'refresh': refresh_token}
-            blacklist_headers = {'Authorization': f'Bearer {access_token}'}
-            response = requests.post(blacklist_url, data=blacklist_data, headers=blacklist_headers)
-            
-            if response.status_code == status.HTTP_200_OK:
+            # password change and token revocation succeed or fail together
+            with transaction.atomic():
+                user.set_password(new_password)
                 # save + reset session inside api
                 user.save()
-            else:
-                raise Exception('Failed to blacklist token')
+                blacklist_refresh_token(refresh_token, user)
         except Exception as e:
             raise Exception(str(e))
 
@@ -87,26 +80,15 @@ class LoginSerializer(serializers.Serializer):
         return user
         
     def save(self):
-        request = self.context['request']    
-        username = request.data['username']
-        password = request.data['password']
-        user = self.validated_data 
-        
+        request = self.context['request']
+        user = self.validated_data
+
         if user:
-            token_url = request.build_absolute_uri(reverse('token-obtain-pair'))
-            token_data = {
-                'username': username,
-                'password': password,
-            }
-            response = requests.post(token_url, data=token_data)
-            
-            if response.status_code == status.HTTP_200_OK:
-                # authorization inside api
-                login(request, user)
-                
-                return response.json()
-            else:
-                raise Exception('Failed to obtain tokens')
+            tokens = obtain_token_pair(user)
+            # authorization inside api
+            login(request, user)
+
+            return tokens
         else:
             raise Exception('Invalid credentials')
         
@@ -116,20 +98,11 @@ class LogoutSerializer(serializers.Serializer):
     
     def save(self):
         request = self.context['request']
-        refresh_token = request.data['refresh']
-        access_token = request.META.get('HTTP_AUTHORIZATION').split(' ')[1]
+        refresh_token = self.validated_data['refresh']
         
         try:
-            blacklist_url = request.build_absolute_uri(reverse('token-blacklist'))       
-            blacklist_data = {'refresh': refresh_token}
-            blacklist_headers = {'Authorization': f'Bearer {access_token}'}
-            response = requests.post(blacklist_url, data=blacklist_data, headers=blacklist_headers)
-            
-            if response.status_code == status.HTTP_200_OK:
-                # logout inside api
-                logout(request)
-            else:
-                raise Exception('Failed to blacklist token')
+            blacklist_refresh_token(refresh_token, request.user)
+            # logout inside api
+            logout(request)
         except Exception as e:
             raise Exception(str(e))
-    
\ No newline at end of file
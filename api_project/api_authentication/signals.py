@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import Permission
+from .authentication import forget_cached_user
 from .models import User
 
 
@@ -9,3 +10,9 @@ def add_staff_permissions(sender, instance, created, **kwargs):
     if created and instance.is_staff:
         all_permissions = Permission.objects.all()
         instance.user_permissions.set(all_permissions)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user_on_change(sender, instance, **kwargs):
+    forget_cached_user(instance.pk)
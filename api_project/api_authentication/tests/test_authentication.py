@@ -0,0 +1,151 @@
+from django.core.cache import caches
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api_product.models import TeacherInfo
+from ..authentication import USER_CACHE_ALIAS, ClaimsJWTAuthentication, ClaimsUser, user_cache_key
+from ..models import User
+from ..tokens import obtain_token_pair
+
+
+class ClaimsJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='teacher', password='password', role='teacher')
+        self.factory = RequestFactory()
+        self.authentication = ClaimsJWTAuthentication()
+
+    def authenticate(self, access_token):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        return self.authentication.authenticate(request)
+
+    def test_tokens_carry_claims(self):
+        access = AccessToken(obtain_token_pair(self.user)['access'])
+        self.assertEqual(access['username'], 'teacher')
+        self.assertEqual(access['role'], 'teacher')
+        self.assertFalse(access['is_staff'])
+
+    def test_claims_user_without_queries(self):
+        access_token = obtain_token_pair(self.user)['access']
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(access_token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.role, 'teacher')
+        self.assertTrue(user.is_authenticated)
+        self.assertEqual(user, self.user)
+        self.assertEqual(self.user, user)
+
+    def test_full_user_is_loaded_once_per_request(self):
+        user, _ = self.authenticate(obtain_token_pair(self.user)['access'])
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.user.date_joined)
+            self.assertEqual(user.first_name, self.user.first_name)
+
+    def test_token_without_claims_uses_cached_claims(self):
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        user, _ = self.authenticate(access_token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.role, 'teacher')
+        self.assertTrue(user.is_active)
+        with self.assertNumQueries(0):
+            self.authenticate(access_token)
+
+    def test_cache_keeps_no_password(self):
+        self.authenticate(str(RefreshToken.for_user(self.user).access_token))
+        claims = caches[USER_CACHE_ALIAS].get(user_cache_key(self.user.pk))
+        self.assertEqual(set(claims), {'id', 'username', 'role', 'is_staff', 'is_active'})
+
+    def test_inactive_user_is_rejected(self):
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access_token)
+        user, _ = self.authenticate(obtain_token_pair(self.user)['access'])
+        self.assertFalse(user.is_active)
+
+    def test_cached_user_is_forgotten_on_save(self):
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.authenticate(access_token)
+        self.user.role = 'student'
+        self.user.save()
+        user, _ = self.authenticate(access_token)
+        self.assertEqual(user.role, 'student')
+
+    def test_user_loaded_before_the_commit_is_forgotten(self):
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        cache = caches[USER_CACHE_ALIAS]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = 'student'
+            self.user.save()
+            # another worker caches the row it read before the commit
+            cache.set(user_cache_key(self.user.pk), {'id': self.user.pk, 'username': 'teacher', 'role': 'teacher',
+                                                     'is_staff': False, 'is_active': True})
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        user, _ = self.authenticate(access_token)
+        self.assertEqual(user.role, 'student')
+
+
+class ClaimsJWTAuthenticationViewsTest(APITestCase):
+    def setUp(self):
+        self.teacher_user = User.objects.create_user(username='teacher', password='password', role='teacher',
+                                                     first_name='John')
+        self.other_user = User.objects.create_user(username='other', password='password', role='teacher',
+                                                   phone_number='+375291111111')
+        self.teacher = TeacherInfo.objects.create(user=self.teacher_user, education='PhD', experience='10 years')
+
+    def authorize(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {obtain_token_pair(user)['access']}")
+
+    def test_owner_can_update(self):
+        self.authorize(self.teacher_user)
+        response = self.client.patch(reverse('teacher-info-detail', args=[self.teacher.id]),
+                                     {'experience': '12 years'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_other_teacher_cannot_update(self):
+        self.authorize(self.other_user)
+        response = self.client.patch(reverse('teacher-info-detail', args=[self.teacher.id]),
+                                     {'experience': '12 years'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_profile(self):
+        self.authorize(self.teacher_user)
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'John')
+
+        response = self.client.patch(reverse('profile'), {'first_name': 'Jack'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.data['first_name'], 'Jack')
+
+    def test_refresh_reads_current_claims(self):
+        self.other_user.is_staff = True
+        self.other_user.save()
+        refresh_token = obtain_token_pair(self.other_user)['refresh']
+
+        self.other_user.is_staff = False
+        self.other_user.role = 'student'
+        self.other_user.save()
+        response = self.client.post(reverse('token-refresh'), {'refresh': refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = AccessToken(response.data['access'])
+        self.assertEqual(access['role'], 'student')
+        self.assertFalse(access['is_staff'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        response = self.client.patch(reverse('teacher-info-detail', args=[self.teacher.id]),
+                                     {'experience': '12 years'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_inactive_user_cannot_refresh(self):
+        refresh_token = obtain_token_pair(self.teacher_user)['refresh']
+        self.teacher_user.is_active = False
+        self.teacher_user.save()
+        response = self.client.post(reverse('token-refresh'), {'refresh': refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
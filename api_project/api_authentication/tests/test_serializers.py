@@ -1,10 +1,11 @@
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
-from rest_framework import status
 from rest_framework.exceptions import ValidationError as DRFValidationError
 from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
 
 from ..serializers import UserSerializer, UserProfileSerializer, ChangePasswordSerializer, LoginSerializer, \
     LogoutSerializer
@@ -64,6 +65,30 @@ class TestUserSerializers(TestCase):
     def test_change_password_serializer(self):
         User = get_user_model()
         user = User.objects.create_user(username='changepassuser', password='oldpass', role='student')
+        refresh_token = str(RefreshToken.for_user(user))
+
+        data = {
+            'old_password': 'oldpass',
+            'new_password': 'newpass',
+            'confirm_new_password': 'newpass',
+            'refresh': refresh_token
+        }
+
+        factory = APIRequestFactory()
+        request = factory.post('/change-password/', data=data, format='json')
+        request.user = user
+
+        serializer = ChangePasswordSerializer(data=data, context={'request': request})
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('newpass'))
+        with self.assertRaises(TokenError):
+            RefreshToken(refresh_token)
+
+    def test_change_password_serializer_invalid_token_keeps_password(self):
+        User = get_user_model()
+        user = User.objects.create_user(username='changepassuser', password='oldpass', role='student')
 
         data = {
             'old_password': 'oldpass',
@@ -75,14 +100,13 @@ class TestUserSerializers(TestCase):
         factory = APIRequestFactory()
         request = factory.post('/change-password/', data=data, format='json')
         request.user = user
-        request.META['HTTP_AUTHORIZATION'] = 'Bearer dummy_access_token'
 
-        with patch('requests.post') as mock_post:
-            mock_post.return_value.status_code = status.HTTP_200_OK
-            serializer = ChangePasswordSerializer(data=data, context={'request': request})
-            self.assertTrue(serializer.is_valid())
+        serializer = ChangePasswordSerializer(data=data, context={'request': request})
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(Exception):
             serializer.save()
-            self.assertTrue(user.check_password('newpass'))
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('oldpass'))
 
     def test_login_serializer(self):
         user = User.objects.create_user(username='loginuser', password='loginpass', role='student')
@@ -95,25 +119,15 @@ class TestUserSerializers(TestCase):
         authenticated_user = serializer.validated_data
         self.assertEqual(authenticated_user.username, 'loginuser')
 
-    @patch('api_authentication.serializers.requests.post')  # Мокинг requests.post
-    @patch('api_authentication.serializers.reverse')  # Мокинг reverse
-    def test_logout_serializer(self, mock_reverse, mock_requests_post):
+    def test_logout_serializer(self):
+        refresh_token = str(RefreshToken.for_user(self.user))
+
         # Создайте фальшивый объект запроса
         fake_request = MagicMock()
-        fake_request.data = {'refresh': 'dummy_refresh_token'}
-        fake_request.META = {'HTTP_AUTHORIZATION': 'Bearer dummy_access_token'}
-
-        # Настройте mock для reverse
-        mock_reverse.return_value = 'token-blacklist'
-
-        # Настройте mock для build_absolute_uri
-        fake_request.build_absolute_uri = MagicMock(return_value='https://example.com/blacklist/')
-
-        # Настройте mock для requests.post
-        mock_requests_post.return_value = MagicMock(status_code=status.HTTP_200_OK)  # Успешный ответ
+        fake_request.user = self.user
 
         # Передайте этот фальшивый запрос в контекст
-        serializer = LogoutSerializer(data={'refresh': 'dummy_refresh_token'}, context={'request': fake_request})
+        serializer = LogoutSerializer(data={'refresh': refresh_token}, context={'request': fake_request})
 
         # Проверьте, что сериализатор валидный
         self.assertTrue(serializer.is_valid())
@@ -125,3 +139,18 @@ class TestUserSerializers(TestCase):
             self.fail("LogoutSerializer failed with ValidationError")
         except Exception as e:
             self.fail(f"LogoutSerializer raised an unexpected exception: {str(e)}")
+
+        with self.assertRaises(TokenError):
+            RefreshToken(refresh_token)
+
+    def test_logout_serializer_foreign_token(self):
+        other_user = User.objects.create_user(username='otheruser', password='otherpass', role='student')
+        refresh_token = str(RefreshToken.for_user(other_user))
+        fake_request = MagicMock()
+        fake_request.user = self.user
+
+        serializer = LogoutSerializer(data={'refresh': refresh_token}, context={'request': fake_request})
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(Exception):
+            serializer.save()
+        RefreshToken(refresh_token)
@@ -48,6 +48,18 @@ class UserViewSetTest(APITestCase):
         self.assertIn('last_name', response_data)
         self.assertEqual(response_data['last_name'], 'User')
 
+    def test_list_users_paginated(self):
+        for i in range(4):
+            User.objects.create_user(username=f'user{i}', password='testpassword', role='student',
+                                     phone_number=f'+37529000000{i}')
+        expected = [str(user.id) for user in User.objects.order_by('-date_joined', '-id')]
+        response = self.client.get(self.url_list, {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], expected[:3])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], expected[3:])
+        self.assertIsNone(response.data['next'])
+
 
 class UserProfileViewTest(APITestCase):
     def setUp(self):
@@ -143,6 +155,20 @@ class LoginViewTest(APITestCase):
         self.assertIn('access', response.json())
         self.assertIn('refresh', response.json())
 
+    @patch('requests.post')
+    @patch('django.contrib.auth.hashers.PBKDF2PasswordHasher.verify', autospec=True)
+    def test_login_view_issues_tokens_in_process(self, mock_verify, mock_post):
+        mock_verify.return_value = True
+        response = self.client.post(reverse('login'), {
+            'username': 'testuser',
+            'password': 'testpassword'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.json()), {'access', 'refresh'})
+        self.assertEqual(RefreshToken(response.json()['refresh'])['user_id'], str(self.user.id))
+        self.assertEqual(mock_verify.call_count, 1)
+        mock_post.assert_not_called()
+
 
 class LogoutViewTest(APITestCase):
 
@@ -225,4 +251,4 @@ class TokenViewTest(APITestCase):
                                     HTTP_AUTHORIZATION='Bearer ' + obtain_response.json()['access'], format='json')
 
         # Проверяем статус ответа
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,87 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import User
+
+# user attributes copied into every token, see ClaimsJWTAuthentication
+CLAIMS = ('username', 'role', 'is_staff')
+
+
+def set_claims(token, user):
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_claims(token, user)
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refreshes with the user's current claims instead of the ones copied
+    from the refresh token, so role and staff changes reach the next access
+    token. Deleted and inactive users can no longer refresh.
+    """
+    token_class = ClaimsRefreshToken
+    default_error_messages = {
+        'no_active_account': _('No active account found with the given credentials'),
+    }
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        try:
+            user = User.objects.get(**{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]})
+        except (KeyError, User.DoesNotExist):
+            user = None
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        set_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+def obtain_token_pair(user):
+    """
+    Issues the same refresh/access pair as the token-obtain-pair endpoint
+    for an already authenticated user.
+    """
+    refresh = ClaimsRefreshToken.for_user(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+def blacklist_refresh_token(refresh_token, user=None):
+    """
+    Blacklists a refresh token in the current transaction.
+
+    Raises ``TokenError`` when the token is invalid, expired, already
+    blacklisted or was issued to someone other than ``user``.
+    """
+    token = RefreshToken(refresh_token)
+    if user is not None and token.get(api_settings.USER_ID_CLAIM) != str(getattr(user, api_settings.USER_ID_FIELD)):
+        raise TokenError('Token was issued to another user')
+    token.blacklist()
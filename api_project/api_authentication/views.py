@@ -16,11 +16,19 @@ from rest_framework.authentication import SessionAuthentication
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from api_authentication.permissions import JWTSessionAuthentication
+from .authentication import ClaimsJWTAuthentication
+from .tokens import ClaimsTokenObtainPairSerializer, ClaimsTokenRefreshSerializer
+from api_product.replicas import ReplicaReadMixin
+from utilities.pagination import KeysetPagination
+from utilities.throttling import TokenBucketThrottle
     
     
-class UserViewSet(viewsets.GenericViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'users'
     queryset = User.objects.all()
+    pagination_class = KeysetPagination
 
     @swagger_auto_schema(
         tags=['Users'],
@@ -30,6 +38,10 @@ class UserViewSet(viewsets.GenericViewSet):
     )
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = UserSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = UserSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -46,7 +58,7 @@ class UserViewSet(viewsets.GenericViewSet):
     
     
 class UserProfileView(views.APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -74,7 +86,7 @@ class UserProfileView(views.APIView):
         },
     )
     def put(self, request, *args, **kwargs):
-        user = request.user
+        user = User.objects.get(pk=request.user.pk)
         serializer = UserProfileSerializer(user, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -94,7 +106,7 @@ class UserProfileView(views.APIView):
         },
     )
     def patch(self, request, *args, **kwargs):
-        user = request.user
+        user = User.objects.get(pk=request.user.pk)
         serializer = UserProfileSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -209,6 +221,7 @@ class LogoutView(views.APIView):
 class TokenObtainPairView(TokenObtainPairView): 
     authentication_classes=[]
     permission_classes = [AllowAny]
+    serializer_class = ClaimsTokenObtainPairSerializer
       
     @swagger_auto_schema(
         tags=['Auth'],
@@ -232,6 +245,7 @@ class TokenObtainPairView(TokenObtainPairView):
 class TokenRefreshView(TokenRefreshView):
     authentication_classes=[]
     permission_classes = [AllowAny]
+    serializer_class = ClaimsTokenRefreshSerializer
     
     @swagger_auto_schema(
         tags=['Auth'],
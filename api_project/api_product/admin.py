@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import (TeacherInfo, Certificate, Article, CourseCategory, Course,
                      Discount, Review, FaqCategory, Faq, Application)
+from .counters import related_count
 from .forms import TeacherInfoForm, CourseForm
 
 
@@ -10,19 +11,29 @@ class TeacherInfoAdmin(admin.ModelAdmin):
     
     list_display = ('user', 'full_name', 'education', 'experience', 
                     'course_count', 'certificate_count')
+    list_select_related = ('user',)
     search_fields = ('^username', 'full_name__icontains')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            course_count=related_count(Course.teachers.through, 'teacherinfo'),
+            certificate_count=related_count(Certificate, 'teacher'),
+        )
     
     def certificate_count(self, obj):
-        return obj.certificates.count()
+        return obj.certificate_count
     certificate_count.short_description = 'Certificate count'
+    certificate_count.admin_order_field = 'certificate_count'
     
     def course_count(self, obj):
-        return obj.courses.count()
+        return obj.course_count
     course_count.short_description = 'Course count'
+    course_count.admin_order_field = 'course_count'
     
 
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
+    list_select_related = ('teacher__user',)
     search_fields = ('techer__icontains',)
     
     
@@ -43,18 +54,21 @@ class CourseAdmin(admin.ModelAdmin):
     form = CourseForm
     
     list_display = ('name', 'study_hours', 'price_for_one', 'price_for_many',
-                    'course_category')
+                    'course_category', 'teacher_count', 'student_count', 'review_count')
     list_filter = ('study_hours', 'price_for_one', 'price_for_many',
                     'course_category')
+    list_select_related = ('course_category',)
     search_fields = ('^name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            teacher_count=related_count(Course.teachers.through, 'course'),
+        )
     
     def teacher_count(self, obj):
-        return obj.teachers.count()
+        return obj.teacher_count
     teacher_count.short_description = 'Teacher count'
-    
-    def student_count(self, obj):
-        return obj.students.count()
-    student_count.short_description = 'Student count'
+    teacher_count.admin_order_field = 'teacher_count'
 
 
 @admin.register(Discount)
@@ -65,6 +79,7 @@ class DiscountAdmin(admin.ModelAdmin):
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('author', 'course', 'creation_date')
+    list_select_related = ('course',)
     list_filter = ('creation_date',)
     search_fields = ('^author', '^course')
 
@@ -77,6 +92,7 @@ class FaqCategoryAdmin(admin.ModelAdmin):
 @admin.register(Faq)
 class FaqAdmin(admin.ModelAdmin):
     list_display = ('question', 'faq_category')
+    list_select_related = ('faq_category',)
     list_filter = ('faq_category',)
     search_fields = ('^question',)
 
@@ -85,5 +101,6 @@ class FaqAdmin(admin.ModelAdmin):
 class ApplicationAdmin(admin.ModelAdmin):
     list_display = ('name', 'surname', 'phone_number', 'email', 
                     'start_date', 'course')
+    list_select_related = ('course',)
     list_filter = ('start_date', 'course')
     search_fields = ('^surname', '^course')
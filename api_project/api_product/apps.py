@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ApiProductConfig(AppConfig):
@@ -7,3 +8,5 @@ class ApiProductConfig(AppConfig):
     
     def ready(self):
         import api_product.signals
+        from utilities.sqlite import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='configure_sqlite')
@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60 * 60)
+
+
+def get_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def model_version_key(model):
+    return f'model-change:{model._meta.label_lower}'
+
+
+def row_version_key(model, pk):
+    return f'{model_version_key(model)}:{pk}'
+
+
+def all_rows_version_key(model):
+    # changed by updates that do not say which rows they touched
+    return f'{model_version_key(model)}:*'
+
+
+def new_model_version():
+    return uuid.uuid4().hex, time.time()
+
+
+def get_model_versions(models):
+    """
+    Returns the current ``(token, changed_at)`` change version of every
+    model, creating the missing ones.
+    """
+    return get_versions([model_version_key(model) for model in models])
+
+
+def get_versions(keys):
+    """
+    Returns the change versions stored under ``keys``, creating the
+    missing ones.
+
+    A missing version counts as a change made now, so losing the cache can
+    only make clients download a list again, never skip a real change.
+    """
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_model_version()
+            cache.add(key, version, None)
+            versions[key] = cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model, pks=None):
+    """
+    Bumps the version of ``model``, and of its rows ``pks``, or of all of
+    its rows when they are not known.
+    """
+    if pks is None:
+        keys = [all_rows_version_key(model)]
+    else:
+        keys = [row_version_key(model, pk) for pk in pks]
+    get_cache().set_many({key: new_model_version() for key in [model_version_key(model), *keys]}, None)
+
+
+def invalidate_model(model, pks=None):
+    # bumped again on commit so a response rendered from the old rows
+    # while the transaction was open is not served afterwards
+    pks = None if pks is None else list(pks)
+    bump_model_version(model, pks)
+    transaction.on_commit(lambda: bump_model_version(model, pks))
+
+
+def response_version_keys(view, lookup):
+    """
+    The version keys a response depends on: those of the viewset's
+    ``cache_dependencies``, except that a detail response depends only on
+    its own row of the viewset's model.
+    """
+    models = view.cache_dependencies
+    model = getattr(view.queryset, 'model', None)
+    if not lookup or model not in models:
+        return [model_version_key(dependency) for dependency in models]
+    try:
+        pk = model._meta.pk.to_python(lookup)
+    except ValidationError:
+        # answered with 404 by the action
+        return [model_version_key(dependency) for dependency in models]
+    return [row_version_key(model, pk), all_rows_version_key(model),
+            *(model_version_key(dependency) for dependency in models if dependency is not model)]
+
+
+class ResponseValidators:
+    """
+    Validators of a viewset action response, derived only from the change
+    versions in ``response_version_keys``.
+
+    Last-Modified has whole seconds, so it is not sent while the last
+    change is in the current second: a client revalidating with it would
+    miss another change made later in that second.
+    """
+    def __init__(self, view, request, kwargs):
+        lookup = kwargs.get(view.lookup_url_kwarg or view.lookup_field, '')
+        versions = get_versions(response_version_keys(view, lookup))
+        query = sorted(request.query_params.lists())
+        renderer = request.accepted_renderer.format
+        # absolute media urls depend on the host the request came through
+        digest = hashlib.md5(
+            repr(([token for token, _ in versions], request.get_host(), query)).encode()
+        ).hexdigest()
+
+        self.cache_key = f'response:{view.basename}:{view.action}:{lookup}:{renderer}:{digest}'
+        self.etag = quote_etag(hashlib.md5(self.cache_key.encode()).hexdigest())
+        self.last_modified = math.ceil(max(changed_at for _, changed_at in versions))
+
+    def not_modified_response(self, request):
+        return get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+
+    def set_headers(self, response):
+        response['ETag'] = self.etag
+        if self.last_modified < time.time():
+            response['Last-Modified'] = http_date(self.last_modified)
+
+
+def conditional_response(view_method):
+    """
+    Answers a read-only viewset action with ``304 Not Modified`` when the
+    client's If-None-Match/If-Modified-Since still match the change versions
+    of the viewset's ``cache_dependencies``, without running the action.
+    """
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        validators = ResponseValidators(view, request, kwargs)
+        response = validators.not_modified_response(request)
+        if response is not None:
+            return response
+
+        response = view_method(view, request, *args, **kwargs)
+        if response.status_code == 200:
+            validators.set_headers(response)
+        return response
+    return wrapper
+
+
+def cache_response(view_method):
+    """
+    Like ``conditional_response``, and also caches the rendered response.
+
+    The key covers the endpoint, the query string and the change versions of
+    the viewset's ``cache_dependencies``, which the receivers in
+    ``api_product.signals`` bump whenever one of those models is edited.
+    """
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        validators = ResponseValidators(view, request, kwargs)
+        response = validators.not_modified_response(request)
+        if response is not None:
+            return response
+
+        cache = get_cache()
+        response = cache.get(validators.cache_key)
+        if response is not None:
+            # with Last-Modified, if it was rendered in the second of a change
+            validators.set_headers(response)
+            return response
+
+        response = view_method(view, request, *args, **kwargs)
+        if response.status_code == 200:
+            validators.set_headers(response)
+            response.add_post_render_callback(
+                lambda rendered: cache.set(validators.cache_key, rendered, RESPONSE_CACHE_TIMEOUT)
+            )
+        return response
+    return wrapper
@@ -0,0 +1,51 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .cache import invalidate_model
+from .models import Course, Review
+
+
+def related_count(model, field_name):
+    """
+    Counts the rows of ``model`` whose ``field_name`` points at the outer
+    row, in a correlated subquery so that several counts in one query do
+    not multiply each other's joins.
+    """
+    rows = model.objects.filter(**{field_name: OuterRef('pk')}).order_by().values(field_name)
+    return Coalesce(Subquery(rows.annotate(count=Count('*')).values('count')), 0)
+
+
+# counter field -> (model, field pointing at the course) of the counted rows
+COURSE_COUNTERS = {
+    'student_count': (Course.students.through, 'course'),
+    'review_count': (Review, 'course'),
+}
+
+
+def adjust_counter(course_ids, counter, delta):
+    """
+    Adds ``delta`` to a counter of the courses with an ``F()`` update, so
+    concurrent adjustments do not overwrite each other.
+    """
+    if not course_ids or not delta:
+        return
+    Course.objects.filter(pk__in=course_ids).update(**{counter: F(counter) + delta})
+    # update() sends no post_save
+    invalidate_model(Course, course_ids)
+
+
+def reconcile_counters(dry_run=False):
+    """
+    Recounts the counters of every course and fixes those that drifted.
+    Returns the names of the fixed courses.
+    """
+    actual = {counter: related_count(model, field_name) for counter, (model, field_name) in COURSE_COUNTERS.items()}
+    in_sync = Q(**{counter: F(f'actual_{counter}') for counter in COURSE_COUNTERS})
+    drifted = dict(
+        Course.objects.annotate(**{f'actual_{counter}': count for counter, count in actual.items()})
+        .exclude(in_sync).values_list('pk', 'name')
+    )
+    if drifted and not dry_run:
+        Course.objects.filter(pk__in=drifted).update(**actual)
+        invalidate_model(Course, drifted)
+    return sorted(drifted.values())
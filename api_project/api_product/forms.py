@@ -12,7 +12,7 @@ class TeacherInfoForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['user'].queryset = User.objects.filter(role='teacher')
+        self.fields['user'].queryset = User.objects.filter(role='teacher').only('id', 'username', 'role')
 
     def clean_user(self):
         user = self.cleaned_data.get('user')
@@ -28,7 +28,7 @@ class CourseForm(forms.ModelForm):
         
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['students'].queryset = User.objects.filter(role='student')
+        self.fields['students'].queryset = User.objects.filter(role='student').only('id', 'username')
 
 
         
\ No newline at end of file
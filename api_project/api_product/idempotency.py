@@ -0,0 +1,170 @@
+import datetime
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from .models import IdempotencyLock
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _describe(value):
+    if isinstance(value, UploadedFile):
+        return [value.name, value.size]
+    return str(value)
+
+
+def request_fingerprint(request):
+    """
+    Digest of the parsed request data. Uploaded files count by name and
+    size, so the body is never read into memory for it.
+    """
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = sorted(data.lists())
+    return hashlib.md5(json.dumps(data, sort_keys=True, default=_describe).encode()).hexdigest()
+
+
+def idempotency_cache_key(view, request, key):
+    user = request.user
+    if user is not None and user.is_authenticated:
+        owner = str(user.pk)
+    else:
+        # anonymous clients have no pk, their keys are scoped to the client
+        owner = f'anonymous:{BaseThrottle().get_ident(request)}'
+    scope = hashlib.md5(repr((view.basename, view.action, owner, key)).encode())
+    return f'idempotency:{scope.hexdigest()}'
+
+
+def acquire_lock(cache_key, fingerprint, timeout):
+    """
+    Takes the lock of ``cache_key`` for ``timeout`` seconds, replacing an
+    expired one. Returns None once taken, otherwise the lock held by another
+    request.
+    """
+    while True:
+        now = timezone.now()
+        IdempotencyLock.objects.filter(key=cache_key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyLock.objects.create(key=cache_key, fingerprint=fingerprint,
+                                               expires_at=now + datetime.timedelta(seconds=timeout))
+            return None
+        except IntegrityError:
+            lock = IdempotencyLock.objects.filter(key=cache_key).first()
+            if lock is not None:
+                return lock
+            # released in between, try again
+
+
+def release_lock(cache_key):
+    IdempotencyLock.objects.filter(key=cache_key).delete()
+
+
+def store_response(cache_key, response, timeout):
+    """
+    Keeps the rendered ``response`` in the lock of ``cache_key`` for
+    ``timeout`` seconds, which then answers the retries.
+    """
+    IdempotencyLock.objects.filter(key=cache_key).update(
+        status_code=response.status_code,
+        headers=dict(response.items()),
+        content=response.content,
+        expires_at=timezone.now() + datetime.timedelta(seconds=timeout),
+    )
+
+
+def discard_expired_keys():
+    """
+    Deletes the expired locks and stored responses. Returns their number.
+    """
+    deleted, _ = IdempotencyLock.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def idempotent_response(view_method):
+    """
+    Honors an ``Idempotency-Key`` header on a create action. The first
+    response for a key, unless it is a server error, is kept for
+    ``IDEMPOTENCY_KEY_TIMEOUT`` seconds. Retries with the same key get it
+    back with ``Idempotent-Replayed: true``, without running the action.
+
+    Keys are scoped to the endpoint and the user, or the client address for
+    anonymous requests. While the first request is still running, a retry
+    waits up to ``IDEMPOTENCY_WAIT_TIMEOUT`` seconds for its response and
+    then gets ``409 Conflict``. Reusing a key with a different body is
+    answered with ``422``.
+
+    The running request holds an ``IdempotencyLock`` row rather than a cache
+    entry: adding a key to the file based cache is a check then a write, so
+    two workers could both take it. The same row then keeps the response,
+    which culling the shared cache would drop at random.
+    """
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({'detail': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = idempotency_cache_key(view, request, key)
+        fingerprint = request_fingerprint(request)
+
+        def key_reused():
+            return Response({'detail': f'{IDEMPOTENCY_HEADER} was already used for a different request.'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        def stored_response(lock):
+            response = HttpResponse(bytes(lock.content), status=lock.status_code, headers=lock.headers)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        wait_timeout = getattr(settings, 'IDEMPOTENCY_WAIT_TIMEOUT', 10)
+        lock_timeout = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60)
+        deadline = time.monotonic() + wait_timeout
+        delay = 0.05
+        while True:
+            lock = IdempotencyLock.objects.filter(key=cache_key, expires_at__gt=timezone.now()).first()
+            if lock is None:
+                lock = acquire_lock(cache_key, fingerprint, lock_timeout)
+                if lock is None:
+                    break
+            if lock.fingerprint != fingerprint:
+                return key_reused()
+            if lock.status_code is not None:
+                return stored_response(lock)
+            if time.monotonic() >= deadline:
+                response = Response({'detail': 'A request with this Idempotency-Key is still in progress.'},
+                                    status=status.HTTP_409_CONFLICT)
+                response['Retry-After'] = '1'
+                return response
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        try:
+            response = view_method(view, request, *args, **kwargs)
+        except Exception:
+            release_lock(cache_key)
+            raise
+        if response.status_code >= 500:
+            release_lock(cache_key)
+            return response
+
+        def store(rendered):
+            store_response(cache_key, rendered, getattr(settings, 'IDEMPOTENCY_KEY_TIMEOUT', 24 * 60 * 60))
+        response.add_post_render_callback(store)
+        return response
+    return wrapper
@@ -0,0 +1,147 @@
+import io
+import math
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from .cache import invalidate_model
+from .models import TeacherInfo, Article, Course
+
+VARIANT_WIDTHS = tuple(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (80, 160, 320, 640, 1280)))
+# format -> (extension, Pillow format, save options)
+VARIANT_FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# model -> image fields with a ``<field>_variants`` manifest column
+IMAGE_VARIANT_FIELDS = {
+    TeacherInfo: ('photo',),
+    Article: ('image',),
+    Course: ('image',),
+}
+
+EXIF_ORIENTATION = 0x0112
+# orientations that rotate the image by 90 degrees
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def variants_field_name(field_name):
+    return f'{field_name}_variants'
+
+
+def variant_name(name, width, variant_format):
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_{width}w.{VARIANT_FORMATS[variant_format][0]}'
+
+
+def stored_file_names(name, variants):
+    """
+    Returns the original and the variant files of an image. Variant names
+    follow from the original's, the manifest adds any left from other widths.
+    """
+    if not name:
+        return []
+    names = [name]
+    for variant_format in VARIANT_FORMATS:
+        names.extend(variant_name(name, width, variant_format) for width in VARIANT_WIDTHS)
+        if variants and variants.get('source') == name:
+            names.extend(variants.get(variant_format, {}).values())
+    return list(dict.fromkeys(names))
+
+
+def variants_outdated(instance, field_name):
+    field_file = getattr(instance, field_name)
+    variants = getattr(instance, variants_field_name(field_name))
+    if field_file:
+        return variants.get('source') != field_file.name
+    return bool(variants)
+
+
+def _is_fresh(storage, name, source_modified):
+    try:
+        return storage.get_modified_time(name) >= source_modified
+    except (OSError, NotImplementedError):
+        return False
+
+
+def _encode(image, variant_format):
+    _, pillow_format, options = VARIANT_FORMATS[variant_format]
+    if pillow_format == 'JPEG' or 'A' not in image.getbands():
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file, force=False):
+    """
+    Writes the resized variants of an image next to the original and
+    returns the manifest stored in the ``<field>_variants`` column:
+    ``{'source': name, 'webp': {'80': name, ...}, 'jpeg': {...}}``.
+
+    Variants newer than the original are kept, so running it again only
+    does work for missing or outdated files. Images are never upscaled.
+    """
+    storage = field_file.storage
+    name = field_file.name
+    source_modified = storage.get_modified_time(name)
+    manifest = {'source': name}
+
+    with storage.open(name, 'rb') as source, Image.open(source) as image:
+        stored_width, stored_height = image.size
+        transposed = image.getexif().get(EXIF_ORIENTATION) in TRANSPOSED_ORIENTATIONS
+        display_width = stored_height if transposed else stored_width
+        widths = [width for width in VARIANT_WIDTHS if width < display_width]
+        missing = [
+            (width, variant_format)
+            for width in widths for variant_format in VARIANT_FORMATS
+            if force or not _is_fresh(storage, variant_name(name, width, variant_format), source_modified)
+        ]
+        if missing:
+            # decode camera JPEGs at a reduced scale when possible
+            scale = max(width for width, _ in missing) / display_width
+            image.draft('RGB', (math.ceil(stored_width * scale), math.ceil(stored_height * scale)))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            # largest first, each size resized from the previous one
+            for width in sorted({width for width, _ in missing}, reverse=True):
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+                for variant_format in VARIANT_FORMATS:
+                    if (width, variant_format) not in missing:
+                        continue
+                    target = variant_name(name, width, variant_format)
+                    if storage.exists(target):
+                        storage.delete(target)
+                    storage.save(target, ContentFile(_encode(image, variant_format)))
+
+    for variant_format in VARIANT_FORMATS:
+        manifest[variant_format] = {
+            str(width): variant_name(name, width, variant_format) for width in widths
+        }
+    return manifest
+
+
+def refresh_variants(model, pk, field_name, force=False):
+    """
+    Regenerates the variants of one image field and stores the manifest.
+    Does nothing when the image was replaced again in the meantime.
+    """
+    instance = model.objects.filter(pk=pk).only(field_name).first()
+    if instance is None:
+        return
+    field_file = getattr(instance, field_name)
+    if field_file:
+        manifest = generate_variants(field_file, force)
+        unchanged = Q(**{field_name: field_file.name})
+    else:
+        manifest = {}
+        unchanged = Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+    updated = model.objects.filter(unchanged, pk=pk).update(**{variants_field_name(field_name): manifest})
+    if updated:
+        invalidate_model(model, [pk])
@@ -0,0 +1,94 @@
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from api_authentication.models import User
+
+# (url name, query parameters, needs an admin session) of the requests replayed
+REPLAY_REQUESTS = (
+    ('courses-list', {}, False),
+    ('courses-list', {'page_size': 20}, False),
+    ('course-categories-list', {'page_size': 20}, False),
+    ('articles-list', {'page_size': 20}, False),
+    ('reviews-list', {'page_size': 20}, False),
+    ('applications-list', {'page_size': 20}, False),
+    ('admin:api_product_course_changelist', {}, True),
+    ('admin:api_product_course_changelist', {'price_for_one': 100}, True),
+    ('admin:api_product_course_changelist', {'study_hours': 40}, True),
+    ('admin:api_product_review_changelist', {}, True),
+    ('admin:api_product_application_changelist', {}, True),
+    ('admin:api_product_application_changelist', {'start_date__gte': '2024-01-01'}, True),
+)
+
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+TEMP_SORT_RE = re.compile(r'^USE TEMP B-TREE FOR (.+)$')
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+Finding = namedtuple('Finding', 'kind table detail sql count')
+
+
+def replay(requests=REPLAY_REQUESTS, admin=None):
+    """
+    Replays the requests with the response caches disabled and returns the
+    captured queries. Admin requests are skipped when there is no admin.
+    """
+    client = Client()
+    if admin is not None:
+        client.force_login(admin)
+    caches = {alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES}
+    with override_settings(CACHES=caches, ALLOWED_HOSTS=['testserver']), \
+            CaptureQueriesContext(connection) as context:
+        for url_name, params, needs_admin in requests:
+            if needs_admin and admin is None:
+                continue
+            client.get(reverse(url_name), params)
+    return [query['sql'] for query in context.captured_queries]
+
+
+def default_admin():
+    return User.objects.filter(is_superuser=True, is_active=True).order_by('pk').first()
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def fingerprint(sql):
+    return LITERAL_RE.sub('?', sql)
+
+
+def analyze(queries):
+    """
+    Runs EXPLAIN QUERY PLAN once per distinct SELECT, literals aside, and
+    returns the full table scans and temporary B-tree sorts, most frequent
+    first.
+    """
+    examples, counts = {}, {}
+    for sql in queries:
+        if sql.lstrip().upper().startswith('SELECT'):
+            key = fingerprint(sql)
+            examples.setdefault(key, sql)
+            counts[key] = counts.get(key, 0) + 1
+
+    findings = []
+    for key, sql in examples.items():
+        for detail in explain(sql):
+            match = FULL_SCAN_RE.match(detail)
+            if match:
+                findings.append(Finding('full scan', match.group(1), detail, key, counts[key]))
+                continue
+            match = TEMP_SORT_RE.match(detail)
+            if match:
+                findings.append(Finding('temp b-tree', tables(sql), detail, key, counts[key]))
+    return sorted(findings, key=lambda finding: -finding.count)
+
+
+def tables(sql):
+    return ', '.join(dict.fromkeys(re.findall(r'(?:FROM|JOIN) "(\w+)"', sql)))
@@ -0,0 +1,339 @@
+import contextlib
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection, transaction
+
+from .cache import invalidate_model
+from .models import Application, Course
+
+logger = logging.getLogger(__name__)
+
+# fields of an accepted application written to the journal
+RECORD_FIELDS = ('id', 'name', 'surname', 'phone_number', 'email', 'start_date', 'course_id')
+
+
+def intake_dir():
+    return getattr(settings, 'APPLICATION_INTAKE_DIR', os.path.join(settings.BASE_DIR, 'intake'))
+
+
+def intake_batch_size():
+    return getattr(settings, 'APPLICATION_INTAKE_BATCH_SIZE', 500)
+
+
+def intake_max_attempts():
+    return getattr(settings, 'APPLICATION_INTAKE_MAX_ATTEMPTS', 3)
+
+
+def journal_path(pid):
+    return os.path.join(intake_dir(), f'{pid}.journal')
+
+
+def batch_path(pid):
+    return os.path.join(intake_dir(), f'{pid}-{time.time_ns()}.batch')
+
+
+def dead_letter_path():
+    return os.path.join(intake_dir(), 'dead-letter.jsonl')
+
+
+def status_dir():
+    return os.path.join(intake_dir(), 'status')
+
+
+def status_path(pk):
+    return os.path.join(status_dir(), str(pk))
+
+
+def quarantine_path(path):
+    return os.path.splitext(path)[0] + '.quarantined'
+
+
+def owner_pid(path):
+    return int(os.path.basename(path).split('.')[0].split('-')[0])
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class CourseLookup:
+    """
+    Caches the courses applications are submitted for, with their
+    category, for ``APPLICATION_COURSE_CACHE_TIMEOUT`` seconds in this
+    process. A course deleted meanwhile is caught when the batch is saved.
+    """
+    def __init__(self):
+        self._courses = {}
+
+    def get(self, pk):
+        cached = self._courses.get(pk)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        course = Course.objects.select_related('course_category').filter(pk=pk).first()
+        if course is not None:
+            timeout = getattr(settings, 'APPLICATION_COURSE_CACHE_TIMEOUT', 60)
+            self._courses[pk] = (course, time.monotonic() + timeout)
+        return course
+
+    def clear(self):
+        self._courses.clear()
+
+
+class ApplicationIntake:
+    """
+    Acknowledges applications once they are appended, and fsynced, to a
+    journal file of this process, and saves them with ``bulk_create`` from
+    a background thread: every ``APPLICATION_INTAKE_FLUSH_INTERVAL``
+    seconds, or as soon as ``APPLICATION_INTAKE_BATCH_SIZE`` are waiting.
+
+    The journal is renamed to a ``.batch`` file before it is saved, and the
+    file is removed only after the transaction commits. Applications keep
+    the id they were acknowledged with, so a batch saved again after a
+    crash does not duplicate rows. Files of processes that died are
+    adopted when a flusher starts and by ``manage.py flush_applications``.
+
+    A batch that fails does not hold up the batches after it, and after
+    ``APPLICATION_INTAKE_MAX_ATTEMPTS`` failures it is renamed to a
+    ``.quarantined`` file, retried only by ``manage.py flush_applications
+    --retry-quarantined``. Applications that cannot be saved at all are
+    appended to the dead-letter file.
+
+    Each accepted application also gets an empty marker file named after
+    its id, removed once it is saved and given the reason once it is
+    dead-lettered, so ``application_status`` never reads the journals.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._journal = None
+        self._pid = None
+        self._pending = 0
+        self._worker = None
+        self._failures = {}
+
+    def submit(self, application):
+        record = {field: getattr(application, field) for field in RECORD_FIELDS}
+        line = json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+        with self._lock:
+            journal = self._open_journal()
+            journal.write(line)
+            journal.flush()
+            if getattr(settings, 'APPLICATION_INTAKE_FSYNC', True):
+                os.fsync(journal.fileno())
+            # not fsynced: after a power loss the status is unknown until
+            # the journal is saved
+            open(status_path(record['id']), 'w').close()
+            self._pending += 1
+            if self._pending >= intake_batch_size():
+                self._wake.set()
+
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            self.flush()
+        else:
+            self._start_worker()
+
+    def _open_journal(self):
+        if self._journal is None or self._pid != os.getpid():
+            # a forked worker starts its own journal
+            self._pid = os.getpid()
+            os.makedirs(status_dir(), exist_ok=True)
+            self._journal = open(journal_path(self._pid), 'a', encoding='utf-8')
+            self._pending = 0
+        return self._journal
+
+    def rotate(self):
+        with self._lock:
+            if self._journal is None or self._pid != os.getpid():
+                return
+            self._journal.close()
+            self._journal = None
+            self._pending = 0
+            os.replace(journal_path(self._pid), batch_path(self._pid))
+
+    def flush(self):
+        """
+        Saves every application accepted by this process so far.
+        """
+        self.rotate()
+        saved = 0
+        for path in sorted(glob.glob(os.path.join(intake_dir(), f'{os.getpid()}-*.batch'))):
+            try:
+                saved += save_batch_file(path)
+            except Exception:
+                self._batch_failed(path)
+            else:
+                self._failures.pop(path, None)
+        return saved
+
+    def _batch_failed(self, path):
+        failures = self._failures.pop(path, 0) + 1
+        if failures < intake_max_attempts():
+            self._failures[path] = failures
+            logger.exception('Could not save %s, attempt %d', path, failures)
+        else:
+            logger.exception('Quarantining %s after %d attempts', path, failures)
+            os.replace(path, quarantine_path(path))
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='application-intake', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        adopt_abandoned_files()
+        while True:
+            self._wake.wait(getattr(settings, 'APPLICATION_INTAKE_FLUSH_INTERVAL', 1.0))
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not save accepted applications')
+            finally:
+                connection.close()
+
+
+def adopt_abandoned_files():
+    """
+    Renames the journals and batches of processes that are no longer
+    running to batches of this process.
+    """
+    adopted = 0
+    for path in glob.glob(os.path.join(intake_dir(), '*.journal')) + \
+            glob.glob(os.path.join(intake_dir(), '*.batch')):
+        if process_alive(owner_pid(path)):
+            continue
+        try:
+            os.replace(path, batch_path(os.getpid()))
+        except FileNotFoundError:
+            # adopted by another process first
+            continue
+        adopted += 1
+    return adopted
+
+
+def read_batch_file(path):
+    records = []
+    with open(path, encoding='utf-8') as batch:
+        for line in batch:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # a line cut short by a crash was never acknowledged
+                logger.warning('Skipping a malformed application in %s', path)
+    return records
+
+
+def save_applications(records):
+    """
+    Inserts the journaled applications with ``bulk_create``. Returns how
+    many were inserted and the records of the applications for courses
+    deleted since they were accepted, which cannot be saved. Applications
+    saved before, by a batch replayed after a crash, are skipped.
+    """
+    course_ids = {uuid.UUID(record['course_id']) for record in records}
+    existing = set(Course.objects.filter(pk__in=course_ids).values_list('pk', flat=True))
+    ids = {uuid.UUID(record['id']) for record in records}
+    saved = set(Application.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    applications, undeliverable = [], []
+    for record in records:
+        pk = uuid.UUID(record['id'])
+        if pk in saved:
+            continue
+        saved.add(pk)
+        if uuid.UUID(record['course_id']) in existing:
+            applications.append(Application(**record))
+        else:
+            undeliverable.append(record)
+    if applications:
+        Application.objects.bulk_create(applications, batch_size=intake_batch_size())
+        # bulk_create sends no post_save
+        invalidate_model(Application, [application.pk for application in applications])
+    return len(applications), undeliverable
+
+
+def write_dead_letters(records, reason):
+    logger.warning('Moving %d applications to the dead-letter file: %s', len(records), reason)
+    with open(dead_letter_path(), 'a', encoding='utf-8') as dead_letter:
+        for record in records:
+            dead_letter.write(json.dumps({'record': record, 'reason': reason}, cls=DjangoJSONEncoder) + '\n')
+        dead_letter.flush()
+        if getattr(settings, 'APPLICATION_INTAKE_FSYNC', True):
+            os.fsync(dead_letter.fileno())
+    os.makedirs(status_dir(), exist_ok=True)
+    for record in records:
+        path = status_path(record['id'])
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as marker:
+            marker.write(reason)
+        os.replace(f'{path}.tmp', path)
+
+
+def save_batch_file(path):
+    records = read_batch_file(path)
+    saved, undeliverable = 0, []
+    with transaction.atomic():
+        if records:
+            saved, undeliverable = save_applications(records)
+    # before the batch is removed, so a crash in between writes them again
+    if undeliverable:
+        write_dead_letters(undeliverable, 'course was deleted')
+    os.remove(path)
+    rejected = {record['id'] for record in undeliverable}
+    for record in records:
+        if record['id'] not in rejected:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(status_path(record['id']))
+    return saved
+
+
+def retry_quarantined():
+    """
+    Turns the quarantined batches back into batches of this process and
+    returns how many there were.
+    """
+    retried = 0
+    for path in glob.glob(os.path.join(intake_dir(), '*.quarantined')):
+        try:
+            os.replace(path, batch_path(os.getpid()))
+        except FileNotFoundError:
+            continue
+        retried += 1
+    return retried
+
+
+def application_status(pk):
+    """
+    Returns ``'saved'``, ``'pending'`` while the application waits in a
+    journal, batch or quarantined batch, ``'rejected'`` with the reason
+    once it is dead-lettered, or None for an unknown id.
+    """
+    if Application.objects.filter(pk=pk).exists():
+        return 'saved', None
+    try:
+        with open(status_path(pk), encoding='utf-8') as marker:
+            reason = marker.read()
+    except FileNotFoundError:
+        # saved, and its marker removed, since the query above
+        if Application.objects.filter(pk=pk).exists():
+            return 'saved', None
+        return None, None
+    return ('rejected', reason) if reason else ('pending', None)
+
+
+application_intake = ApplicationIntake()
+course_lookup = CourseLookup()
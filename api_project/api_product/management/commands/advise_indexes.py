@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api_authentication.models import User
+from api_product.index_advisor import analyze, default_admin, replay
+
+
+class Command(BaseCommand):
+    help = ('Replays the hot API and admin requests, runs EXPLAIN QUERY PLAN on their queries '
+            'and reports full table scans and temporary B-tree sorts')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--admin', metavar='USERNAME',
+                            help='Admin to replay the admin changelists as, the first superuser by default')
+        parser.add_argument('--no-admin', action='store_true', help='Skip the admin changelists')
+        parser.add_argument('--sql', action='store_true', help='Print the SQL of every finding')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN is only supported on SQLite')
+
+        admin = None
+        if options['admin']:
+            try:
+                admin = User.objects.get(username=options['admin'], is_superuser=True)
+            except User.DoesNotExist:
+                raise CommandError(f'No superuser named "{options["admin"]}"')
+        elif not options['no_admin']:
+            admin = default_admin()
+            if admin is None:
+                self.stderr.write('No superuser found, skipping the admin changelists')
+
+        queries = replay(admin=admin)
+        findings = analyze(queries)
+        for finding in findings:
+            self.stdout.write(f'{finding.count:>4}x  {finding.kind:<12} {finding.table:<40} {finding.detail}')
+            if options['sql']:
+                self.stdout.write(f'       {finding.sql}')
+        style = self.style.WARNING if findings else self.style.SUCCESS
+        self.stdout.write(style(f'{len(findings)} findings in {len(queries)} queries'))
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from api_product.media import find_orphaned_files
+
+
+class Command(BaseCommand):
+    help = ('Deletes the teacher photos, certificates, article and course images and their variants '
+            'that no row refers to anymore')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the orphaned files without deleting them')
+        parser.add_argument('--min-age', type=float, default=24,
+                            help='Only collect files last modified at least this many hours ago (default 24)')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Number of threads deleting files (default 4)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of files checked against the database at once (default 1000)')
+
+    def handle(self, *args, **options):
+        found = deleted = failed = size = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            batches = find_orphaned_files(default_storage, min_age=options['min_age'] * 3600,
+                                          batch_size=options['batch_size'])
+            for batch in batches:
+                found += len(batch)
+                if options['dry_run']:
+                    for name, file_size in batch:
+                        self.stdout.write(name)
+                        size += file_size
+                    continue
+                for (name, file_size), error in zip(batch, executor.map(self.delete, batch)):
+                    if error is None:
+                        deleted += 1
+                        size += file_size
+                    else:
+                        failed += 1
+                        self.stderr.write(f'{name}: {error}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Found {found} orphaned files, {size} bytes'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} orphaned files, {size} bytes, {failed} failed'))
+
+    @staticmethod
+    def delete(file):
+        name, _ = file
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            return e
+        return None
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api_product.idempotency import discard_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes the expired Idempotency-Key locks and stored responses'
+
+    def handle(self, *args, **options):
+        deleted = discard_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api_product.uploads import discard_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Deletes the expired upload sessions and the part files that no session refers to anymore'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=float, default=1,
+                            help='Only delete part files without a session last modified at least '
+                                 'this many hours ago (default 1)')
+
+    def handle(self, *args, **options):
+        sessions, files = discard_expired_sessions(min_age=options['min_age'] * 3600)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {sessions} expired upload sessions, {files} part files without a session'
+        ))
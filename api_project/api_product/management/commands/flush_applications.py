@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api_product.intake import adopt_abandoned_files, application_intake, retry_quarantined
+
+
+class Command(BaseCommand):
+    help = 'Saves the buffered applications left behind by processes that are no longer running'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-quarantined', action='store_true',
+                            help='Also retry the batches quarantined after APPLICATION_INTAKE_MAX_ATTEMPTS failures')
+
+    def handle(self, *args, **options):
+        adopted = adopt_abandoned_files()
+        if options['retry_quarantined']:
+            adopted += retry_quarantined()
+        saved = application_intake.flush()
+        self.stdout.write(self.style.SUCCESS(
+            f'Flushed {saved} applications, adopted {adopted} files of stopped processes'
+        ))
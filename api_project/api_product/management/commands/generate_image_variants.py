@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api_product.images import IMAGE_VARIANT_FIELDS, refresh_variants, variants_field_name
+
+
+class Command(BaseCommand):
+    help = 'Generates the missing resized variants of teacher photos, article and course images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Re-encode every variant, not only the missing or outdated ones')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for model, field_names in IMAGE_VARIANT_FIELDS.items():
+            for field_name in field_names:
+                no_image = Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+                no_variants = Q(**{variants_field_name(field_name): {}})
+                pks = model.objects.exclude(no_image & no_variants).values_list('pk', flat=True)
+                for pk in pks.iterator():
+                    try:
+                        refresh_variants(model, pk, field_name, force=options['force'])
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f'{model._meta.label} {pk} {field_name}: {e}')
+                    else:
+                        processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images, {failed} failed'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api_product.stats import rebuild_category_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the course category statistics from scratch'
+
+    def handle(self, *args, **options):
+        count = rebuild_category_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the statistics of {count} categories'))
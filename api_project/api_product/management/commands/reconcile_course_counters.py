@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api_product.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recounts the student and review counters of every course and fixes those that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the courses with drifted counters without fixing them')
+
+    def handle(self, *args, **options):
+        drifted = reconcile_counters(dry_run=options['dry_run'])
+        for name in drifted:
+            self.stdout.write(name)
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(drifted)} courses with drifted counters'))
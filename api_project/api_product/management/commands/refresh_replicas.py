@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api_product.replicas import refresh_replica, replica_aliases
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary database into the SQLite read replicas of DATABASE_REPLICAS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', metavar='alias',
+                            help='Replicas to refresh, all of DATABASE_REPLICAS by default')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or replica_aliases()
+        for alias in aliases:
+            if alias not in replica_aliases():
+                raise CommandError(f'"{alias}" is not in DATABASE_REPLICAS')
+            if alias not in settings.DATABASES or connections[alias].vendor != 'sqlite':
+                raise CommandError(f'"{alias}" is not a SQLite database')
+        for alias in aliases:
+            refresh_replica(alias)
+            self.stdout.write(f'Refreshed {alias}')
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {len(aliases)} replicas'))
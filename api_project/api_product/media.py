@@ -0,0 +1,125 @@
+import os
+import re
+import time
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from .images import IMAGE_VARIANT_FIELDS, VARIANT_FORMATS
+from .models import TeacherInfo, Certificate, Article, Course
+
+# model -> file fields whose files are removed with the row or when replaced
+MEDIA_FIELDS = {
+    Certificate: ('file',),
+    TeacherInfo: ('photo',),
+    Article: ('image',),
+    Course: ('image',),
+}
+
+VARIANT_NAME_RE = re.compile(
+    r'^(?P<stem>.+)_\d+w\.(?:%s)$' % '|'.join(re.escape(options[0]) for options in VARIANT_FORMATS.values())
+)
+
+# sources of variant files are looked up with one range condition per stem
+VARIANT_LOOKUP_CHUNK_SIZE = 100
+
+
+def media_directories():
+    """
+    Returns ``{upload directory: [(model, field name, has variants)]}``
+    of the media fields.
+    """
+    directories = {}
+    for model, field_names in MEDIA_FIELDS.items():
+        for field_name in field_names:
+            directory = model._meta.get_field(field_name).upload_to.strip('/')
+            has_variants = field_name in IMAGE_VARIANT_FIELDS.get(model, ())
+            directories.setdefault(directory, []).append((model, field_name, has_variants))
+    return directories
+
+
+def iter_files(storage, directory, modified_before):
+    """
+    Yields ``(name, size)`` of the files under ``directory`` last modified
+    before the ``modified_before`` timestamp. The tree is walked with
+    ``os.scandir``, one directory listing at a time.
+    """
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = os.scandir(storage.path(current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = f'{current}/{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    if stat.st_mtime < modified_before:
+                        yield name, stat.st_size
+
+
+def referenced_names(fields, names):
+    """
+    Returns the ``names`` stored in the fields, with one query per field.
+    """
+    referenced = set()
+    for model, field_name, _ in fields:
+        referenced.update(model.objects.filter(**{f'{field_name}__in': names}).values_list(field_name, flat=True))
+    return referenced
+
+
+def referenced_stems(fields, stems):
+    """
+    Returns the ``stems`` that are the stored names of images without their
+    extension, the variants named after them are in use.
+    """
+    referenced = set()
+    stems = list(stems)
+    for model, field_name, has_variants in fields:
+        if not has_variants:
+            continue
+        for start in range(0, len(stems), VARIANT_LOOKUP_CHUNK_SIZE):
+            chunk = stems[start:start + VARIANT_LOOKUP_CHUNK_SIZE]
+            # '/' follows '.' so the range holds "<stem>.<extension>" and uses the column index
+            condition = reduce(or_, (Q(**{f'{field_name}__gte': f'{stem}.', f'{field_name}__lt': f'{stem}/'})
+                                     for stem in chunk))
+            for name in model.objects.filter(condition).values_list(field_name, flat=True):
+                referenced.add(os.path.splitext(name)[0])
+    return referenced
+
+
+def find_orphaned_files(storage, min_age=0, batch_size=1000):
+    """
+    Yields lists of up to ``batch_size`` ``(name, size)`` files under the
+    media upload directories that no row refers to, either directly or as
+    an image variant. Files younger than ``min_age`` seconds may belong to
+    a transaction that has not committed yet and are skipped.
+    """
+    modified_before = time.time() - min_age
+    for directory, fields in media_directories().items():
+        batch = []
+        for file in iter_files(storage, directory, modified_before):
+            batch.append(file)
+            if len(batch) >= batch_size:
+                yield _unreferenced(fields, batch)
+                batch = []
+        if batch:
+            yield _unreferenced(fields, batch)
+
+
+def _unreferenced(fields, batch):
+    referenced = referenced_names(fields, [name for name, _ in batch])
+    candidates = [(name, size) for name, size in batch if name not in referenced]
+
+    stems = {}
+    for name, _ in candidates:
+        match = VARIANT_NAME_RE.match(name)
+        if match:
+            stems[name] = match.group('stem')
+    used_stems = referenced_stems(fields, set(stems.values())) if stems else set()
+    return [(name, size) for name, size in candidates if name not in stems or stems[name] not in used_stems]
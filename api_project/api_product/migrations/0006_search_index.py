@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+INDEXED_SOURCES = (
+    ('course', 'api_product_course', 'name', "coalesce(description, '') || char(10) || coalesce(curriculum, '')"),
+    ('article', 'api_product_article', 'title', 'content'),
+    ('faq', 'api_product_faq', 'question', 'answer'),
+)
+
+
+def backfill_sql():
+    statements = []
+    for kind, table, title, body in INDEXED_SOURCES:
+        statements.append(
+            f"INSERT INTO api_product_searchdocument (kind, object_id) SELECT '{kind}', id FROM {table};"
+        )
+        statements.append(
+            f"INSERT INTO api_product_searchindex (rowid, title, body) "
+            f"SELECT d.id, t.{title}, {body} FROM {table} t "
+            f"JOIN api_product_searchdocument d ON d.kind = '{kind}' AND d.object_id = t.id;"
+        )
+    return statements
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0005_alter_article_creation_date'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                'CREATE TABLE api_product_searchdocument ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'kind varchar(20) NOT NULL, '
+                'object_id char(32) NOT NULL, '
+                'UNIQUE (kind, object_id));',
+                "CREATE VIRTUAL TABLE api_product_searchindex USING fts5("
+                "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');",
+                # title matches weigh ten times more than body matches
+                "INSERT INTO api_product_searchindex (api_product_searchindex, rank) "
+                "VALUES ('rank', 'bm25(10.0, 1.0)');",
+            ] + backfill_sql(),
+            reverse_sql=[
+                'DROP TABLE api_product_searchindex;',
+                'DROP TABLE api_product_searchdocument;',
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0008_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='articles/'),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='file',
+            field=models.FileField(db_index=True, upload_to='certificates/'),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='courses/'),
+        ),
+        migrations.AlterField(
+            model_name='teacherinfo',
+            name='photo',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='teachers/'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, field_name):
+    rows = model.objects.filter(**{field_name: OuterRef('pk')}).order_by().values(field_name)
+    return Coalesce(Subquery(rows.annotate(count=Count('*')).values('count')), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model('api_product', 'Course')
+    Review = apps.get_model('api_product', 'Review')
+    Course.objects.update(
+        student_count=count_rows(Course.students.through, 'course'),
+        review_count=count_rows(Review, 'course'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0009_media_file_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_stats(apps, schema_editor):
+    CourseCategory = apps.get_model('api_product', 'CourseCategory')
+    CourseCategoryStats = apps.get_model('api_product', 'CourseCategoryStats')
+    rows = CourseCategory.objects.order_by().values('pk').annotate(
+        course_count=Count('course'),
+        min_price_for_one=Min('course__price_for_one'),
+        max_price_for_one=Max('course__price_for_one'),
+        min_price_for_many=Min('course__price_for_many'),
+        max_price_for_many=Max('course__price_for_many'),
+        total_study_hours=Coalesce(Sum('course__study_hours'), 0),
+    )
+    CourseCategoryStats.objects.bulk_create(
+        CourseCategoryStats(
+            category_id=row['pk'], course_count=row['course_count'],
+            min_price_for_one=row['min_price_for_one'], max_price_for_one=row['max_price_for_one'],
+            min_price_for_many=row['min_price_for_many'], max_price_for_many=row['max_price_for_many'],
+            study_hours=row['total_study_hours'],
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0010_course_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseCategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api_product.coursecategory')),
+                ('course_count', models.PositiveIntegerField(default=0)),
+                ('min_price_for_one', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_price_for_one', models.PositiveIntegerField(blank=True, null=True)),
+                ('min_price_for_many', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_price_for_many', models.PositiveIntegerField(blank=True, null=True)),
+                ('study_hours', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'CourseCategoryStats',
+                'verbose_name_plural': 'CourseCategoryStats',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
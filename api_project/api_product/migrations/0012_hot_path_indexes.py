@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0011_course_category_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='price_for_many',
+            field=models.PositiveIntegerField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='price_for_one',
+            field=models.PositiveIntegerField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='course',
+            name='study_hours',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['start_date', 'id'], name='application_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['creation_date', 'id'], name='article_creation_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['name', 'id'], name='course_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discount',
+            index=models.Index(fields=['percent', 'id'], name='discount_percent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['creation_date', 'id'], name='review_creation_date_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0012_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                # the titles alone, so title matches are found and ranked
+                # without reading the much longer body doclists
+                "CREATE VIRTUAL TABLE api_product_searchtitle USING fts5("
+                "title, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');",
+                'INSERT INTO api_product_searchtitle (rowid, title) '
+                'SELECT rowid, title FROM api_product_searchindex;',
+            ],
+            reverse_sql=[
+                'DROP TABLE api_product_searchtitle;',
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0013_search_title_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyLock',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'IdempotencyLock',
+                'verbose_name_plural': 'IdempotencyLocks',
+            },
+        ),
+    ]
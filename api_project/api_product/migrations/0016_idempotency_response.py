@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0015_upload_session_expiry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencylock',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddField(
+            model_name='idempotencylock',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='idempotencylock',
+            name='headers',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='idempotencylock',
+            name='content',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
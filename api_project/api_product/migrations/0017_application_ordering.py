@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_product', '0016_idempotency_response'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='application',
+            options={'ordering': ('start_date', 'id'), 'verbose_name': 'Application', 'verbose_name_plural': 'Applications'},
+        ),
+    ]
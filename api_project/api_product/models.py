@@ -10,7 +10,8 @@ import uuid
 class TeacherInfo(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, blank=False, null=False)
-    photo = models.ImageField(upload_to='teachers/', null=True, blank=True)
+    photo = models.ImageField(upload_to='teachers/', null=True, blank=True, db_index=True)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     education = models.TextField(null=False, blank=False)
     experience = models.TextField(null=False, blank=False)
 
@@ -34,7 +35,7 @@ class TeacherInfo(models.Model):
 
 class Certificate(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    file = models.FileField(upload_to='certificates/', null=False, blank=False)
+    file = models.FileField(upload_to='certificates/', null=False, blank=False, db_index=True)
     teacher = models.ForeignKey(TeacherInfo, on_delete=models.CASCADE, null=True, blank=False,
                                 related_name='certificates')
 
@@ -50,7 +51,8 @@ class Article(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200, null=False, blank=False)
     content = models.TextField(null=False, blank=False)
-    image = models.ImageField(upload_to='articles/', null=True, blank=True)
+    image = models.ImageField(upload_to='articles/', null=True, blank=True, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     creation_date = models.DateField(blank=False, null=False, default=timezone.localdate)
     source = models.CharField(max_length=200, null=True, blank=True)
 
@@ -58,6 +60,8 @@ class Article(models.Model):
         verbose_name = 'Article'
         verbose_name_plural = 'Articles'
         ordering = ('-creation_date',)
+        # the ordering plus the keyset pagination tiebreaker
+        indexes = [models.Index(fields=['creation_date', 'id'], name='article_creation_date_idx')]
 
     def __str__(self):
         return self.title
@@ -80,24 +84,43 @@ class Course(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=100, blank=False, null=False)
     description = models.TextField(blank=True, null=True)
-    image = models.ImageField(upload_to='courses/', null=True, blank=True)
+    image = models.ImageField(upload_to='courses/', null=True, blank=True, db_index=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     advantages = models.TextField(blank=True, null=True)
     curriculum = models.TextField(blank=True, null=True)
-    study_hours = models.IntegerField(blank=False, null=False, default=0)
-    price_for_one = models.PositiveIntegerField(blank=False, null=False)
-    price_for_many = models.PositiveIntegerField(blank=False, null=False)
+    study_hours = models.IntegerField(blank=False, null=False, default=0, db_index=True)
+    price_for_one = models.PositiveIntegerField(blank=False, null=False, db_index=True)
+    price_for_many = models.PositiveIntegerField(blank=False, null=False, db_index=True)
     teachers = models.ManyToManyField(TeacherInfo, blank=True, related_name='courses')
     students = models.ManyToManyField(User, blank=True, related_name='courses')
     course_category = models.ForeignKey(CourseCategory, on_delete=models.CASCADE, blank=False, null=False)
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # maintained with F() updates by api_product.signals
+    COUNTER_FIELDS = ('student_count', 'review_count')
 
     class Meta:
         verbose_name = 'Course'
         verbose_name_plural = 'Courses'
         ordering = ('-name',)
+        indexes = [models.Index(fields=['name', 'id'], name='course_name_idx')]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # a loaded course must not write its possibly stale counters back,
+        # nor load and rewrite the fields it was loaded without
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
     
     
 class Discount(models.Model):
@@ -109,6 +132,7 @@ class Discount(models.Model):
         verbose_name = 'Discount'
         verbose_name_plural = 'Discounts'
         ordering = ('-percent',)
+        indexes = [models.Index(fields=['percent', 'id'], name='discount_percent_idx')]
 
     def __str__(self):
         return f"{self.percent} %"
@@ -125,6 +149,7 @@ class Review(models.Model):
         verbose_name = 'Review'
         verbose_name_plural = 'Reviews'
         ordering = ('-creation_date',)
+        indexes = [models.Index(fields=['creation_date', 'id'], name='review_creation_date_idx')]
 
     def __str__(self):
         return f'Review by {self.author} on {self.course}'
@@ -169,7 +194,9 @@ class Application(models.Model):
     class Meta:
         verbose_name = 'Application'
         verbose_name_plural = 'Applications'
-        ordering = ('start_date',)
+        # id breaks ties between applications of one day, as the index does
+        ordering = ('start_date', 'id')
+        indexes = [models.Index(fields=['start_date', 'id'], name='application_start_date_idx')]
 
     def __str__(self):
         return f'{self.name} {self.surname} — {self.course.name}'
@@ -185,4 +212,71 @@ class Application(models.Model):
             raise ValidationError('Start date cannot be in the past.')
 
 
-        
\ No newline at end of file
+class UploadSession(models.Model):
+    TARGET_CHOICES = [
+        ('certificate', 'Certificate'),
+        ('teacher_photo', 'Teacher photo'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, blank=False, null=False,
+                              related_name='upload_sessions')
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES, blank=False, null=False)
+    filename = models.CharField(max_length=255, blank=False, null=False)
+    size = models.PositiveBigIntegerField(blank=False, null=False)
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'UploadSession'
+        verbose_name_plural = 'UploadSessions'
+
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size})'
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
+
+class CourseCategoryStats(models.Model):
+    """
+    Rollup of the courses of a category, kept current by api_product.signals.
+    """
+    category = models.OneToOneField(CourseCategory, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='stats')
+    course_count = models.PositiveIntegerField(default=0)
+    min_price_for_one = models.PositiveIntegerField(null=True, blank=True)
+    max_price_for_one = models.PositiveIntegerField(null=True, blank=True)
+    min_price_for_many = models.PositiveIntegerField(null=True, blank=True)
+    max_price_for_many = models.PositiveIntegerField(null=True, blank=True)
+    study_hours = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'CourseCategoryStats'
+        verbose_name_plural = 'CourseCategoryStats'
+
+    def __str__(self):
+        return f'Stats of {self.category_id}'
+
+
+class IdempotencyLock(models.Model):
+    """
+    Held while the first request of an Idempotency-Key runs, then keeps its
+    response until ``expires_at``, see api_product.idempotency. Taking it is
+    a single insert on a unique key, so only one worker process can win it.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=32)
+    expires_at = models.DateTimeField(db_index=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    headers = models.JSONField(null=True, blank=True)
+    content = models.BinaryField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'IdempotencyLock'
+        verbose_name_plural = 'IdempotencyLocks'
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,86 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Max, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Course, Discount
+
+CENT = Decimal('0.01')
+
+QUOTE_MAX_ITEMS = 100
+
+
+def apply_discount(price, percent):
+    return (Decimal(price) * (100 - (percent or 0)) / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def unit_price(course, group_size):
+    return course.price_for_one if group_size == 1 else course.price_for_many
+
+
+def best_discount_percent():
+    return Discount.objects.aggregate(percent=Max('percent'))['percent'] or 0
+
+
+def with_best_discount(courses):
+    """
+    Annotates ``best_discount_percent`` with an uncorrelated subquery, so the
+    listing does not need a query of its own for the discounts.
+    """
+    percents = Discount.objects.filter(percent__isnull=False).order_by('-percent').values('percent')[:1]
+    return courses.annotate(best_discount_percent=Coalesce(Subquery(percents), 0))
+
+
+def best_price(course, percent):
+    """
+    Lowest price per student of a course, group lessons included, with the
+    biggest discount applied.
+    """
+    return apply_discount(min(course.price_for_one, course.price_for_many), percent)
+
+
+class QuoteError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def quote(items):
+    """
+    Prices a batch of ``{'course', 'group_size', 'discount'}`` items with one
+    query for the courses and one for the discounts. Raises ``QuoteError``
+    with per-item errors, in the order of ``items``, for unknown ids.
+    """
+    courses = Course.objects.only('id', 'price_for_one', 'price_for_many').in_bulk(
+        {item['course'] for item in items}
+    )
+    discount_ids = {item['discount'] for item in items if item.get('discount')}
+    percents = dict(Discount.objects.filter(pk__in=discount_ids).values_list('pk', 'percent')) if discount_ids else {}
+
+    errors = []
+    for item in items:
+        item_errors = {}
+        if item['course'] not in courses:
+            item_errors['course'] = [f'Invalid pk "{item["course"]}" - object does not exist.']
+        if item.get('discount') and item['discount'] not in percents:
+            item_errors['discount'] = [f'Invalid pk "{item["discount"]}" - object does not exist.']
+        errors.append(item_errors)
+    if any(errors):
+        raise QuoteError(errors)
+
+    quotes = []
+    for item in items:
+        course = courses[item['course']]
+        group_size = item['group_size']
+        percent = percents.get(item.get('discount')) or 0
+        price = apply_discount(unit_price(course, group_size), percent)
+        quotes.append({
+            'course': course.pk,
+            'group_size': group_size,
+            'discount': item.get('discount'),
+            'unit_price': unit_price(course, group_size),
+            'discount_percent': percent,
+            'final_unit_price': price,
+            'total': price * group_size,
+        })
+    return quotes
@@ -0,0 +1,46 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def plan_queryset(queryset, serializer):
+    """
+    Adds select_related/prefetch_related to the queryset according to the
+    relations the serializer renders, so serializing a page of objects
+    costs a fixed number of queries.
+    """
+    select_related, prefetch_related = [], []
+    _collect_relations(serializer, '', select_related, prefetch_related)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+def _collect_relations(serializer, prefix, select_related, prefetch_related):
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None:
+        return
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        path = prefix + field.source
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            related_queryset = plan_queryset(model_field.related_model._default_manager.all(), child)
+            prefetch_related.append(Prefetch(path, queryset=related_queryset))
+        elif isinstance(field, serializers.ManyRelatedField):
+            related_queryset = model_field.related_model._default_manager.only('pk')
+            prefetch_related.append(Prefetch(path, queryset=related_queryset))
+        elif isinstance(field, serializers.BaseSerializer):
+            select_related.append(path)
+            _collect_relations(field, path + '__', select_related, prefetch_related)
@@ -0,0 +1,135 @@
+import contextvars
+import random
+import sqlite3
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.throttling import BaseThrottle
+
+from .cache import get_cache, get_model_versions
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# replicas the current request may read from, set by ReplicaReadMixin
+_replica_aliases = contextvars.ContextVar('replica_aliases', default=())
+# set once the current request wrote or its client wrote recently
+_pinned_to_primary = contextvars.ContextVar('pinned_to_primary', default=False)
+
+
+def replica_aliases():
+    return tuple(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def refreshed_at_key(alias):
+    return f'replica-refreshed:{alias}'
+
+
+def fresh_replicas(changed_since):
+    """
+    Returns the replicas last refreshed after ``changed_since``. A replica
+    with no recorded refresh counts as stale.
+    """
+    aliases = replica_aliases()
+    if not aliases:
+        return ()
+    refreshed = get_cache().get_many([refreshed_at_key(alias) for alias in aliases])
+    return tuple(alias for alias in aliases if refreshed.get(refreshed_at_key(alias), -1) >= changed_since)
+
+
+def refresh_replica(alias):
+    """
+    Copies the primary into a SQLite replica with the online backup API and
+    records when the copy started. The copy is a single read transaction,
+    which in WAL mode does not hold up the writers of the primary.
+    """
+    started_at = time.time()
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    replica = connections[alias]
+    replica.close()
+    target = sqlite3.connect(replica.settings_dict['NAME'])
+    try:
+        primary.connection.backup(target)
+    finally:
+        target.close()
+    get_cache().set(refreshed_at_key(alias), started_at, None)
+    return started_at
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of ``ReplicaReadMixin`` actions to a random fresh replica
+    of ``settings.DATABASE_REPLICAS`` and everything else to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        aliases = _replica_aliases.get()
+        if aliases and not _pinned_to_primary.get():
+            return random.choice(aliases)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # read your own writes for the rest of the request
+        _pinned_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas are copies of the primary, never migrated on their own
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Lets the ``replica_actions`` of a viewset read from the replicas that were
+    refreshed after the last change of its ``cache_dependencies``, so a
+    response cached under the current change versions is never built from
+    older rows.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        if self.action in self.replica_actions and replica_aliases():
+            versions = get_model_versions(getattr(self, 'cache_dependencies', ()))
+            changed_since = max((changed_at for _, changed_at in versions), default=0)
+            self._replica_token = _replica_aliases.set(fresh_replicas(changed_since))
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_aliases.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pins the reads of a client to the primary for ``REPLICA_STICKY_SECONDS``
+    after any of its unsafe requests, long enough for the replicas to catch
+    up with what it wrote. Clients are told apart like the throttles do.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+
+        cache = get_cache()
+        key = f'replica-sticky:{BaseThrottle().get_ident(request)}'
+        token = _pinned_to_primary.set(cache.get(key) is not None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
+        if request.method not in SAFE_METHODS:
+            cache.set(key, True, getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+        return response
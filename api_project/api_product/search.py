@@ -0,0 +1,276 @@
+import bisect
+import re
+import unicodedata
+import uuid
+
+from django.db import connection, connections, router
+from django.utils.html import escape
+
+from .models import Course, Article, Faq
+
+SEARCH_DOCUMENT_TABLE = 'api_product_searchdocument'
+SEARCH_INDEX_TABLE = 'api_product_searchindex'
+SEARCH_TITLE_TABLE = 'api_product_searchtitle'
+
+# kind -> (model, title field, body fields)
+SEARCH_SOURCES = {
+    'course': (Course, 'name', ('description', 'curriculum')),
+    'article': (Article, 'title', ('content',)),
+    'faq': (Faq, 'question', ('answer',)),
+}
+SEARCH_KINDS = tuple(SEARCH_SOURCES)
+
+SNIPPET_TOKENS = 16
+# each relevance tier ranks at most this many of its matches, the latest
+# indexed ones, scoring every match of a word found in most documents takes
+# far too long. Relevance is therefore approximate for such words: an older,
+# better matching document outside the candidates is not returned
+SEARCH_CANDIDATES = 1000
+# a single letter prefix expands to a large part of the vocabulary
+MIN_PREFIX_LENGTH = 2
+
+# what the unicode61 tokenizer of the index considers a token
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def get_kind(model):
+    for kind, (source_model, _, _) in SEARCH_SOURCES.items():
+        if source_model is model:
+            return kind
+    return None
+
+
+def indexed_fields(kind):
+    _, title_field, body_fields = SEARCH_SOURCES[kind]
+    return (title_field,) + body_fields
+
+
+def document_text(kind, instance):
+    _, title_field, body_fields = SEARCH_SOURCES[kind]
+    title = getattr(instance, title_field) or ''
+    body = '\n'.join(value for value in (getattr(instance, name) for name in body_fields) if value)
+    return title, body
+
+
+def index_document(instance):
+    """
+    Adds the instance to the search index, or replaces its indexed text.
+    """
+    kind = get_kind(type(instance))
+    title, body = document_text(kind, instance)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {SEARCH_DOCUMENT_TABLE} (kind, object_id) VALUES (%s, %s) '
+            f'ON CONFLICT (kind, object_id) DO UPDATE SET kind = excluded.kind RETURNING id',
+            [kind, instance.pk.hex]
+        )
+        rowid = cursor.fetchone()[0]
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {SEARCH_INDEX_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+            [rowid, title, body]
+        )
+        cursor.execute(f'INSERT OR REPLACE INTO {SEARCH_TITLE_TABLE} (rowid, title) VALUES (%s, %s)', [rowid, title])
+
+
+def remove_document(instance):
+    kind = get_kind(type(instance))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_DOCUMENT_TABLE} WHERE kind = %s AND object_id = %s RETURNING id',
+            [kind, instance.pk.hex]
+        )
+        row = cursor.fetchone()
+        if row is not None:
+            cursor.execute(f'DELETE FROM {SEARCH_INDEX_TABLE} WHERE rowid = %s', [row[0]])
+            cursor.execute(f'DELETE FROM {SEARCH_TITLE_TABLE} WHERE rowid = %s', [row[0]])
+
+
+def rebuild_index():
+    """
+    Reindexes every searchable row, for data written without signals.
+    Returns the number of indexed documents.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_INDEX_TABLE}')
+        cursor.execute(f'DELETE FROM {SEARCH_TITLE_TABLE}')
+        cursor.execute(f'DELETE FROM {SEARCH_DOCUMENT_TABLE}')
+
+    count = 0
+    for kind, (model, _, _) in SEARCH_SOURCES.items():
+        rows = model.objects.order_by().values_list('pk', *indexed_fields(kind))
+        with connection.cursor() as cursor:
+            for pk, title, *body in rows.iterator(chunk_size=2000):
+                cursor.execute(
+                    f'INSERT INTO {SEARCH_DOCUMENT_TABLE} (kind, object_id) VALUES (%s, %s) RETURNING id',
+                    [kind, pk.hex]
+                )
+                rowid = cursor.fetchone()[0]
+                cursor.execute(
+                    f'INSERT INTO {SEARCH_INDEX_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                    [rowid, title or '', '\n'.join(value for value in body if value)]
+                )
+                cursor.execute(f'INSERT INTO {SEARCH_TITLE_TABLE} (rowid, title) VALUES (%s, %s)',
+                               [rowid, title or ''])
+                count += 1
+    with connection.cursor() as cursor:
+        for table in (SEARCH_INDEX_TABLE, SEARCH_TITLE_TABLE):
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+    return count
+
+
+def build_match_expression(query):
+    """
+    Turns free text into an FTS5 query matching every word, the last one as
+    a prefix so results follow the user while typing. Every word is quoted,
+    so FTS5 operators and punctuation in the text are never interpreted.
+    """
+    words = TOKEN_RE.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX_LENGTH:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def fold(text):
+    """
+    Case folds ``text`` and strips its diacritics like the tokenizer of the
+    index, one character for one, so offsets in the result are offsets in
+    ``text``.
+    """
+    if text.isascii():
+        return text.lower()
+    folded = []
+    for char in text:
+        base = unicodedata.normalize('NFKD', char)[:1].casefold()
+        folded.append(base if len(base) == 1 else char)
+    return ''.join(folded)
+
+
+def match_pattern(words, prefix):
+    """
+    Matches the folded query ``words`` as whole tokens, the last one as a
+    prefix when ``prefix`` is set.
+    """
+    alternatives = [re.escape(word) for word in words]
+    if prefix:
+        alternatives[-1] += r'[^\W_]*'
+    return re.compile(rf'(?<![^\W_])(?:{"|".join(alternatives)})(?![^\W_])')
+
+
+def make_snippet(texts, words, pattern):
+    """
+    Returns the ``SNIPPET_TOKENS`` token window of ``texts`` covering the most
+    distinct query words, with the matches highlighted like FTS5's snippet().
+    Built from the stored text, so the match is not evaluated again for the
+    returned documents. The text is HTML escaped, ``<mark>`` is the only
+    markup of the result.
+    """
+    best = None
+    for text in texts:
+        text = text or ''
+        tokens = list(TOKEN_RE.finditer(text))
+        offsets = [token.start() for token in tokens]
+        # token index -> index of the query word it matches
+        hits = {
+            bisect.bisect_left(offsets, match.start()):
+                words.index(match.group()) if match.group() in words else len(words) - 1
+            for match in pattern.finditer(fold(text))
+        }
+        indexes = sorted(hits)
+        # the best window can always start at a match
+        last_start = max(len(tokens) - SNIPPET_TOKENS, 0)
+        for start in sorted({0} | {min(index, last_start) for index in indexes}):
+            window = indexes[bisect.bisect_left(indexes, start):bisect.bisect_left(indexes, start + SNIPPET_TOKENS)]
+            score = (len({hits[index] for index in window}), len(window))
+            if best is None or score > best[0]:
+                best = score, text, tokens, hits, start
+    if best is None:
+        return ''
+
+    _, text, tokens, hits, start = best
+    end = min(start + SNIPPET_TOKENS, len(tokens))
+    if start == end:
+        return escape(text)
+    parts = ['…'] if start > 0 else []
+    position = tokens[start].start() if start > 0 else 0
+    for index in range(start, end):
+        token = tokens[index]
+        parts.append(escape(text[position:token.start()]))
+        parts.append(f'<mark>{escape(token.group())}</mark>' if index in hits else escape(token.group()))
+        position = token.end()
+    parts.append('…' if end < len(tokens) else escape(text[position:]))
+    return ''.join(parts)
+
+
+def rank_latest_matches(cursor, table, expression, kinds, limit):
+    """
+    Returns the rowids of the ``limit`` best ranked matches of ``expression``
+    in ``table``, out of its ``SEARCH_CANDIDATES`` latest matches. Older
+    matches are not ranked at all, however relevant. The rank is read in the
+    same rowid ordered pass that finds the matches, so a broad word is
+    expanded only once.
+    """
+    kind_filter = ''
+    params = [expression]
+    if kinds:
+        kind_filter = f'AND d.kind IN ({", ".join(["%s"] * len(kinds))})'
+        params.extend(kinds)
+    cursor.execute(
+        f"SELECT {table}.rowid, {table}.rank FROM {table} "
+        f"JOIN {SEARCH_DOCUMENT_TABLE} d ON d.id = {table}.rowid "
+        f"WHERE {table} MATCH %s {kind_filter} "
+        f"ORDER BY {table}.rowid DESC LIMIT %s",
+        params + [SEARCH_CANDIDATES]
+    )
+    matches = sorted(cursor.fetchall(), key=lambda match: match[1])
+    return [rowid for rowid, _ in matches[:limit]]
+
+
+def search(query, kinds=None, limit=20):
+    """
+    Returns up to ``limit`` documents matching ``query``, best first, with a
+    highlighted snippet.
+
+    Documents whose title has every word come first, ranked by bm25 over the
+    title index, then the other matches, ranked by bm25 over title and body
+    with title matches weighing more. Each tier is ranked in full when it has
+    at most ``SEARCH_CANDIDATES`` matches, otherwise within its latest
+    ``SEARCH_CANDIDATES``, so an older document matching in the title is
+    never pushed out by newer ones matching in the body. Within a tier larger
+    than that the ranking is approximate: a better document older than the
+    candidates is left out.
+    """
+    expression = build_match_expression(query)
+    if expression is None:
+        return []
+
+    # a read like any other, so it follows the replica routing of the view
+    with connections[router.db_for_read(Course)].cursor() as cursor:
+        rowids = rank_latest_matches(cursor, SEARCH_TITLE_TABLE, expression, kinds, limit)
+        if len(rowids) < limit:
+            found = set(rowids)
+            rowids += [
+                rowid for rowid in rank_latest_matches(cursor, SEARCH_INDEX_TABLE, expression, kinds, limit)
+                if rowid not in found
+            ][:limit - len(rowids)]
+        if not rowids:
+            return []
+
+        cursor.execute(
+            f"SELECT {SEARCH_INDEX_TABLE}.rowid, d.kind, d.object_id, {SEARCH_INDEX_TABLE}.title, "
+            f"{SEARCH_INDEX_TABLE}.body FROM {SEARCH_INDEX_TABLE} "
+            f"JOIN {SEARCH_DOCUMENT_TABLE} d ON d.id = {SEARCH_INDEX_TABLE}.rowid "
+            f"WHERE {SEARCH_INDEX_TABLE}.rowid IN ({', '.join(['%s'] * len(rowids))})",
+            rowids
+        )
+        documents = {rowid: document for rowid, *document in cursor.fetchall()}
+
+    words = [fold(word) for word in TOKEN_RE.findall(query)]
+    pattern = match_pattern(words, expression.endswith('*'))
+    return [
+        {'type': kind, 'id': uuid.UUID(object_id), 'title': title,
+         'snippet': make_snippet((title, body), words, pattern)}
+        for kind, object_id, title, body in (documents[rowid] for rowid in rowids)
+    ]
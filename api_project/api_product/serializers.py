@@ -1,18 +1,57 @@
 import datetime
+import os
 
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import serializers
 from .models import (TeacherInfo, Certificate, Article, CourseCategory, Course,
-                     Discount, Review, FaqCategory, Faq, Application)
+                     Discount, Review, FaqCategory, Faq, Application, UploadSession,
+                     CourseCategoryStats)
 from api_authentication.models import User
 
 from api_authentication.serializers import UserSerializer
+from utilities.serializers import DynamicFieldsMixin
+from .images import VARIANT_FORMATS, variants_field_name
+from .intake import application_intake, course_lookup
+from .pricing import QUOTE_MAX_ITEMS, best_discount_percent, best_price
+from .search import SEARCH_CANDIDATES, SEARCH_KINDS
+from .uploads import upload_max_size
+
+
+class SrcsetField(serializers.Field):
+    """
+    Renders the resized variants of an image field as
+    ``{'webp': {'80w': url, ...}, 'jpeg': {...}}``, empty until they are
+    generated for the current image.
+    """
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
 
+    def to_representation(self, instance):
+        field_file = getattr(instance, self.image_field)
+        variants = getattr(instance, variants_field_name(self.image_field))
+        if not field_file or variants.get('source') != field_file.name:
+            return {}
+
+        request = self.context.get('request')
+        srcset = {}
+        for variant_format in VARIANT_FORMATS:
+            srcset[variant_format] = {}
+            for width, name in variants.get(variant_format, {}).items():
+                url = field_file.storage.url(name)
+                srcset[variant_format][f'{width}w'] = request.build_absolute_uri(url) if request else url
+        return srcset
+
+
+class TeacherInfoSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    photo_srcset = SrcsetField('photo')
 
-class TeacherInfoSerializer(serializers.ModelSerializer):
     class Meta:
         model = TeacherInfo
-        fields = '__all__'
+        exclude = ('photo_variants',)
         extra_kwargs = {
             'user': {'read_only': True}
         }
@@ -20,11 +59,13 @@ class TeacherInfoSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         request = self.context.get('request')
-        representation['user'] = str(instance.user.id)
-        if instance.photo:
-            representation['photo'] = request.build_absolute_uri(instance.photo.url)
-        else:
-            representation['photo'] = None
+        if 'user' in representation:
+            representation['user'] = str(instance.user_id)
+        if 'photo' in representation:
+            if instance.photo:
+                representation['photo'] = request.build_absolute_uri(instance.photo.url)
+            else:
+                representation['photo'] = None
         return representation
 
     def update(self, instance, validated_data):
@@ -36,7 +77,7 @@ class TeacherInfoSerializer(serializers.ModelSerializer):
         return instance
 
 
-class CertificateSerializer(serializers.ModelSerializer):
+class CertificateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     teacher = serializers.PrimaryKeyRelatedField(queryset=TeacherInfo.objects.all())
 
     class Meta:
@@ -46,11 +87,15 @@ class CertificateSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         request = self.context.get('request')
-        if instance.file:
-            representation['file'] = request.build_absolute_uri(instance.file.url) if request else instance.file.url
-        else:
-            representation['file'] = None
-        representation['teacher'] = str(instance.teacher.id)
+        if 'file' in representation:
+            if instance.file:
+                # the download action serves ranges and offloads to the proxy
+                url = reverse('certificates-download', args=[instance.pk])
+                representation['file'] = request.build_absolute_uri(url) if request else url
+            else:
+                representation['file'] = None
+        if 'teacher' in representation:
+            representation['teacher'] = str(instance.teacher_id)
         return representation
 
     def create(self, validated_data):
@@ -66,15 +111,17 @@ class CertificateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(str(e))
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    image_srcset = SrcsetField('image')
+
     class Meta:
         model = Article
-        fields = '__all__'
+        exclude = ('image_variants',)
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         request = self.context.get('request')
-        if request:
+        if request and 'image' in representation:
             if instance.image:
                 representation['image'] = request.build_absolute_uri(instance.image.url)
             else:
@@ -83,19 +130,29 @@ class ArticleSerializer(serializers.ModelSerializer):
         return representation
 
 
-class CourseCategorySerializer(serializers.ModelSerializer):
+class CourseCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = CourseCategory
         fields = '__all__'
 
 
-class DiscountSerializer(serializers.ModelSerializer):
+class CourseCategoryStatsSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(source='category_id')
+    name = serializers.CharField(source='category.name')
+
+    class Meta:
+        model = CourseCategoryStats
+        fields = ('id', 'name', 'course_count', 'min_price_for_one', 'max_price_for_one',
+                  'min_price_for_many', 'max_price_for_many', 'study_hours')
+
+
+class DiscountSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Discount
         fields = '__all__'
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
     creation_date = serializers.DateField(default=timezone.localdate)
 
@@ -108,11 +165,12 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['course'] = {
-            'id': str(instance.course.id),
-            'name': instance.course.name,
-            'category': str(instance.course.course_category.id)
-        }
+        if 'course' in representation:
+            representation['course'] = {
+                'id': str(instance.course.id),
+                'name': instance.course.name,
+                'category': str(instance.course.course_category.id)
+            }
         return representation
 
     def create(self, validated_data):
@@ -127,21 +185,22 @@ class ReviewSerializer(serializers.ModelSerializer):
         return value
 
 
-class FaqCategorySerializer(serializers.ModelSerializer):
+class FaqCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = FaqCategory
         fields = '__all__'
 
 
-class FaqSerializer(serializers.ModelSerializer):
+class FaqSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     faq_category = FaqCategorySerializer()
 
     class Meta:
         model = Faq
         fields = '__all__'
+        expandable_fields = ('faq_category',)
 
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
 
     class Meta:
@@ -150,11 +209,12 @@ class ApplicationSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['course'] = {
-            'id': str(instance.course.id),
-            'name': instance.course.name,
-            'category': instance.course.course_category.id
-        }
+        if 'course' in representation:
+            representation['course'] = {
+                'id': str(instance.course.id),
+                'name': instance.course.name,
+                'category': instance.course.course_category.id
+            }
         return representation
 
     def validate_start_date(self, value):
@@ -169,11 +229,122 @@ class ApplicationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(str(e))
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CachedCourseField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks the course up in the process-wide ``course_lookup`` cache.
+    """
+    def to_internal_value(self, data):
+        try:
+            course = course_lookup.get(self.pk_field.to_internal_value(data))
+        except serializers.ValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if course is None:
+            self.fail('does_not_exist', pk_value=data)
+        return course
+
+
+class ApplicationIntakeSerializer(ApplicationSerializer):
+    """
+    Accepts an application into the buffered intake instead of saving it.
+    """
+    course = CachedCourseField(queryset=Course.objects.all(), pk_field=serializers.UUIDField())
+
+    def create(self, validated_data):
+        application = Application(**validated_data)
+        application_intake.submit(application)
+        return application
+
+
+class BestPriceField(serializers.DecimalField):
+    """
+    Renders the best available price of a course. The biggest discount comes
+    from the ``with_best_discount`` annotation, or is looked up once per
+    response.
+    """
+    def __init__(self, **kwargs):
+        kwargs.update(max_digits=12, decimal_places=2, source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, course):
+        percent = getattr(course, 'best_discount_percent', None)
+        if percent is None:
+            context = self.context
+            if 'best_discount_percent' not in context:
+                context['best_discount_percent'] = best_discount_percent()
+            percent = context['best_discount_percent']
+        return super().to_representation(best_price(course, percent))
+
+
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     course_category = CourseCategorySerializer()
     teachers = TeacherInfoSerializer(many=True)
     students = UserSerializer(many=True)
+    image_srcset = SrcsetField('image')
+    best_price = BestPriceField()
 
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ('image_variants',)
+        expandable_fields = ('course_category', 'teachers', 'students')
+
+
+class PriceQuoteItemSerializer(serializers.Serializer):
+    course = serializers.UUIDField()
+    group_size = serializers.IntegerField(min_value=1, max_value=1000)
+    discount = serializers.UUIDField(required=False, allow_null=True)
+
+
+class PriceQuoteRequestSerializer(serializers.Serializer):
+    items = PriceQuoteItemSerializer(many=True, allow_empty=False, max_length=QUOTE_MAX_ITEMS)
+
+
+class PriceQuoteSerializer(serializers.Serializer):
+    course = serializers.UUIDField()
+    group_size = serializers.IntegerField()
+    discount = serializers.UUIDField(allow_null=True)
+    unit_price = serializers.IntegerField()
+    discount_percent = serializers.IntegerField()
+    final_unit_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(
+        max_length=200,
+        help_text=f'Words to find, the last one as a prefix. Title matches come first, each group ranked by '
+                  f'relevance among its {SEARCH_CANDIDATES} most recently indexed matches only',
+    )
+    type = serializers.MultipleChoiceField(choices=SEARCH_KINDS, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=20)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=SEARCH_KINDS)
+    id = serializers.UUIDField()
+    title = serializers.CharField()
+    snippet = serializers.CharField(help_text='HTML escaped text around the matches, which are wrapped in <mark>')
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'target', 'filename', 'size', 'received', 'created_at', 'expires_at')
+        read_only_fields = ('id', 'received', 'created_at', 'expires_at')
+        extra_kwargs = {
+            'size': {'min_value': 1}
+        }
+
+    def validate_filename(self, value):
+        filename = os.path.basename(value.replace('\\', '/'))
+        if not filename:
+            raise serializers.ValidationError('Invalid file name.')
+        return filename
+
+    def validate_size(self, value):
+        if value > upload_max_size():
+            raise serializers.ValidationError(f'Files larger than {upload_max_size()} bytes are not accepted.')
+        return value
+
+
+class UploadFinalizeSerializer(serializers.Serializer):
+    teacher = serializers.PrimaryKeyRelatedField(queryset=TeacherInfo.objects.all())
@@ -1,23 +1,232 @@
-from django.db.models.signals import m2m_changed, post_delete
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
-from .models import Course, Certificate
+from .cache import invalidate_model
+from .counters import adjust_counter
+from .media import MEDIA_FIELDS
+from .images import (IMAGE_VARIANT_FIELDS, refresh_variants, stored_file_names, variants_field_name,
+                     variants_outdated)
+from .stats import STATS_SOURCE_FIELDS, refresh_category_stats
+from .search import index_document, indexed_fields, get_kind, remove_document
+from .models import (TeacherInfo, Certificate, Article, CourseCategory, Course,
+                     Discount, Review, FaqCategory, Faq, Application)
 from api_authentication.models import User
+from api_authentication.serializers import UserSerializer
 from django.core.exceptions import ValidationError
-from django.core.files.storage import default_storage
+from utilities.background import run_in_background
+from utilities.storage import delete_files_on_commit
 
 
 @receiver(m2m_changed, sender=Course.students.through)
-def validate_students(sender, instance, action, **kwargs):
-    if action == 'pre_add':
-        for student_id in kwargs['pk_set']:
-            student = User.objects.get(pk=student_id)
-            if student.role != 'student':
-                raise ValidationError(f'User {student.username} does not have the \'student\' role')
+def validate_students(sender, instance, action, reverse=False, pk_set=None, **kwargs):
+    if action != 'pre_add' or not pk_set:
+        return
+    if reverse:
+        # user.courses.add(...): pk_set holds courses, the user is the instance
+        if instance.role != 'student':
+            raise ValidationError(f'User {instance.username} does not have the \'student\' role')
+    else:
+        usernames = sorted(
+            User.objects.filter(pk__in=pk_set).exclude(role='student')
+            .values_list('username', flat=True)
+        )
+        if len(usernames) == 1:
+            raise ValidationError(f'User {usernames[0]} does not have the \'student\' role')
+        if usernames:
+            raise ValidationError(f'Users {", ".join(usernames)} do not have the \'student\' role')
 
 
+@receiver(m2m_changed, sender=Course.students.through)
+def update_student_count(sender, instance, action, reverse=False, pk_set=None, **kwargs):
+    # pk_set of post_add holds only the new rows, that of a removal every
+    # requested pk, so removals count the actual rows first
+    if reverse:
+        # a student joined or left courses
+        if action == 'post_add':
+            adjust_counter(pk_set, 'student_count', 1)
+        elif action in ('pre_remove', 'pre_clear'):
+            courses = instance.courses.all() if action == 'pre_clear' else instance.courses.filter(pk__in=pk_set)
+            instance._left_courses = list(courses.values_list('pk', flat=True))
+        elif action in ('post_remove', 'post_clear'):
+            adjust_counter(instance.__dict__.pop('_left_courses', []), 'student_count', -1)
+    else:
+        if action == 'post_add':
+            adjust_counter([instance.pk], 'student_count', len(pk_set))
+        elif action in ('pre_remove', 'pre_clear'):
+            students = instance.students.all() if action == 'pre_clear' else instance.students.filter(pk__in=pk_set)
+            instance._removed_students = students.count()
+        elif action in ('post_remove', 'post_clear'):
+            adjust_counter([instance.pk], 'student_count', -instance.__dict__.pop('_removed_students', 0))
+
+
+@receiver(pre_delete, sender=User)
+def update_student_count_on_user_delete(sender, instance, **kwargs):
+    # the enrollment rows are deleted with the user without m2m_changed
+    courses = Course.objects.filter(students=instance).values_list('pk', flat=True)
+    adjust_counter(list(courses), 'student_count', -1)
+
+
+@receiver(post_init, sender=Review)
+def remember_review_course(sender, instance, **kwargs):
+    instance._counted_course_id = instance.__dict__.get('course_id')
+
+
+@receiver(post_save, sender=Review)
+def update_review_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter([instance.course_id], 'review_count', 1)
+    elif instance._counted_course_id is not None and instance._counted_course_id != instance.course_id:
+        adjust_counter([instance._counted_course_id], 'review_count', -1)
+        adjust_counter([instance.course_id], 'review_count', 1)
+    instance._counted_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Review)
+def update_review_count_on_delete(sender, instance, **kwargs):
+    adjust_counter([instance.course_id], 'review_count', -1)
+
+
+def get_stored_files(instance):
+    """
+    Returns the stored files of every loaded media field, variants
+    included, as ``{field name: [names]}``.
+    """
+    deferred = instance.get_deferred_fields()
+    stored_files = {}
+    for field_name in MEDIA_FIELDS[type(instance)]:
+        if field_name in deferred:
+            continue
+        value = instance.__dict__.get(field_name)
+        if isinstance(value, FieldFile):
+            # a file assigned but not saved yet is not in the storage
+            name = value.name if value._committed else None
+        elif isinstance(value, str):
+            name = value
+        else:
+            name = None
+        if field_name in IMAGE_VARIANT_FIELDS.get(type(instance), ()):
+            variants = instance.__dict__.get(variants_field_name(field_name))
+            stored_files[field_name] = stored_file_names(name, variants)
+        else:
+            stored_files[field_name] = [name] if name else []
+    return stored_files
+
+
+@receiver(post_init, sender=Certificate)
+@receiver(post_init, sender=TeacherInfo)
+@receiver(post_init, sender=Article)
+@receiver(post_init, sender=Course)
+def remember_stored_files(sender, instance, **kwargs):
+    instance._stored_files = get_stored_files(instance)
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_save, sender=TeacherInfo)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Course)
+def delete_replaced_files(sender, instance, **kwargs):
+    for field_name, names in instance._stored_files.items():
+        field_file = getattr(instance, field_name)
+        if names and names[0] != field_file.name:
+            delete_files_on_commit(field_file.storage, names)
+    instance._stored_files = get_stored_files(instance)
+
+
+@receiver(post_delete, sender=Certificate)
+@receiver(post_delete, sender=TeacherInfo)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Course)
+def delete_files_on_delete(sender, instance, **kwargs):
+    for field_name, names in get_stored_files(instance).items():
+        delete_files_on_commit(getattr(instance, field_name).storage, names)
+
+
+@receiver(post_save, sender=TeacherInfo)
+@receiver(post_save, sender=Certificate)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Discount)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=FaqCategory)
+@receiver(post_save, sender=Faq)
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=TeacherInfo)
 @receiver(post_delete, sender=Certificate)
-def delete_file_on_delete(sender, instance, **kwargs):
-    if instance.file:
-        if default_storage.exists(instance.file.name):
-            default_storage.delete(instance.file.name)   
-                  
\ No newline at end of file
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=CourseCategory)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Discount)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=FaqCategory)
+@receiver(post_delete, sender=Faq)
+@receiver(post_delete, sender=Application)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    invalidate_model(sender, [instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_responses_on_user_change(sender, update_fields=None, **kwargs):
+    # logins only touch last_login, which no product endpoint renders
+    if update_fields and not set(update_fields) & set(UserSerializer.Meta.fields):
+        return
+    invalidate_model(User)
+
+
+@receiver(m2m_changed, sender=Course.teachers.through)
+@receiver(m2m_changed, sender=Course.students.through)
+def invalidate_cached_courses(sender, action, instance, reverse=False, pk_set=None, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        # pk_set is None when the courses of a user are cleared
+        invalidate_model(Course, pk_set if reverse else [instance.pk])
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Faq)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(indexed_fields(get_kind(sender))):
+        return
+    index_document(instance)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Faq)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_document(instance)
+
+
+@receiver(post_save, sender=TeacherInfo)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Course)
+def schedule_image_variants(sender, instance, **kwargs):
+    for field_name in IMAGE_VARIANT_FIELDS[sender]:
+        if variants_outdated(instance, field_name):
+            run_in_background(refresh_variants, sender, instance.pk, field_name)
+
+
+@receiver(post_save, sender=CourseCategory)
+def create_category_stats(sender, instance, created, **kwargs):
+    if created:
+        refresh_category_stats([instance.pk])
+
+
+@receiver(post_init, sender=Course)
+def remember_course_category(sender, instance, **kwargs):
+    instance._stats_category_id = instance.__dict__.get('course_category_id')
+
+
+@receiver(post_save, sender=Course)
+def update_category_stats(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(STATS_SOURCE_FIELDS):
+        return
+    # a course moved to another category changes both rows
+    refresh_category_stats([instance._stats_category_id, instance.course_category_id])
+    instance._stats_category_id = instance.course_category_id
+
+
+@receiver(post_delete, sender=Course)
+def update_category_stats_on_delete(sender, instance, **kwargs):
+    refresh_category_stats([instance.course_category_id], create=False)
@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce
+
+from .cache import invalidate_model
+from .models import CourseCategory, CourseCategoryStats
+
+# course fields the category rollup is computed from
+STATS_SOURCE_FIELDS = ('course_category', 'price_for_one', 'price_for_many', 'study_hours')
+
+
+def category_aggregates():
+    return {
+        'course_count': Count('course'),
+        'min_price_for_one': Min('course__price_for_one'),
+        'max_price_for_one': Max('course__price_for_one'),
+        'min_price_for_many': Min('course__price_for_many'),
+        'max_price_for_many': Max('course__price_for_many'),
+        'study_hours': Coalesce(Sum('course__study_hours'), 0),
+    }
+
+
+def compute_stats(categories):
+    """
+    Returns unsaved ``CourseCategoryStats`` of the categories, computed with
+    one aggregate query.
+    """
+    aggregates = category_aggregates()
+    rows = categories.order_by().values('pk').annotate(**aggregates)
+    return [
+        CourseCategoryStats(category_id=row['pk'], **{name: row[name] for name in aggregates})
+        for row in rows
+    ]
+
+
+def refresh_category_stats(category_ids, create=True):
+    """
+    Recomputes the rollup rows of the given categories only. With
+    ``create=False`` missing rows are left out, a course deleted along with
+    its category must not bring the category's row back.
+    """
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if not category_ids:
+        return
+    stats = compute_stats(CourseCategory.objects.filter(pk__in=category_ids))
+    if create:
+        CourseCategoryStats.objects.bulk_create(
+            stats, update_conflicts=True, unique_fields=['category'],
+            update_fields=list(category_aggregates()),
+        )
+    else:
+        for row in stats:
+            CourseCategoryStats.objects.filter(pk=row.category_id).update(
+                **{name: getattr(row, name) for name in category_aggregates()}
+            )
+    # neither sends post_save
+    invalidate_model(CourseCategoryStats)
+
+
+def rebuild_category_stats():
+    """
+    Recomputes the whole rollup table from scratch, returns the number of
+    categories.
+    """
+    stats = compute_stats(CourseCategory.objects.all())
+    with transaction.atomic():
+        CourseCategoryStats.objects.all().delete()
+        CourseCategoryStats.objects.bulk_create(stats)
+    invalidate_model(CourseCategoryStats)
+    return len(stats)
@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api_authentication.models import User
+from ..models import Application, Certificate, Course, CourseCategory, TeacherInfo
+
+CHANGELISTS = ('teacherinfo', 'course', 'certificate', 'application')
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='password', role='admin',
+                                                   phone_number='+375290000000')
+        self.client.force_login(self.admin)
+        self.category = CourseCategory.objects.create(name='Programming')
+        self.students = [
+            User.objects.create_user(username=f'student{i}', password='password', role='student',
+                                     phone_number=f'+37529100000{i}')
+            for i in range(3)
+        ]
+
+    def add_courses(self, count):
+        for _ in range(count):
+            index = Course.objects.count()
+            user = User.objects.create_user(username=f'teacher{index}', password='password', role='teacher',
+                                            first_name='Name', last_name=f'Teacher{index}',
+                                            phone_number=f'+3752920{index:05d}')
+            teacher = TeacherInfo.objects.create(user=user, education='PhD', experience='10 years')
+            Certificate.objects.create(file=f'certificates/{index}.pdf', teacher=teacher)
+            course = Course.objects.create(name=f'Course {index}', price_for_one=100, price_for_many=80,
+                                           course_category=self.category)
+            course.teachers.add(teacher)
+            course.students.add(*self.students[:index % 4])
+            Application.objects.create(name='Applicant', surname=f'{index}', phone_number='+375445768788',
+                                       course=course)
+
+    def changelist_queries(self, model_name):
+        url = reverse(f'admin:api_product_{model_name}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_courses(3)
+        few = {name: self.changelist_queries(name) for name in CHANGELISTS}
+        self.add_courses(12)
+        many = {name: self.changelist_queries(name) for name in CHANGELISTS}
+        self.assertEqual(many, few)
+
+    def test_counts_are_annotated_and_sortable(self):
+        self.add_courses(4)
+        response = self.client.get(reverse('admin:api_product_course_changelist'), {'o': '-7'})
+        courses = list(response.context['cl'].result_list)
+        self.assertEqual([course.student_count for course in courses], [3, 2, 1, 0])
+        self.assertEqual({course.teacher_count for course in courses}, {1})
+
+        response = self.client.get(reverse('admin:api_product_teacherinfo_changelist'))
+        teachers = list(response.context['cl'].result_list)
+        self.assertEqual({(teacher.course_count, teacher.certificate_count) for teacher in teachers}, {(1, 1)})
@@ -0,0 +1,182 @@
+import os
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api_authentication.models import User
+from ..models import Article, CourseCategory, Course, TeacherInfo, Review
+
+
+class ArticleResponseCacheTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.article = Article.objects.create(title='First', content='Content')
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get(reverse('articles-list'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('articles-list'))
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(reverse('articles-list'))
+        response = self.client.get(reverse('articles-list'), {'fields': 'title'})
+        self.assertEqual(response.data, [{'title': 'First'}])
+
+    def test_save_invalidates(self):
+        self.client.get(reverse('articles-list'))
+        self.client.get(reverse('articles-detail', args=[self.article.id]))
+        self.article.title = 'Edited'
+        self.article.save()
+        self.assertEqual(self.client.get(reverse('articles-list')).data[0]['title'], 'Edited')
+        self.assertEqual(self.client.get(reverse('articles-detail', args=[self.article.id])).data['title'], 'Edited')
+
+    def test_delete_invalidates(self):
+        self.client.get(reverse('articles-list'))
+        self.article.delete()
+        self.assertEqual(self.client.get(reverse('articles-list')).data, [])
+
+    def test_not_found_is_not_cached(self):
+        url = reverse('articles-detail', args=['12345678-1234-5678-1234-567812345678'])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CourseResponseCacheTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = CourseCategory.objects.create(name='Programming')
+        self.course = Course.objects.create(name='Python 101', price_for_one=150, price_for_many=120,
+                                            course_category=self.category)
+        self.student = User.objects.create_user(username='student', password='password', role='student')
+
+    def get_course(self):
+        return self.client.get(reverse('courses-detail', args=[self.course.id])).data
+
+    def test_enrollment_invalidates(self):
+        self.assertEqual(self.get_course()['students'], [])
+        self.course.students.add(self.student)
+        self.assertEqual(len(self.get_course()['students']), 1)
+
+    def test_teacher_change_invalidates(self):
+        teacher = TeacherInfo.objects.create(
+            user=User.objects.create(username='teacher', role='teacher'),
+            education='PhD', experience='10 years'
+        )
+        self.course.teachers.add(teacher)
+        self.assertEqual(self.get_course()['teachers'][0]['education'], 'PhD')
+        teacher.education = 'MSc'
+        teacher.save()
+        self.assertEqual(self.get_course()['teachers'][0]['education'], 'MSc')
+
+    def test_category_change_invalidates(self):
+        self.get_course()
+        self.category.name = 'Development'
+        self.category.save()
+        self.assertEqual(self.get_course()['course_category']['name'], 'Development')
+
+    def test_login_does_not_invalidate(self):
+        self.course.students.add(self.student)
+        self.get_course()
+        update_last_login(None, self.student)
+        with self.assertNumQueries(0):
+            self.get_course()
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.now = 1_700_000_000.2
+        clock = mock.patch('api_product.cache.time')
+        clock.start().time.side_effect = lambda: self.now
+        self.addCleanup(clock.stop)
+
+        self.client = APIClient()
+        self.article = Article.objects.create(title='First', content='Content')
+        self.category = CourseCategory.objects.create(name='Programming')
+        self.course = Course.objects.create(name='Python 101', price_for_one=150, price_for_many=120,
+                                            course_category=self.category)
+
+    def test_validators_are_sent(self):
+        self.now += 1
+        response = self.client.get(reverse('articles-list'))
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        cached = self.client.get(reverse('articles-list'))
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_if_none_match(self):
+        etag = self.client.get(reverse('articles-list'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('articles-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        Article.objects.create(title='Second', content='Content')
+        response = self.client.get(reverse('articles-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        self.client.get(reverse('articles-detail', args=[self.article.id]))
+        self.now += 1
+        last_modified = self.client.get(reverse('articles-detail', args=[self.article.id]))['Last-Modified']
+        response = self.client.get(reverse('articles-detail', args=[self.article.id]),
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_no_last_modified_in_the_second_of_a_change(self):
+        self.assertNotIn('Last-Modified', self.client.get(reverse('articles-list')))
+        self.now += 1
+        last_modified = self.client.get(reverse('articles-list'))['Last-Modified']
+
+        self.article.title = 'Changed'
+        self.article.save()
+        self.now += 0.5
+        response = self.client.get(reverse('articles-list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_detail_etag_depends_on_its_own_row(self):
+        other = Article.objects.create(title='Other', content='Content')
+        url = reverse('articles-detail', args=[self.article.id])
+        etag = self.client.get(url)['ETag']
+        list_etag = self.client.get(reverse('articles-list'))['ETag']
+
+        other.title = 'Changed'
+        other.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotEqual(self.client.get(reverse('articles-list'))['ETag'], list_etag)
+
+        self.article.title = 'Changed'
+        self.article.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query_string(self):
+        etag = self.client.get(reverse('articles-list'))['ETag']
+        response = self.client.get(reverse('articles-list'), {'fields': 'title'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_uncached_endpoint(self):
+        Review.objects.create(author='John', course=self.course, content='Great')
+        etag = self.client.get(reverse('reviews-list'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('reviews-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.course.name = 'Python 102'
+        self.course.save()
+        response = self.client.get(reverse('reviews-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['course']['name'], 'Python 102')
+
+
+class CacheLocationTest(APITestCase):
+    def test_file_caches_are_not_the_development_ones(self):
+        self.assertNotEqual(os.path.realpath(caches['default']._dir),
+                            os.path.realpath(os.path.join(settings.BASE_DIR, 'cache')))
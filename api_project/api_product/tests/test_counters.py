@@ -0,0 +1,96 @@
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api_authentication.models import User
+from ..models import Course, CourseCategory, Review
+
+
+class CourseCountersTest(TestCase):
+    def setUp(self):
+        category = CourseCategory.objects.create(name='Programming')
+        self.course = Course.objects.create(name='Python', price_for_one=100, price_for_many=80,
+                                            course_category=category)
+        self.other = Course.objects.create(name='Java', price_for_one=100, price_for_many=80,
+                                           course_category=category)
+        self.students = User.objects.bulk_create(
+            User(username=f'student{i}', role='student', phone_number=f'+37529{i:07d}') for i in range(4)
+        )
+
+    def counters(self, course=None):
+        course = course or self.course
+        return tuple(Course.objects.filter(pk=course.pk).values_list('student_count', 'review_count').get())
+
+    def test_student_count(self):
+        self.course.students.add(*self.students[:3])
+        self.course.students.add(self.students[0])
+        self.assertEqual(self.counters(), (3, 0))
+        # removing a student who is not enrolled changes nothing
+        self.course.students.remove(self.students[0], self.students[3])
+        self.assertEqual(self.counters(), (2, 0))
+        self.course.students.clear()
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_student_count_from_the_student_side(self):
+        student = self.students[0]
+        student.courses.add(self.course, self.other)
+        self.assertEqual((self.counters(), self.counters(self.other)), ((1, 0), (1, 0)))
+        student.courses.remove(self.other)
+        self.assertEqual(self.counters(self.other), (0, 0))
+        student.courses.clear()
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_deleted_student_leaves_the_count(self):
+        self.course.students.add(*self.students)
+        self.students[0].delete()
+        self.assertEqual(self.counters(), (3, 0))
+
+    def test_review_count(self):
+        review = Review.objects.create(author='Student', course=self.course, content='Great')
+        Review.objects.create(author='Student', course=self.course, content='Good')
+        self.assertEqual(self.counters(), (0, 2))
+        review.course = self.other
+        review.save()
+        self.assertEqual((self.counters(), self.counters(self.other)), ((0, 1), (0, 1)))
+        review.delete()
+        self.assertEqual(self.counters(self.other), (0, 0))
+
+    def test_saving_a_loaded_course_keeps_the_counters(self):
+        course = Course.objects.get(pk=self.course.pk)
+        self.course.students.add(*self.students)
+        course.name = 'Python 3'
+        course.save()
+        self.assertEqual(self.counters(), (4, 0))
+
+    def test_saving_a_partly_loaded_course_writes_only_the_loaded_fields(self):
+        course = Course.objects.only('id', 'name').get(pk=self.course.pk)
+        course.name = 'Python 3'
+        with CaptureQueriesContext(connection) as queries:
+            course.save()
+        # the deferred fields are neither loaded nor written
+        self.assertFalse(any('"price_for_one"' in query['sql'] for query in queries))
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "api_product_course"') for query in queries), 1)
+        self.assertEqual(Course.objects.get(pk=self.course.pk).name, 'Python 3')
+
+    def test_reconcile(self):
+        Review.objects.bulk_create(Review(author='Student', course=self.course, content='Great') for _ in range(3))
+        Course.objects.filter(pk=self.other.pk).update(student_count=7)
+        stdout = io.StringIO()
+        call_command('reconcile_course_counters', '--dry-run', stdout=stdout)
+        self.assertEqual(stdout.getvalue().splitlines()[:2], ['Java', 'Python'])
+        self.assertEqual(self.counters(), (0, 0))
+
+        call_command('reconcile_course_counters', stdout=io.StringIO())
+        self.assertEqual((self.counters(), self.counters(self.other)), ((0, 3), (0, 0)))
+
+    def test_counters_are_served(self):
+        self.course.students.add(*self.students[:2])
+        Review.objects.create(author='Student', course=self.course, content='Great')
+        response = APIClient().get(reverse('courses-detail', args=[self.course.id]),
+                                   {'fields': 'name,student_count,review_count'})
+        self.assertEqual(response.data, {'name': 'Python', 'student_count': 2, 'review_count': 1})
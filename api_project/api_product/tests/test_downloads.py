@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.http import Http404
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api_authentication.models import User
+from api_project.urls import serve_media
+from utilities.downloads import file_download_response
+from ..models import Certificate, TeacherInfo
+
+
+class CertificateDownloadTest(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        teacher = TeacherInfo.objects.create(
+            user=User.objects.create_user(username='teacher', password='password', role='teacher'),
+            education='PhD', experience='10 years'
+        )
+        self.certificate = Certificate.objects.create(file=ContentFile(b'0123456789', 'cert.pdf'), teacher=teacher)
+        self.url = reverse('certificates-download', args=[self.certificate.id])
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_full_download(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/pdf')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertIn('ETag', response)
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_range_file_is_closed_without_being_read(self):
+        storage = self.certificate.file.storage
+        opened = []
+
+        def tracking_open(name, mode='rb'):
+            opened.append(open(storage.path(name), mode))
+            return opened[-1]
+
+        with mock.patch.object(storage, 'open', tracking_open):
+            response = file_download_response(RequestFactory().get('/', HTTP_RANGE='bytes=2-5'),
+                                              self.certificate.file)
+        # the client went away before the first chunk
+        response.close()
+        self.assertTrue(opened[0].closed)
+
+    def test_open_and_suffix_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=7-')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_multiple_ranges_get_the_full_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,4-5')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_stale_if_range_gets_the_full_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+
+    @override_settings(DOWNLOAD_OFFLOAD='x-accel-redirect', DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.certificate.file.name)
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+    @override_settings(DOWNLOAD_OFFLOAD='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, self.certificate.file.name))
+
+    def test_missing_file(self):
+        os.remove(self.certificate.file.path)
+        response = self.client.get(self.url, HTTP_ACCEPT='application/pdf')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), {'detail': 'File not found.'})
+
+    def test_listed_file_url_is_the_download_action(self):
+        response = self.client.get(reverse('certificates-detail', args=[self.certificate.id]))
+        self.assertEqual(response.data['file'], f'http://testserver{self.url}')
+
+    def test_media_route_does_not_serve_certificates(self):
+        request = RequestFactory().get('/')
+        with self.assertRaises(Http404):
+            serve_media(request, self.certificate.file.name, document_root=self.media_root)
+        with self.assertRaises(Http404):
+            serve_media(request, f'teachers/../{self.certificate.file.name}', document_root=self.media_root)
+        with open(os.path.join(self.media_root, 'photo.jpg'), 'wb') as file:
+            file.write(b'jpeg')
+        response = serve_media(request, 'photo.jpg', document_root=self.media_root)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
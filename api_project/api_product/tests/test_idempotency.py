@@ -0,0 +1,204 @@
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..idempotency import idempotency_cache_key, release_lock, request_fingerprint
+from ..models import Application, Course, CourseCategory, IdempotencyLock, Review
+from ..serializers import ApplicationSerializer
+
+
+class IdempotencyKeyTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.course = Course.objects.create(name='Python', price_for_one=100, price_for_many=80,
+                                            course_category=CourseCategory.objects.create(name='Programming'))
+        self.data = {
+            'name': 'New',
+            'surname': 'Applicant',
+            'phone_number': '+375445768788',
+            'start_date': timezone.now().date().isoformat(),
+            'course': str(self.course.id),
+        }
+        self.key = uuid.uuid4().hex
+
+    def apply(self, data=None, key=None):
+        return self.client.post(reverse('applications-list'), data or self.data, format='json',
+                                HTTP_IDEMPOTENCY_KEY=key or self.key)
+
+    def hold_key(self, expires_in=60):
+        view = SimpleNamespace(basename='applications', action='create')
+        request = SimpleNamespace(data=self.data, user=AnonymousUser(), META={'REMOTE_ADDR': '127.0.0.1'})
+        cache_key = idempotency_cache_key(view, request, self.key)
+        IdempotencyLock.objects.create(key=cache_key, fingerprint=request_fingerprint(request),
+                                       expires_at=timezone.now() + datetime.timedelta(seconds=expires_in))
+        return cache_key
+
+    def test_retry_is_answered_from_the_store(self):
+        first = self.apply()
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(1):
+            retry = self.apply()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Content-Type'], first['Content-Type'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_stored_response_outlives_the_cache(self):
+        self.apply()
+        for cache in caches.all():
+            cache.clear()
+        retry = self.apply()
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_expired_response_is_discarded(self):
+        self.apply()
+        IdempotencyLock.objects.update(expires_at=timezone.now())
+        out = StringIO()
+        call_command('discard_expired_idempotency_keys', stdout=out)
+        self.assertIn('Deleted 1 expired idempotency keys', out.getvalue())
+        self.assertFalse(IdempotencyLock.objects.exists())
+        response = self.apply()
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Application.objects.count(), 2)
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        self.client.post(reverse('applications-list'), self.data, format='json')
+        self.client.post(reverse('applications-list'), self.data, format='json')
+        self.assertEqual(Application.objects.count(), 2)
+
+    def test_key_reused_for_another_body(self):
+        self.apply()
+        response = self.apply(dict(self.data, name='Other'))
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_anonymous_keys_are_scoped_to_the_client(self):
+        self.apply()
+        response = self.client.post(reverse('applications-list'), dict(self.data, name='Other'), format='json',
+                                    HTTP_IDEMPOTENCY_KEY=self.key, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(response.data['name'], 'Other')
+        self.assertEqual(Application.objects.count(), 2)
+
+    def test_keys_are_scoped_to_the_endpoint(self):
+        self.apply()
+        review = {'author': 'Student', 'course': str(self.course.id), 'content': 'Great'}
+        response = self.client.post(reverse('reviews-list'), review, format='json', HTTP_IDEMPOTENCY_KEY=self.key)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Review.objects.count(), 1)
+
+    def test_overlong_key(self):
+        response = self.apply(key='k' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.2)
+    def test_retry_of_a_request_in_flight_times_out(self):
+        self.hold_key()
+        response = self.apply()
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Application.objects.exists())
+
+    def test_retry_waits_for_the_request_in_flight(self):
+        cache_key = self.hold_key()
+        # the first request fails while the retry waits, which then runs the action itself
+        with mock.patch('api_product.idempotency.time.sleep', side_effect=lambda delay: release_lock(cache_key)):
+            response = self.apply()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Application.objects.count(), 1)
+        self.assertEqual(IdempotencyLock.objects.get().status_code, status.HTTP_201_CREATED)
+
+    def test_expired_lock_is_taken_over(self):
+        self.hold_key(expires_in=-1)
+        response = self.apply()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_key_reused_while_in_flight(self):
+        self.hold_key()
+        response = self.apply(dict(self.data, name='Other'))
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+class ConcurrentIdempotencyKeyTest(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # a database file like in production: the shared in-memory test
+        # database fails concurrent writers instead of making them wait
+        cls.directory = tempfile.mkdtemp()
+        cls.memory_connection = connections['default']
+        cls.test_name = cls.memory_connection.settings_dict['NAME']
+        connections.settings['default']['NAME'] = os.path.join(cls.directory, 'test.sqlite3')
+        connections['default'] = connections.create_connection('default')
+        call_command('migrate', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['default'].close()
+        connections.settings['default']['NAME'] = cls.test_name
+        connections['default'] = cls.memory_connection
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.course = Course.objects.create(name='Python', price_for_one=100, price_for_many=80,
+                                            course_category=CourseCategory.objects.create(name='Programming'))
+        self.data = {
+            'name': 'New',
+            'surname': 'Applicant',
+            'phone_number': '+375445768788',
+            'start_date': timezone.now().date().isoformat(),
+            'course': str(self.course.id),
+        }
+
+    def test_concurrent_requests_with_the_same_key_create_once(self):
+        key = uuid.uuid4().hex
+        barrier = threading.Barrier(2)
+        responses = []
+        save = ApplicationSerializer.save
+
+        def slow_save(serializer, **kwargs):
+            # keeps the first request in flight while the other one arrives
+            time.sleep(0.3)
+            return save(serializer, **kwargs)
+
+        def apply():
+            try:
+                barrier.wait()
+                responses.append(APIClient().post(reverse('applications-list'), self.data, format='json',
+                                                  HTTP_IDEMPOTENCY_KEY=key))
+            finally:
+                connection.close()
+
+        with mock.patch.object(ApplicationSerializer, 'save', slow_save):
+            threads = [threading.Thread(target=apply) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [201, 201])
+        self.assertEqual(sorted(response.get('Idempotent-Replayed', '') for response in responses), ['', 'true'])
+        self.assertEqual(Application.objects.count(), 1)
+        self.assertEqual(IdempotencyLock.objects.get().status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,122 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api_authentication.models import User
+from ..images import generate_variants, variant_name
+from ..models import TeacherInfo, Article
+
+
+def image_file(name='photo.jpg', size=(2000, 1000), orientation=None):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', size, 'orange')
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, IMAGE_VARIANT_WIDTHS=(80, 160, 320, 640, 1280))
+class ImageVariantsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = User.objects.create_user(username='teacher', password='password', role='teacher')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_teacher(self, photo):
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher = TeacherInfo.objects.create(user=self.user, education='PhD', experience='10 years', photo=photo)
+        teacher.refresh_from_db()
+        return teacher
+
+    def test_variants_are_generated_after_upload(self):
+        teacher = self.create_teacher(image_file())
+        variants = teacher.photo_variants
+        self.assertEqual(variants['source'], teacher.photo.name)
+        self.assertEqual(list(variants['webp']), ['80', '160', '320', '640', '1280'])
+        with default_storage.open(variants['webp']['80']) as file, Image.open(file) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (80, 40))
+        with default_storage.open(variants['jpeg']['1280']) as file, Image.open(file) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (1280, 640))
+
+    def test_images_are_not_upscaled(self):
+        teacher = self.create_teacher(image_file(size=(200, 200)))
+        self.assertEqual(list(teacher.photo_variants['jpeg']), ['80', '160'])
+
+    def test_exif_orientation(self):
+        teacher = self.create_teacher(image_file(size=(400, 200), orientation=6))
+        self.assertEqual(list(teacher.photo_variants['webp']), ['80', '160'])
+        with default_storage.open(teacher.photo_variants['webp']['160']) as file, Image.open(file) as image:
+            self.assertEqual(image.size, (160, 320))
+
+    def test_regeneration_is_idempotent(self):
+        teacher = self.create_teacher(image_file())
+        name = variant_name(teacher.photo.name, 80, 'webp')
+        modified = default_storage.get_modified_time(name)
+        self.assertEqual(generate_variants(teacher.photo), teacher.photo_variants)
+        self.assertEqual(default_storage.get_modified_time(name), modified)
+        self.assertEqual(sorted(default_storage.listdir('teachers')[1]),
+                         sorted([teacher.photo.name.split('/')[-1]] +
+                                [path.split('/')[-1] for fmt in ('webp', 'jpeg')
+                                 for path in teacher.photo_variants[fmt].values()]))
+
+    def test_srcset_in_api(self):
+        teacher = self.create_teacher(image_file())
+        response = APIClient().get(reverse('teacher-info-detail', args=[teacher.id]))
+        srcset = response.data['photo_srcset']
+        self.assertEqual(set(srcset), {'webp', 'jpeg'})
+        self.assertEqual(srcset['webp']['320w'],
+                         'http://testserver' + default_storage.url(teacher.photo_variants['webp']['320']))
+
+    def test_srcset_is_empty_for_outdated_variants(self):
+        teacher = self.create_teacher(image_file())
+        TeacherInfo.objects.filter(pk=teacher.pk).update(photo='teachers/other.jpg')
+        response = APIClient().get(reverse('teacher-info-detail', args=[teacher.id]))
+        self.assertEqual(response.data['photo_srcset'], {})
+
+    def test_cleared_image_clears_variants(self):
+        teacher = self.create_teacher(image_file())
+        teacher.photo = None
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher.save()
+        teacher.refresh_from_db()
+        self.assertEqual(teacher.photo_variants, {})
+
+    def test_replaced_image_and_variants_are_deleted(self):
+        teacher = self.create_teacher(image_file())
+        old_names = [teacher.photo.name] + list(teacher.photo_variants['webp'].values())
+        teacher.photo = image_file('new.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher.save()
+        self.assertFalse(any(default_storage.exists(name) for name in old_names))
+        teacher.refresh_from_db()
+        self.assertTrue(default_storage.exists(teacher.photo_variants['webp']['80']))
+
+        new_names = [teacher.photo.name] + list(teacher.photo_variants['jpeg'].values())
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in new_names))
+
+    def test_backfill_command(self):
+        article = Article.objects.create(title='Title', content='Content')
+        Article.objects.filter(pk=article.pk).update(image=default_storage.save('articles/a.jpg', image_file()))
+        call_command('generate_image_variants', stdout=io.StringIO())
+        article.refresh_from_db()
+        self.assertEqual(article.image_variants['source'], 'articles/a.jpg')
+        self.assertTrue(default_storage.exists('articles/a_640w.webp'))
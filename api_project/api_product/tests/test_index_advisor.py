@@ -0,0 +1,63 @@
+import io
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api_authentication.models import User
+from ..index_advisor import analyze, fingerprint
+from ..models import Application, Article, Course, CourseCategory, Faq, FaqCategory, Review
+
+
+class IndexAdvisorTest(TestCase):
+    def setUp(self):
+        category = CourseCategory.objects.create(name='Programming')
+        course = Course.objects.create(name='Python', price_for_one=100, price_for_many=80,
+                                       course_category=category)
+        Review.objects.create(author='Student', course=course, content='Great')
+        Application.objects.create(name='Applicant', surname='Surname', phone_number='+375445768788',
+                                   course=course)
+        Article.objects.create(title='Article', content='Content')
+        Faq.objects.create(question='Why?', answer='Because', faq_category=FaqCategory.objects.create(name='General'))
+
+    def captured(self, *querysets):
+        with CaptureQueriesContext(connection) as context:
+            for queryset in querysets:
+                list(queryset)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint("SELECT * FROM \"t\" U0 WHERE a = 'it''s' AND b = 10 LIMIT 21"),
+                         'SELECT * FROM "t" U0 WHERE a = ? AND b = ? LIMIT ?')
+
+    def test_unindexed_ordering_is_reported(self):
+        findings = analyze(self.captured(Faq.objects.order_by('question'), Faq.objects.order_by('question')))
+        self.assertEqual({(finding.kind, finding.count) for finding in findings},
+                         {('full scan', 2), ('temp b-tree', 2)})
+        self.assertEqual(findings[0].table, 'api_product_faq')
+
+    def test_indexed_hot_paths(self):
+        findings = analyze(self.captured(
+            Review.objects.order_by('-creation_date', '-id')[:21],
+            Application.objects.order_by('start_date', 'id')[:21],
+            Article.objects.order_by('-creation_date', '-id')[:21],
+            Course.objects.order_by('-name', '-id')[:21],
+            Course.objects.filter(price_for_one=100).order_by(),
+            Course.objects.values_list('study_hours', flat=True).distinct().order_by('study_hours'),
+        ))
+        self.assertEqual(findings, [])
+
+    def test_command(self):
+        User.objects.create_superuser(username='admin', password='password', role='admin',
+                                      phone_number='+375290000000')
+        stdout = io.StringIO()
+        call_command('advise_indexes', stdout=stdout)
+        output = stdout.getvalue()
+        self.assertRegex(output, r'\d+ findings in \d+ queries')
+        for table in ('api_product_review', 'api_product_article', 'api_product_application'):
+            self.assertNotIn(f'SCAN {table}', output)
+
+    def test_unknown_admin(self):
+        with self.assertRaises(CommandError):
+            call_command('advise_indexes', '--admin', 'nobody', stdout=io.StringIO())
@@ -0,0 +1,158 @@
+import glob
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..intake import (
+    application_intake, course_lookup, dead_letter_path, journal_path, save_applications, status_dir,
+)
+from ..models import Application, Course, CourseCategory
+
+
+class ApplicationIntakeTest(APITestCase):
+    def setUp(self):
+        self.intake_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(APPLICATION_INTAKE_BUFFERED=True,
+                                                   APPLICATION_INTAKE_DIR=self.intake_dir)
+        self.settings_override.enable()
+        # the flusher thread is not started, the tests flush explicitly
+        worker_patch = mock.patch.object(application_intake, '_start_worker')
+        worker_patch.start()
+        self.addCleanup(worker_patch.stop)
+        course_lookup.clear()
+
+        self.client = APIClient()
+        self.category = CourseCategory.objects.create(name='Programming')
+        self.course = Course.objects.create(name='Python', price_for_one=100, price_for_many=80,
+                                            course_category=self.category)
+
+    def tearDown(self):
+        application_intake.rotate()
+        self.settings_override.disable()
+        shutil.rmtree(self.intake_dir, ignore_errors=True)
+
+    def apply(self, name='New', course=None):
+        data = {
+            'name': name,
+            'surname': 'Applicant',
+            'phone_number': '+375445768788',
+            'start_date': timezone.now().date(),
+            'course': str((course or self.course).id),
+        }
+        return self.client.post(reverse('applications-list'), data)
+
+    def test_applications_are_journaled_then_saved(self):
+        self.apply()
+        with self.assertNumQueries(0):
+            response = self.apply('Second')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['course'],
+                         {'id': str(self.course.id), 'name': 'Python', 'category': self.category.id})
+        self.assertFalse(Application.objects.exists())
+        with open(journal_path(os.getpid())) as journal:
+            self.assertEqual(len(journal.readlines()), 2)
+
+        self.assertEqual(application_intake.flush(), 2)
+        self.assertEqual(Application.objects.get(id=response.data['id']).name, 'Second')
+        self.assertEqual(os.listdir(self.intake_dir), ['status'])
+        self.assertEqual(os.listdir(status_dir()), [])
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_eager_intake_saves_inline(self):
+        response = self.apply()
+        self.assertTrue(Application.objects.filter(id=response.data['id']).exists())
+
+    def test_unknown_course(self):
+        response = self.client.post(reverse('applications-list'), {
+            'name': 'New', 'surname': 'Applicant', 'phone_number': '+375445768788',
+            'start_date': timezone.now().date(), 'course': '7c1f5a56-6a0e-4a43-8d7a-6f7e4b1f8c11',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('course', response.data)
+
+    def test_applications_for_deleted_courses_are_dead_lettered(self):
+        other = Course.objects.create(name='Java', price_for_one=100, price_for_many=80,
+                                      course_category=self.category)
+        self.apply()
+        rejected = self.apply(course=other)
+        other.delete()
+        self.assertEqual(application_intake.flush(), 1)
+        self.assertEqual(list(Application.objects.values_list('course', flat=True)), [self.course.id])
+        with open(dead_letter_path()) as dead_letter:
+            letters = [json.loads(line) for line in dead_letter]
+        self.assertEqual([letter['record']['id'] for letter in letters], [rejected.data['id']])
+
+        # the status is kept apart from the dead-letter file
+        os.remove(dead_letter_path())
+        response = self.client.get(rejected['Location'])
+        self.assertEqual(response.data['status'], 'rejected')
+        self.assertEqual(response.data['reason'], 'course was deleted')
+
+    def test_status_url(self):
+        response = self.apply()
+        status_url = response.data['status_url']
+        self.assertEqual(response['Location'], status_url)
+        self.assertEqual(self.client.get(status_url).data, {'id': response.data['id'], 'status': 'pending'})
+
+        application_intake.flush()
+        data = self.client.get(status_url).data
+        self.assertEqual(data['status'], 'saved')
+        self.assertEqual(self.client.get(data['url']).data['name'], 'New')
+
+        for pk in ('7c1f5a56-6a0e-4a43-8d7a-6f7e4b1f8c11', 'not-an-id'):
+            response = self.client.get(reverse('applications-status', args=[pk]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(APPLICATION_INTAKE_MAX_ATTEMPTS=2)
+    def test_failing_batch_is_quarantined(self):
+        def fail_on_poison(records):
+            if any(record['name'] == 'Poison' for record in records):
+                raise ValueError('poison')
+            return save_applications(records)
+
+        poison = self.apply('Poison')
+        application_intake.rotate()
+        self.apply('Good')
+        with mock.patch('api_product.intake.save_applications', side_effect=fail_on_poison), \
+                self.assertLogs('api_product.intake', 'ERROR'):
+            # the failing batch does not hold up the next one
+            self.assertEqual(application_intake.flush(), 1)
+            self.assertEqual(application_intake.flush(), 0)
+        self.assertEqual(list(Application.objects.values_list('name', flat=True)), ['Good'])
+        self.assertEqual(sorted(name.split('.')[-1] for name in os.listdir(self.intake_dir)),
+                         ['quarantined', 'status'])
+        self.assertEqual(self.client.get(poison['Location']).data['status'], 'pending')
+
+        call_command('flush_applications', stdout=io.StringIO())
+        self.assertFalse(Application.objects.filter(name='Poison').exists())
+        stdout = io.StringIO()
+        call_command('flush_applications', '--retry-quarantined', stdout=stdout)
+        self.assertIn('Flushed 1 applications', stdout.getvalue())
+        self.assertEqual(self.client.get(poison['Location']).data['status'], 'saved')
+
+    def test_abandoned_journal_is_saved_once(self):
+        self.apply()
+        application_intake.rotate()
+        dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+        dead.wait()
+        [batch] = glob.glob(os.path.join(self.intake_dir, '*.batch'))
+        shutil.copy(batch, os.path.join(self.intake_dir, f'{dead.pid}.journal'))
+
+        stdout = io.StringIO()
+        call_command('flush_applications', stdout=stdout)
+        # the replayed copy is neither saved nor counted twice
+        self.assertIn('Flushed 1 applications, adopted 1 files', stdout.getvalue())
+        self.assertEqual(Application.objects.count(), 1)
+        self.assertEqual(os.listdir(status_dir()), [])
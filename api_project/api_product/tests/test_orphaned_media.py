@@ -0,0 +1,79 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api_authentication.models import User
+from ..models import Certificate, TeacherInfo
+from .test_images import image_file
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, IMAGE_VARIANT_WIDTHS=(80, 160, 320, 640, 1280))
+class CollectOrphanedMediaTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        user = User.objects.create_user(username='teacher', password='password', role='teacher')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher = TeacherInfo.objects.create(user=user, education='PhD', experience='10 years',
+                                                      photo=image_file())
+        self.teacher.refresh_from_db()
+        self.certificate = Certificate.objects.create(file=ContentFile(b'pdf', 'cert.pdf'), teacher=self.teacher)
+        self.orphans = [
+            default_storage.save('certificates/lost.pdf', ContentFile(b'pdf')),
+            default_storage.save('certificates/2023/old.pdf', ContentFile(b'pdf')),
+            default_storage.save('teachers/lost.jpg', ContentFile(b'jpg')),
+            default_storage.save('teachers/lost_80w.webp', ContentFile(b'webp')),
+        ]
+        self.referenced = [self.certificate.file.name, self.teacher.photo.name,
+                           *self.teacher.photo_variants['webp'].values(),
+                           *self.teacher.photo_variants['jpeg'].values()]
+        self.age(self.orphans + self.referenced)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def age(self, names, hours=48):
+        modified = time.time() - hours * 3600
+        for name in names:
+            os.utime(default_storage.path(name), (modified, modified))
+
+    def collect(self, *args):
+        stdout = io.StringIO()
+        call_command('collect_orphaned_media', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_orphans_are_deleted(self):
+        output = self.collect('--batch-size', '2', '--workers', '2')
+        self.assertIn('Deleted 4 orphaned files', output)
+        self.assertFalse(any(default_storage.exists(name) for name in self.orphans))
+        self.assertTrue(all(default_storage.exists(name) for name in self.referenced))
+
+    def test_dry_run(self):
+        output = self.collect('--dry-run')
+        self.assertEqual(sorted(output.splitlines()[:-1]), sorted(self.orphans))
+        self.assertTrue(all(default_storage.exists(name) for name in self.orphans))
+
+    def test_recent_files_are_kept(self):
+        recent = default_storage.save('articles/new.jpg', ContentFile(b'jpg'))
+        self.age([recent], hours=1)
+        self.collect()
+        self.assertTrue(default_storage.exists(recent))
+        self.collect('--min-age', '0')
+        self.assertFalse(default_storage.exists(recent))
+
+    def test_lookups_are_batched(self):
+        for index in range(20):
+            self.age([default_storage.save(f'certificates/lost_{index}.pdf', ContentFile(b'pdf'))])
+        # one lookup of the certificates, one of the photos and one of their variants' sources
+        with self.assertNumQueries(3):
+            self.collect('--dry-run', '--batch-size', '100')
@@ -0,0 +1,99 @@
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import CourseCategory, Course, Discount, Review, Application
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = CourseCategory.objects.create(name='Programming')
+        self.course = Course.objects.create(name='Python 101', price_for_one=150, price_for_many=120,
+                                            course_category=self.category)
+        today = timezone.localdate()
+        # several reviews share a creation_date so the id tiebreaker matters
+        self.reviews = Review.objects.bulk_create([
+            Review(author=f'Author {i}', course=self.course, content='Great',
+                   creation_date=today - datetime.timedelta(days=i // 3))
+            for i in range(11)
+        ])
+
+    def collect(self, url, key='next'):
+        items, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            items.extend(response.data['results'])
+            url = response.data[key]
+            pages += 1
+        return items, pages
+
+    def test_unpaginated_response_is_kept(self):
+        response = self.client.get(reverse('reviews-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 11)
+
+    def test_pages_cover_ordering_without_duplicates(self):
+        expected = [str(review.id) for review in Review.objects.order_by('-creation_date', '-id')]
+        items, pages = self.collect(reverse('reviews-list') + '?page_size=4')
+        self.assertEqual([item['id'] for item in items], expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_walks_back(self):
+        first = self.client.get(reverse('reviews-list') + '?page_size=4').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_deep_page_query_count(self):
+        url = reverse('reviews-list') + '?page_size=2'
+        for _ in range(4):
+            url = self.client.get(url).data['next']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        page_queries = [query for query in queries if 'api_product_review' in query['sql']]
+        self.assertEqual(len(page_queries), 1)
+        self.assertNotIn('OFFSET', page_queries[0]['sql'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('reviews-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_application_ordering(self):
+        start = timezone.localdate() + datetime.timedelta(days=1)
+        Application.objects.bulk_create([
+            Application(name='John', surname=f'Doe {i}', phone_number='+375291234567',
+                        start_date=start + datetime.timedelta(days=i % 2), course=self.course)
+            for i in range(5)
+        ])
+        expected = [str(application.id) for application in Application.objects.order_by('start_date', 'id')]
+        items, _ = self.collect(reverse('applications-list') + '?page_size=2')
+        self.assertEqual([item['id'] for item in items], expected)
+
+    def test_null_values_in_the_ordering(self):
+        Discount.objects.bulk_create([
+            Discount(percent=percent, description='Discount')
+            for percent in (None, 10, None, 5, 10, None, 20)
+        ])
+        # SQLite puts NULLs last in a descending order
+        expected = [str(discount.id) for discount in Discount.objects.order_by('-percent', '-id')]
+        self.assertEqual(Discount.objects.get(id=expected[-1]).percent, None)
+
+        items, pages = self.collect(reverse('discounts-list') + '?page_size=2')
+        self.assertEqual([item['id'] for item in items], expected)
+        self.assertEqual(pages, 4)
+
+        last = self.client.get(reverse('discounts-list') + '?page_size=3').data
+        while last['next']:
+            last = self.client.get(last['next']).data
+        # the cursor of the previous link is on a NULL
+        items, _ = self.collect(last['previous'], key='previous')
+        self.assertEqual([item['id'] for item in items], expected[3:6] + expected[:3])
@@ -0,0 +1,67 @@
+import uuid
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import Course, CourseCategory, Discount
+from ..pricing import apply_discount
+
+
+class PriceQuoteTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = CourseCategory.objects.create(name='Programming')
+        self.python = Course.objects.create(name='Python', course_category=category,
+                                            price_for_one=100, price_for_many=80)
+        self.java = Course.objects.create(name='Java', course_category=category,
+                                          price_for_one=99, price_for_many=120)
+        self.discount = Discount.objects.create(percent=15, description='Spring')
+
+    def quote(self, items):
+        return self.client.post(reverse('courses-quote'), {'items': items}, format='json')
+
+    def test_apply_discount(self):
+        self.assertEqual(apply_discount(99, 15), Decimal('84.15'))
+        self.assertEqual(apply_discount(3, 50), Decimal('1.50'))
+        self.assertEqual(apply_discount(1, 33), Decimal('0.67'))
+        self.assertEqual(apply_discount(80, None), Decimal('80.00'))
+
+    def test_quote(self):
+        with self.assertNumQueries(2):
+            response = self.quote([
+                {'course': str(self.python.id), 'group_size': 1},
+                {'course': str(self.python.id), 'group_size': 3, 'discount': str(self.discount.id)},
+                {'course': str(self.java.id), 'group_size': 1, 'discount': str(self.discount.id)},
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item['unit_price'], item['discount_percent'], item['final_unit_price'], item['total'])
+             for item in response.data['items']],
+            [(100, 0, '100.00', '100.00'), (80, 15, '68.00', '204.00'), (99, 15, '84.15', '84.15')],
+        )
+        self.assertIsNone(response.data['items'][0]['discount'])
+
+    def test_unknown_ids(self):
+        response = self.quote([
+            {'course': str(self.python.id), 'group_size': 1},
+            {'course': str(uuid.uuid4()), 'group_size': 1, 'discount': str(uuid.uuid4())},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['items'][0], {})
+        self.assertEqual(set(response.data['items'][1]), {'course', 'discount'})
+
+    def test_invalid_request(self):
+        self.assertEqual(self.quote([]).status_code, 400)
+        response = self.quote([{'course': str(self.python.id), 'group_size': 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('group_size', response.data['items'][0])
+
+    def test_best_price_in_the_listing(self):
+        def best_prices():
+            response = self.client.get(reverse('courses-list'), {'fields': 'name,best_price'})
+            return {course['name']: course['best_price'] for course in response.data}
+
+        self.assertEqual(best_prices(), {'Python': '68.00', 'Java': '84.15'})
+        Discount.objects.create(percent=50, description='Black Friday')
+        self.assertEqual(best_prices(), {'Python': '40.00', 'Java': '49.50'})
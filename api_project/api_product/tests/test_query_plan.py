@@ -0,0 +1,122 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api_authentication.models import User
+from ..cache import bump_model_version
+from ..models import CourseCategory, Course, TeacherInfo
+from ..query_plan import plan_queryset
+from ..serializers import CourseSerializer
+
+
+class PlanQuerysetTest(APITestCase):
+    def test_course_serializer_plan(self):
+        queryset = plan_queryset(Course.objects.all(), CourseSerializer())
+        self.assertEqual(queryset.query.select_related, {'course_category': {}})
+        lookups = [lookup.prefetch_through for lookup in queryset._prefetch_related_lookups]
+        self.assertEqual(lookups, ['teachers', 'students'])
+
+
+class CourseListQueryBudgetTest(APITestCase):
+    # courses + category join, teachers, students
+    QUERY_BUDGET = 3
+
+    def setUp(self):
+        self.client = APIClient()
+        self.categories = CourseCategory.objects.bulk_create([
+            CourseCategory(name=f'Category {i}') for i in range(5)
+        ])
+        self.teachers = []
+        for i in range(3):
+            user = User.objects.create(username=f'teacher{i}', role='teacher',
+                                       first_name='Teacher', last_name=str(i))
+            self.teachers.append(TeacherInfo.objects.create(user=user, education='PhD', experience='10 years'))
+        self.students = User.objects.bulk_create([
+            User(username=f'student{i}', role='student', phone_number=f'+375{i:09d}') for i in range(5)
+        ])
+        self.created = 0
+
+    def add_courses(self, count):
+        courses = Course.objects.bulk_create([
+            Course(name=f'Course {self.created + i}', price_for_one=100, price_for_many=80,
+                   course_category=self.categories[i % len(self.categories)])
+            for i in range(count)
+        ])
+        self.created += count
+        Course.teachers.through.objects.bulk_create([
+            Course.teachers.through(course=course, teacherinfo=teacher)
+            for i, course in enumerate(courses)
+            for teacher in self.teachers[:i % len(self.teachers) + 1]
+        ])
+        Course.students.through.objects.bulk_create([
+            Course.students.through(course=course, user=student)
+            for i, course in enumerate(courses)
+            for student in self.students[:i % len(self.students) + 1]
+        ])
+        # bulk_create sends no signals
+        bump_model_version(Course)
+
+    def test_list_query_count_is_constant(self):
+        for total in (10, 100, 1000):
+            self.add_courses(total - self.created)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('courses-list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), total)
+            self.assertEqual(len(queries), self.QUERY_BUDGET, f'{total} courses')
+
+    def test_list_nested_data(self):
+        self.add_courses(3)
+        response = self.client.get(reverse('courses-list'))
+        course = next(item for item in response.data if item['name'] == 'Course 2')
+        self.assertEqual(len(course['teachers']), 3)
+        self.assertEqual(len(course['students']), 3)
+        self.assertEqual({teacher['user'] for teacher in course['teachers']},
+                         {str(teacher.user_id) for teacher in self.teachers})
+        self.assertEqual(course['course_category']['name'], 'Category 2')
+
+
+class CourseFieldSelectionTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        category = CourseCategory.objects.create(name='Programming')
+        teacher = TeacherInfo.objects.create(
+            user=User.objects.create(username='teacher', role='teacher'),
+            education='PhD', experience='10 years'
+        )
+        self.student = User.objects.create(username='student', role='student')
+        self.course = Course.objects.create(name='Python 101', price_for_one=150, price_for_many=120,
+                                            course_category=category)
+        self.course.teachers.add(teacher)
+        self.course.students.add(self.student)
+
+    def get_courses(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('courses-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data, len(queries)
+
+    def test_sparse_fields_skip_relations(self):
+        data, query_count = self.get_courses({'fields': 'name,price_for_one,course_category'})
+        self.assertEqual(set(data[0]), {'name', 'price_for_one', 'course_category'})
+        self.assertEqual(data[0]['course_category']['name'], 'Programming')
+        self.assertEqual(query_count, 1)
+
+    def test_nested_sparse_fields(self):
+        data, query_count = self.get_courses({'fields': 'name,teachers.id,teachers.photo'})
+        self.assertEqual(set(data[0]['teachers'][0]), {'id', 'photo'})
+        self.assertEqual(query_count, 2)
+
+    def test_expand_collapses_other_relations(self):
+        data, query_count = self.get_courses({'expand': 'teachers'})
+        self.assertEqual(data[0]['teachers'][0]['education'], 'PhD')
+        self.assertEqual(data[0]['students'], [self.student.id])
+        self.assertEqual(data[0]['course_category'], self.course.course_category_id)
+        self.assertEqual(query_count, 3)
+
+    def test_expand_nothing(self):
+        data, query_count = self.get_courses({'expand': '', 'fields': 'id,course_category'})
+        self.assertEqual(data[0]['course_category'], self.course.course_category_id)
+        self.assertEqual(query_count, 1)
@@ -0,0 +1,116 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api_authentication.models import User
+from ..cache import get_model_versions
+from ..models import Course, CourseCategory
+from ..replicas import ReplicaRouter
+from ..views import CourseViewSet, SearchViewSet
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        # a SQLite copy of the test database, refreshed with the backup API
+        cls.directory = tempfile.mkdtemp()
+        connections.settings['replica'] = {
+            **connections['default'].settings_dict, 'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.settings['replica']
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.client = APIClient()
+        category = CourseCategory.objects.create(name='Programming')
+        self.course = Course.objects.create(name='Python', price_for_one=100, price_for_many=80,
+                                            course_category=category)
+        self.user = User.objects.create_user(username='student', password='password', role='student',
+                                             first_name='Primary', phone_number='+375290000000')
+        # a missing change version counts as a change made now
+        get_model_versions(CourseViewSet.cache_dependencies)
+        call_command('refresh_replicas', stdout=io.StringIO())
+
+    def on_replica(self, sql):
+        with connections['replica'].cursor() as cursor:
+            cursor.execute(sql)
+
+    def course_name(self, **params):
+        return self.client.get(reverse('courses-detail', args=[self.course.id]), params).data['name']
+
+    def user_name(self):
+        return self.client.get(reverse('users-detail', args=[self.user.id])).data['first_name']
+
+    def test_reads_go_to_the_replica(self):
+        self.on_replica("UPDATE api_product_course SET name = 'Replica'")
+        with CaptureQueriesContext(connections['replica']) as replica_queries, \
+                CaptureQueriesContext(connections['default']) as primary_queries:
+            self.assertEqual(self.course_name(), 'Replica')
+        self.assertTrue(replica_queries.captured_queries)
+        self.assertFalse(primary_queries.captured_queries)
+
+    def test_search_reads_from_the_replica(self):
+        get_model_versions(SearchViewSet.cache_dependencies)
+        call_command('refresh_replicas', stdout=io.StringIO())
+        with CaptureQueriesContext(connections['replica']) as replica_queries, \
+                CaptureQueriesContext(connections['default']) as primary_queries:
+            response = self.client.get(reverse('search-list'), {'q': 'python'})
+        self.assertIn(str(self.course.id), [result['id'] for result in response.data])
+        self.assertTrue(replica_queries.captured_queries)
+        self.assertFalse(primary_queries.captured_queries)
+
+    def test_replica_older_than_the_last_change_is_skipped(self):
+        self.course.name = 'Python 3'
+        self.course.save()
+        self.on_replica("UPDATE api_product_course SET name = 'Replica'")
+        self.assertEqual(self.course_name(), 'Python 3')
+
+        call_command('refresh_replicas', 'replica', stdout=io.StringIO())
+        self.on_replica("UPDATE api_product_course SET name = 'Replica'")
+        # another query string, the first response is cached
+        self.assertEqual(self.course_name(fields='name'), 'Replica')
+
+    def test_client_reads_its_writes(self):
+        self.on_replica("UPDATE api_authentication_user SET first_name = 'Replica'")
+        self.assertEqual(self.user_name(), 'Replica')
+
+        response = self.client.post(reverse('reviews-list'),
+                                    {'author': 'Student', 'course': self.course.id, 'content': 'Great'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.user_name(), 'Primary')
+        # other clients still read from the replica
+        self.assertEqual(APIClient(REMOTE_ADDR='10.0.0.2').get(
+            reverse('users-detail', args=[self.user.id])).data['first_name'], 'Replica')
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_stickiness_expires(self):
+        self.on_replica("UPDATE api_authentication_user SET first_name = 'Replica'")
+        self.client.post(reverse('reviews-list'), {'author': 'Student', 'course': self.course.id, 'content': 'Great'})
+        self.assertEqual(self.user_name(), 'Replica')
+
+    def test_writes_and_migrations_stay_on_the_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Course), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'api_product'))
+        self.assertIsNone(router.allow_migrate('default', 'api_product'))
+
+    def test_unknown_replica(self):
+        with self.assertRaises(CommandError):
+            call_command('refresh_replicas', 'other', stdout=io.StringIO())
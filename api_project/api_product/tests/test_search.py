@@ -0,0 +1,111 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import Article, CourseCategory, Course, FaqCategory, Faq
+from ..search import build_match_expression, search
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.category = CourseCategory.objects.create(name='Programming')
+        self.course = Course.objects.create(name='Python 101', description='Learn variables and loops',
+                                            curriculum='Generators and decorators',
+                                            price_for_one=150, price_for_many=120,
+                                            course_category=self.category)
+        self.article = Article.objects.create(title='Why Python', content='Python is a friendly language')
+        self.faq = Faq.objects.create(question='Do I need a laptop?', answer='Yes, for the Python course',
+                                      faq_category=FaqCategory.objects.create(name='General'))
+
+    def test_match_expression(self):
+        self.assertEqual(build_match_expression('python  loops'), '"python" "loops"*')
+        self.assertEqual(build_match_expression('NOT "x" OR'), '"NOT" "x" "OR"*')
+        self.assertEqual(build_match_expression('python l'), '"python" "l"')
+        self.assertIsNone(build_match_expression('*** ()'))
+        self.assertIsNone(build_match_expression('__'))
+
+    def test_title_matches_rank_first(self):
+        results = search('python')
+        self.assertEqual({result['id'] for result in results}, {self.course.id, self.article.id, self.faq.id})
+        self.assertEqual(results[-1]['type'], 'faq')
+
+    @mock.patch('api_product.search.SEARCH_CANDIDATES', 5)
+    def test_broad_queries_rank_by_relevance_not_recency(self):
+        oldest = Course.objects.create(name='Kotlin', price_for_one=100, price_for_many=80,
+                                       course_category=self.category)
+        for number in range(10):
+            Article.objects.create(title=f'Article {number}', content='Some words about kotlin')
+        results = search('kotlin', limit=3)
+        self.assertEqual(results[0]['id'], oldest.id)
+        self.assertEqual([result['type'] for result in results], ['course', 'article', 'article'])
+        self.assertIn('<mark>kotlin</mark>', results[1]['snippet'])
+        self.assertEqual([result['id'] for result in search('kotlin', kinds=['course'])], [oldest.id])
+
+    def test_snippet_and_prefix(self):
+        [result] = search('decor')
+        self.assertEqual(result['id'], self.course.id)
+        self.assertEqual(result['title'], 'Python 101')
+        self.assertIn('<mark>decorators</mark>', result['snippet'])
+
+    def test_snippet_window(self):
+        Article.objects.create(title='Coffee', content=' '.join(['word'] * 30 + ['Café', 'crème'] + ['word'] * 30))
+        [result] = search('cafe')
+        self.assertEqual(result['snippet'], '…<mark>Café</mark> crème word word word word word word word word word word '
+                                            'word word word word…')
+
+    def test_snippet_is_escaped(self):
+        Article.objects.create(title='Markup', content='Tom & Jerry <script>alert(1)</script> <b>bold</b>')
+        [result] = search('jerry')
+        self.assertEqual(result['snippet'], 'Tom &amp; <mark>Jerry</mark> &lt;script&gt;alert(1)&lt;/script&gt; '
+                                            '&lt;b&gt;bold&lt;/b&gt;')
+
+    def test_filter_by_type(self):
+        self.assertEqual([result['type'] for result in search('python', kinds=['article'])], ['article'])
+
+    def test_save_reindexes(self):
+        self.article.title = 'Why Rust'
+        self.article.content = 'Rust is fast'
+        self.article.save()
+        self.assertEqual(search('rust')[0]['id'], self.article.id)
+        self.assertFalse(search('python', kinds=['article']))
+
+    def test_delete_removes(self):
+        self.course.delete()
+        self.assertFalse(search('decorators'))
+
+    def test_rebuild(self):
+        Course.objects.filter(pk=self.course.pk).update(name='Go 101')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search('go')[0]['id'], self.course.id)
+        self.assertEqual(len(search('python')), 2)
+
+
+class SearchViewTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.article = Article.objects.create(title='Why Python', content='Python is a friendly language')
+
+    def test_search(self):
+        response = self.client.get(reverse('search-list'), {'q': 'friendly'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{
+            'type': 'article',
+            'id': str(self.article.id),
+            'title': 'Why Python',
+            'snippet': 'Python is a <mark>friendly</mark> language',
+        }])
+
+    def test_new_documents_are_found(self):
+        self.client.get(reverse('search-list'), {'q': 'rust'})
+        Article.objects.create(title='Rust', content='Ownership')
+        self.assertEqual(len(self.client.get(reverse('search-list'), {'q': 'rust'}).data), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(reverse('search-list')).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('search-list'), {'q': 'python', 'type': 'user'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -4,6 +4,7 @@ from django.core.files.base import ContentFile
 from django.db import transaction
 from django.db.models.signals import m2m_changed
 from django.test import RequestFactory
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework.exceptions import ValidationError
@@ -92,7 +93,8 @@ class CertificateSerializerTest(APITestCase):
         serializer = CertificateSerializer(instance=self.certificate, context={'request': request})
         data = serializer.data
         self.assertEqual(data['teacher'], str(self.teacher_info.id))
-        self.assertEqual(data['file'], request.build_absolute_uri(self.certificate.file.url))
+        self.assertEqual(data['file'], request.build_absolute_uri(reverse('certificates-download',
+                                                                          args=[self.certificate.id])))
 
     def test_serializer_file_url(self):
         request = self.factory.get('/api/certificates/')
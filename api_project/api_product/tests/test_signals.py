@@ -1,14 +1,16 @@
+import threading
 import uuid
 
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.test import TestCase
-from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
 from django.db.models.signals import m2m_changed
 from django.dispatch import receiver
 from ..models import Course, CourseCategory, Certificate, TeacherInfo
 from api_authentication.models import User
+from utilities.storage import FileDeletionQueue
 
 
 class CourseSignalsTest(TestCase):
@@ -61,6 +63,32 @@ class CourseSignalsTest(TestCase):
         self.course.students.add(self.student_user)
         self.assertIn(self.student_user, self.course.students.all())
 
+    def test_student_validation_is_one_query(self):
+        students = User.objects.bulk_create(
+            User(username=f'student{i}', role='student', phone_number=f'+37529{i:07d}') for i in range(500)
+        )
+        with self.assertNumQueries(1):
+            m2m_changed.send(
+                sender=self.course.students.through,
+                instance=self.course,
+                action='pre_add',
+                pk_set={student.pk for student in students}
+            )
+
+    def test_invalid_students_are_all_reported(self):
+        other_teacher = User.objects.create_user(username='otherteacher', password='complexpassword',
+                                                 role='teacher', phone_number='+375291111111')
+        with self.assertRaisesMessage(ValidationError, 'otherteacher, teacheruser'), transaction.atomic():
+            self.course.students.add(self.student_user, self.teacher_user, other_teacher)
+        self.assertFalse(self.course.students.exists())
+
+    def test_reverse_addition_checks_the_user(self):
+        self.student_user.courses.add(self.course)
+        self.assertIn(self.student_user, self.course.students.all())
+        with self.assertRaisesMessage(ValidationError, 'teacheruser'), transaction.atomic():
+            self.teacher_user.courses.add(self.course)
+        self.assertNotIn(self.teacher_user, self.course.students.all())
+
 
 class CertificateSignalsTest(TestCase):
     def setUp(self):
@@ -81,11 +109,43 @@ class CertificateSignalsTest(TestCase):
             teacher=self.teacher
         )
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
     def test_file_deletion_on_certificate_delete(self):
         file_name = self.certificate.file.name
-        self.certificate.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certificate.delete()
+            self.assertTrue(default_storage.exists(file_name))
         self.assertFalse(default_storage.exists(file_name))
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_file_kept_on_rollback(self):
+        file_name = self.certificate.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.certificate.delete()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertTrue(default_storage.exists(file_name))
+        default_storage.delete(file_name)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_replaced_file_is_deleted(self):
+        old_name = self.certificate.file.name
+        certificate = Certificate.objects.get(pk=self.certificate.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            certificate.file = ContentFile('New content', 'new_cert.pdf')
+            certificate.save()
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertTrue(default_storage.exists(certificate.file.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            certificate.teacher = self.teacher
+            certificate.save()
+        self.assertTrue(default_storage.exists(certificate.file.name))
+        certificate.delete()
+        default_storage.delete(certificate.file.name)
+
     def test_file_exists_before_deletion(self):
         file_name = self.certificate.file.name
         self.assertTrue(default_storage.exists(file_name))
@@ -98,3 +158,24 @@ class CertificateSignalsTest(TestCase):
         self.assertIsNone(certificate_no_file.file.name if certificate_no_file.file else None)
         certificate_no_file.delete()
         self.assertIsNone(certificate_no_file.file.name if certificate_no_file.file else None)
+
+
+class FileDeletionQueueTest(TestCase):
+    def test_worker_deletes_in_batches(self):
+        names = [default_storage.save(f'certificates/queued_{i}.pdf', ContentFile('content')) for i in range(5)]
+        deleted = threading.Event()
+        batches = []
+        deletion_queue = FileDeletionQueue()
+        delete_batch = deletion_queue.delete_batch
+
+        def record_batch(batch):
+            delete_batch(batch)
+            batches.append(batch)
+            deleted.set()
+
+        deletion_queue.delete_batch = record_batch
+        with override_settings(MEDIA_DELETE_BATCH_DELAY=0.2):
+            deletion_queue.put(default_storage, names)
+            self.assertTrue(deleted.wait(5))
+        self.assertEqual(len(batches), 1)
+        self.assertFalse(any(default_storage.exists(name) for name in names))
@@ -0,0 +1,53 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from utilities.sqlite_backend.base import DatabaseWrapper
+
+
+class SqlitePragmasTest(TestCase):
+    def open_connection(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory.name, 'db.sqlite3')},
+                                 alias='pragmas')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connections_are_configured(self):
+        wrapper = self.open_connection()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -20000)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 250})
+    def test_pragmas_come_from_the_settings(self):
+        wrapper = self.open_connection()
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 250)
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'wal; DROP TABLE api_product_course'})
+    def test_invalid_pragma(self):
+        with self.assertRaises(ValueError):
+            self.open_connection()
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        wrapper = self.open_connection()
+        # what atomic() runs to open a transaction
+        wrapper._start_transaction_under_autocommit()
+        self.addCleanup(wrapper.connection.rollback)
+        other = sqlite3.connect(wrapper.settings_dict['NAME'], timeout=0)
+        self.addCleanup(other.close)
+        with self.assertRaises(sqlite3.OperationalError):
+            other.execute('BEGIN IMMEDIATE')
@@ -0,0 +1,67 @@
+import io
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from ..models import Course, CourseCategory, CourseCategoryStats
+from ..stats import compute_stats
+
+
+class CourseCategoryStatsTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.programming = CourseCategory.objects.create(name='Programming')
+        self.languages = CourseCategory.objects.create(name='Languages')
+        self.python = self.create_course('Python', self.programming, 100, 80, 40)
+        self.java = self.create_course('Java', self.programming, 150, 120, 60)
+
+    def create_course(self, name, category, price_for_one, price_for_many, study_hours):
+        return Course.objects.create(name=name, course_category=category, price_for_one=price_for_one,
+                                     price_for_many=price_for_many, study_hours=study_hours)
+
+    def stats(self):
+        response = self.client.get(reverse('course-categories-stats'))
+        self.assertEqual(response.status_code, 200)
+        return {row['name']: row for row in response.data}
+
+    def test_stats(self):
+        with self.assertNumQueries(1):
+            stats = self.stats()
+        self.assertEqual(stats['Programming'], {
+            'id': str(self.programming.id), 'name': 'Programming', 'course_count': 2,
+            'min_price_for_one': 100, 'max_price_for_one': 150,
+            'min_price_for_many': 80, 'max_price_for_many': 120, 'study_hours': 100,
+        })
+        self.assertEqual(stats['Languages']['course_count'], 0)
+        self.assertIsNone(stats['Languages']['min_price_for_one'])
+
+    def test_course_changes_update_the_stats(self):
+        self.stats()
+        self.java.price_for_one = 90
+        self.java.save()
+        self.assertEqual(self.stats()['Programming']['min_price_for_one'], 90)
+
+        self.java.course_category = self.languages
+        self.java.save()
+        stats = self.stats()
+        self.assertEqual((stats['Programming']['course_count'], stats['Languages']['course_count']), (1, 1))
+
+        self.python.delete()
+        self.assertEqual(self.stats()['Programming']['course_count'], 0)
+
+    def test_deleting_a_category_with_courses(self):
+        self.programming.delete()
+        self.assertEqual(list(self.stats()), ['Languages'])
+        self.assertFalse(CourseCategoryStats.objects.filter(category_id=self.programming.id).exists())
+
+    def test_rebuild(self):
+        CourseCategoryStats.objects.all().delete()
+        Course.objects.filter(pk=self.java.pk).update(study_hours=10)
+        with self.assertNumQueries(1):
+            compute_stats(CourseCategory.objects.all())
+
+        stdout = io.StringIO()
+        call_command('rebuild_category_stats', stdout=stdout)
+        self.assertIn('Rebuilt the statistics of 2 categories', stdout.getvalue())
+        self.assertEqual(self.stats()['Programming']['study_hours'], 50)
@@ -0,0 +1,118 @@
+import threading
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
+
+from utilities.throttling import TokenBucketThrottle, parse_rate
+from ..models import Course, CourseCategory, Review
+
+NOW = 1_700_000_000.0
+
+
+@override_settings(THROTTLE_RATES={'reviews.write': '3/min', 'reviews.read': '100/min'})
+class TokenBucketThrottleTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.course = Course.objects.create(name='Python', price_for_one=100, price_for_many=80,
+                                            course_category=CourseCategory.objects.create(name='Programming'))
+        time_patch = mock.patch('utilities.throttling.time')
+        self.time = time_patch.start()
+        self.time.time.return_value = NOW
+        self.addCleanup(time_patch.stop)
+
+    def review(self, address='10.0.0.1', **headers):
+        return self.client.post(reverse('reviews-list'),
+                                {'author': 'Student', 'course': str(self.course.id), 'content': 'Great'},
+                                format='json', REMOTE_ADDR=address, **headers)
+
+    def test_burst_then_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.review().status_code, status.HTTP_201_CREATED)
+        response = self.review()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # one token every 20 seconds
+        self.assertEqual(response['Retry-After'], '20')
+
+        self.time.time.return_value = NOW + 15
+        self.assertEqual(self.review()['Retry-After'], '5')
+        self.time.time.return_value = NOW + 20
+        self.assertEqual(self.review().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.review().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Review.objects.count(), 4)
+
+    def test_bucket_refills(self):
+        for _ in range(3):
+            self.review()
+        self.time.time.return_value = NOW + 60
+        for _ in range(3):
+            self.assertEqual(self.review().status_code, status.HTTP_201_CREATED)
+
+    def test_buckets_per_client_and_scope(self):
+        for _ in range(4):
+            self.review()
+        self.assertEqual(self.review('10.0.0.2').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get(reverse('reviews-list'), REMOTE_ADDR='10.0.0.1').status_code,
+                         status.HTTP_200_OK)
+
+    def test_spoofed_forwarded_for_does_not_reset_the_bucket(self):
+        for _ in range(3):
+            self.review(HTTP_X_FORWARDED_FOR='1.1.1.1, 10.0.0.1')
+        response = self.review(HTTP_X_FORWARDED_FOR='2.2.2.2, 10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.review(HTTP_X_FORWARDED_FOR='10.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # the entry added by the router is the client
+        response = self.review(HTTP_X_FORWARDED_FOR='1.1.1.1, 10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_scope_without_rate_is_not_throttled(self):
+        for _ in range(5):
+            response = self.client.get(reverse('applications-list'), REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/min'), (30, 60))
+        self.assertEqual(parse_rate('1000/day'), (1000, 86400))
+
+
+class View:
+    throttle_scope = 'reviews'
+
+
+class ConcurrentThrottleTest(SimpleTestCase):
+    def run_together(self, target, count=8):
+        barrier = threading.Barrier(count)
+
+        def run():
+            barrier.wait()
+            target()
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    @override_settings(THROTTLE_RATES={'reviews.write': '3/min'})
+    def test_parallel_requests_take_at_most_the_bucket(self):
+        request = APIRequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        allowed = []
+        with mock.patch('utilities.throttling.time') as time:
+            time.time.return_value = NOW
+            self.run_together(lambda: allowed.append(TokenBucketThrottle().allow_request(request, View())))
+        self.assertEqual(sorted(allowed), [False] * 5 + [True] * 3)
+
+    def test_incr_is_atomic(self):
+        cache = caches['default']
+        cache.set('counter', 0)
+
+        def count():
+            for _ in range(25):
+                cache.incr('counter')
+
+        self.run_together(count)
+        self.assertEqual(cache.get('counter'), 200)
@@ -0,0 +1,209 @@
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api_authentication.models import User
+from api_authentication.tokens import obtain_token_pair
+from ..models import Certificate, TeacherInfo, UploadSession
+from ..uploads import ChunkError, claim_parts, part_path, release_parts, write_chunk
+
+
+class UploadSessionTest(APITestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=os.path.join(self.temp_dir, 'media'),
+            UPLOAD_SESSION_DIR=os.path.join(self.temp_dir, 'uploads'),
+        )
+        self.settings_override.enable()
+
+        self.client = APIClient()
+        self.teacher_user = User.objects.create_user(username='teacher', password='password', role='teacher')
+        self.teacher = TeacherInfo.objects.create(user=self.teacher_user, education='PhD', experience='10 years')
+        self.authorize(self.teacher_user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def authorize(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {obtain_token_pair(user)['access']}")
+
+    def start(self, content, target='certificate', filename='scan.pdf'):
+        response = self.client.post(reverse('uploads-list'),
+                                    {'target': target, 'filename': filename, 'size': len(content)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def put_chunk(self, session_id, content, start, total):
+        return self.client.put(
+            reverse('uploads-detail', args=[session_id]), content, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(content) - 1}/{total}'
+        )
+
+    def upload(self, content, chunk_size=4, **kwargs):
+        session_id = self.start(content, **kwargs)
+        for start in range(0, len(content), chunk_size):
+            response = self.put_chunk(session_id, content[start:start + chunk_size], start, len(content))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return session_id
+
+    def finalize(self, session_id, teacher=None):
+        return self.client.post(reverse('uploads-finalize', args=[session_id]),
+                                {'teacher': str((teacher or self.teacher).id)}, format='json')
+
+    def test_chunks_are_assembled_into_a_certificate(self):
+        session_id = self.upload(b'0123456789')
+        self.assertEqual(self.client.get(reverse('uploads-detail', args=[session_id])).data['received'], 10)
+
+        response = self.finalize(session_id)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        certificate = Certificate.objects.get(id=response.data['id'])
+        self.assertEqual(certificate.teacher, self.teacher)
+        with certificate.file.open('rb') as file:
+            self.assertEqual(file.read(), b'0123456789')
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir, 'uploads')), [])
+
+    def test_teacher_photo(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (50, 50), 'orange').save(buffer, 'PNG')
+        session_id = self.upload(buffer.getvalue(), chunk_size=64, target='teacher_photo', filename='me.png')
+        response = self.finalize(session_id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.teacher.refresh_from_db()
+        self.assertTrue(self.teacher.photo.name.startswith('teachers/me'))
+
+    def test_invalid_photo(self):
+        session_id = self.upload(b'not an image', target='teacher_photo', filename='me.png')
+        self.assertEqual(self.finalize(session_id).status_code, status.HTTP_400_BAD_REQUEST)
+        # the parts are given back to the session
+        self.assertEqual(self.finalize(session_id).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrent_finalize(self):
+        session_id = self.upload(b'0123456789')
+        session = UploadSession.objects.get(id=session_id)
+        # another finalize of the session is in flight
+        self.assertTrue(claim_parts(session))
+        self.assertEqual(self.finalize(session_id).status_code, status.HTTP_409_CONFLICT)
+        release_parts(session)
+        self.assertEqual(self.finalize(session_id).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.finalize(session_id).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_students_cannot_upload(self):
+        self.authorize(User.objects.create_user(username='student', password='password', role='student',
+                                                phone_number='+375291111111'))
+        response = self.client.post(reverse('uploads-list'),
+                                    {'target': 'certificate', 'filename': 'scan.pdf', 'size': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(UploadSession.objects.exists())
+
+    @override_settings(UPLOAD_MAX_OPEN_SESSIONS=2, UPLOAD_MAX_OPEN_BYTES=25)
+    def test_open_uploads_are_capped(self):
+        def start(size):
+            return self.client.post(reverse('uploads-list'),
+                                    {'target': 'certificate', 'filename': 'scan.pdf', 'size': size}, format='json')
+
+        first = start(10).data['id']
+        self.assertEqual(start(16).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(start(15).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(start(1).status_code, status.HTTP_409_CONFLICT)
+        self.client.delete(reverse('uploads-detail', args=[first]))
+        self.assertEqual(start(1).status_code, status.HTTP_201_CREATED)
+
+    def test_chunks_extend_the_session(self):
+        session_id = self.start(b'0123456789')
+        UploadSession.objects.filter(id=session_id).update(expires_at=timezone.now() + datetime.timedelta(minutes=1))
+        self.put_chunk(session_id, b'0123', 0, 10)
+        self.assertGreater(UploadSession.objects.get(id=session_id).expires_at,
+                           timezone.now() + datetime.timedelta(hours=23))
+
+    def test_expired_sessions_are_discarded(self):
+        session_id = self.start(b'0123456789')
+        self.put_chunk(session_id, b'0123', 0, 10)
+        session = UploadSession.objects.get(id=session_id)
+        UploadSession.objects.filter(id=session_id).update(expires_at=timezone.now())
+        self.assertEqual(self.client.get(reverse('uploads-detail', args=[session_id])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        # a part file of no session, left by a process that stopped
+        orphan = os.path.join(self.temp_dir, 'uploads', f'{"0" * 32}.finalizing')
+        open(orphan, 'wb').close()
+        os.utime(orphan, (time.time() - 2 * 3600,) * 2)
+        recent = os.path.join(self.temp_dir, 'uploads', f'{"1" * 32}.part')
+        open(recent, 'wb').close()
+
+        stdout = io.StringIO()
+        call_command('discard_expired_uploads', stdout=stdout)
+        self.assertIn('Deleted 1 expired upload sessions, 1 part files', stdout.getvalue())
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir, 'uploads')), [os.path.basename(recent)])
+        self.assertFalse(os.path.exists(part_path(session)))
+
+    def test_chunks_must_be_in_order(self):
+        session_id = self.start(b'0123456789')
+        self.put_chunk(session_id, b'0123', 0, 10)
+        response = self.put_chunk(session_id, b'89', 8, 10)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['received'], 4)
+        # a retried chunk is rejected as well, the client resumes from received
+        self.assertEqual(self.put_chunk(session_id, b'0123', 0, 10).status_code, status.HTTP_409_CONFLICT)
+
+    def test_invalid_chunks(self):
+        session_id = self.start(b'0123456789')
+        url = reverse('uploads-detail', args=[session_id])
+        response = self.client.put(url, b'0123', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.put_chunk(session_id, b'0123', 0, 11).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(url, b'01', content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE='bytes 0-3/10')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(UPLOAD_CHUNK_MAX_SIZE=2):
+            response = self.put_chunk(session_id, b'0123', 0, 10)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_interrupted_chunk_is_retried(self):
+        session_id = self.start(b'0123456789')
+        session = UploadSession.objects.get(id=session_id)
+        with self.assertRaises(ChunkError):
+            write_chunk(session, io.BytesIO(b'01'), 0, 4)
+        self.assertEqual(self.put_chunk(session_id, b'0123', 0, 10).status_code, status.HTTP_200_OK)
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        session_id = self.start(b'0123456789')
+        self.put_chunk(session_id, b'0123', 0, 10)
+        self.assertEqual(self.finalize(session_id).status_code, status.HTTP_409_CONFLICT)
+
+    def test_other_teacher_cannot_finalize_into_foreign_profile(self):
+        other_user = User.objects.create_user(username='other', password='password', role='teacher',
+                                              phone_number='+375291111111')
+        self.authorize(other_user)
+        session_id = self.upload(b'0123456789')
+        self.assertEqual(self.finalize(session_id).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sessions_are_private(self):
+        session_id = self.start(b'0123456789')
+        other_user = User.objects.create_user(username='other', password='password', role='teacher',
+                                              phone_number='+375291111111')
+        self.authorize(other_user)
+        response = self.client.get(reverse('uploads-detail', args=[session_id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_discard(self):
+        session_id = self.start(b'0123456789')
+        self.put_chunk(session_id, b'0123', 0, 10)
+        path = part_path(UploadSession.objects.get(id=session_id))
+        self.assertTrue(os.path.exists(path))
+        response = self.client.delete(reverse('uploads-detail', args=[session_id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
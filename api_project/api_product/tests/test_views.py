@@ -33,6 +33,11 @@ class TeacherInfoViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
 
+    def test_list_teacherinfo_sparse_fields(self):
+        response = self.client.get(reverse('teacher-info-list'), {'fields': 'id,photo'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0], {'id': str(self.teacher.id), 'photo': None})
+
     def test_retrieve_teacherinfo(self):
         response = self.client.get(reverse('teacher-info-detail', args=[self.teacher.id]))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -48,6 +53,19 @@ class TeacherInfoViewSetTest(APITestCase):
         self.teacher.refresh_from_db()
         self.assertEqual(self.teacher.education, 'Master')
 
+    def test_update_teacherinfo_ignores_sparse_fields(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('teacher-info-detail', args=[self.teacher.id]) + '?fields=id'
+        response = self.client.put(url, {'education': 'Master'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('experience', response.data)
+
+        response = self.client.put(url, {'education': 'Master', 'experience': '12 years'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['education'], 'Master')
+        self.teacher.refresh_from_db()
+        self.assertEqual(self.teacher.education, 'Master')
+
     def test_partial_update_teacherinfo(self):
         self.client.force_authenticate(user=self.user)
         response = self.client.patch(reverse('teacher-info-detail', args=[self.teacher.id]), {'experience': '15 years'})
@@ -367,8 +385,10 @@ class ApplicationViewSetTest(APITestCase):
         response = self.client.get(reverse('applications-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data[0]['name'], self.application1.name)
-        self.assertEqual(response.data[1]['name'], self.application2.name)
+        # applications of the same day are listed by id
+        first, second = sorted([self.application1, self.application2], key=lambda application: application.id)
+        self.assertEqual(response.data[0]['name'], first.name)
+        self.assertEqual(response.data[1]['name'], second.name)
 
     def test_retrieve_application(self):
         response = self.client.get(reverse('applications-detail', args=[self.application1.id]))
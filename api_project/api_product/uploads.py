@@ -0,0 +1,174 @@
+import datetime
+import os
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import UploadSession
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+PART_SUFFIXES = ('.part', '.finalizing')
+
+
+class ChunkError(Exception):
+    pass
+
+
+class AssembledFile(File):
+    """
+    An assembled upload. ``FileSystemStorage`` moves it into place instead
+    of copying it, like a ``TemporaryUploadedFile``.
+    """
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def upload_session_dir():
+    return getattr(settings, 'UPLOAD_SESSION_DIR', os.path.join(settings.BASE_DIR, 'uploads'))
+
+
+def upload_max_size():
+    return getattr(settings, 'UPLOAD_MAX_SIZE', 100 * 1024 * 1024)
+
+
+def chunk_max_size():
+    return getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+
+
+def upload_max_open_sessions():
+    return getattr(settings, 'UPLOAD_MAX_OPEN_SESSIONS', 5)
+
+
+def upload_max_open_bytes():
+    return getattr(settings, 'UPLOAD_MAX_OPEN_BYTES', 2 * upload_max_size())
+
+
+def session_expires_at():
+    return timezone.now() + datetime.timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TIMEOUT', 24 * 60 * 60))
+
+
+def part_path(session):
+    return os.path.join(upload_session_dir(), f'{session.pk.hex}.part')
+
+
+def claimed_path(session):
+    return os.path.join(upload_session_dir(), f'{session.pk.hex}.finalizing')
+
+
+def parse_content_range(header):
+    """
+    Returns ``(start, end, total)`` of a ``Content-Range: bytes a-b/n``
+    header. Raises ``ChunkError``.
+    """
+    match = CONTENT_RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        raise ChunkError('Content-Range header of the form "bytes start-end/size" is required.')
+    start, end, total = (int(value) for value in match.groups())
+    if end < start:
+        raise ChunkError('Content-Range end is before its start.')
+    return start, end, total
+
+
+def write_chunk(session, stream, start, length):
+    """
+    Copies ``length`` bytes of the request body to ``start`` in the part
+    file, a buffer at a time. Raises ``ChunkError`` when the body ends
+    early, the part file then keeps the bytes past ``session.received``
+    and the client retries the chunk.
+    """
+    os.makedirs(upload_session_dir(), exist_ok=True)
+    path = part_path(session)
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as part:
+        part.seek(start)
+        remaining = length
+        while remaining > 0:
+            buffer = stream.read(min(COPY_BUFFER_SIZE, remaining)) if stream is not None else b''
+            if not buffer:
+                raise ChunkError('Request body is shorter than the Content-Range.')
+            part.write(buffer)
+            remaining -= len(buffer)
+
+
+def claim_parts(session):
+    """
+    Moves the part file aside for one finalize. Returns False when a
+    concurrent finalize already claimed it.
+    """
+    try:
+        os.rename(part_path(session), claimed_path(session))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def release_parts(session):
+    """
+    Gives a claimed part file back to the session after a failed finalize.
+    """
+    try:
+        os.rename(claimed_path(session), part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def open_assembled_file(session):
+    path = claimed_path(session)
+    # bytes past the last accepted chunk belong to an interrupted request
+    os.truncate(path, session.size)
+    return AssembledFile(open(path, 'rb'), name=session.filename)
+
+
+def discard_parts(session):
+    for path in (part_path(session), claimed_path(session)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def discard_expired_sessions(min_age=60 * 60):
+    """
+    Deletes the expired upload sessions with their part files, and the part
+    files of no session last modified at least ``min_age`` seconds ago,
+    left behind by a process that stopped halfway. Returns the number of
+    sessions and of part files deleted.
+    """
+    expired = list(UploadSession.objects.filter(expires_at__lte=timezone.now()).only('pk'))
+    for session in expired:
+        discard_parts(session)
+    UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+
+    try:
+        names = os.listdir(upload_session_dir())
+    except FileNotFoundError:
+        names = []
+    parts = {}
+    for name in names:
+        stem, suffix = os.path.splitext(name)
+        if suffix not in PART_SUFFIXES:
+            continue
+        try:
+            parts.setdefault(uuid.UUID(hex=stem), []).append(name)
+        except ValueError:
+            continue
+    alive = set(UploadSession.objects.filter(pk__in=parts).values_list('pk', flat=True))
+    deleted = 0
+    for session_id, session_names in parts.items():
+        if session_id in alive:
+            continue
+        for name in session_names:
+            path = os.path.join(upload_session_dir(), name)
+            try:
+                if os.path.getmtime(path) <= time.time() - min_age:
+                    os.remove(path)
+                    deleted += 1
+            except FileNotFoundError:
+                pass
+    return len(expired), deleted
@@ -12,5 +12,7 @@ router.register('reviews', views.ReviewViewSet, basename='reviews')
 router.register('faq-categories', views.FaqCategoryViewSet, basename='faq-categories')
 router.register('faqs', views.FaqViewSet, basename='faqs')
 router.register('applications', views.ApplicationViewSet, basename='applications')
+router.register('search', views.SearchViewSet, basename='search')
+router.register('uploads', views.UploadSessionViewSet, basename='uploads')
 
 urlpatterns = router.urls
@@ -1,22 +1,72 @@
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.urls import reverse
+from django.utils import timezone
 from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
+from PIL import Image
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from api_authentication.permissions import IsAdminOrOwnerTeacher
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from api_authentication.permissions import IsAdminOrOwnerTeacher, IsAdminOrTeacher
+from api_authentication.authentication import ClaimsJWTAuthentication
+from api_authentication.models import User
+from utilities.downloads import PassthroughRenderer, file_download_response
+from utilities.pagination import KeysetPagination
+from utilities.throttling import TokenBucketThrottle
+from .cache import cache_response, conditional_response
+from .idempotency import IDEMPOTENCY_HEADER, idempotent_response
+from .intake import application_status
+from .pricing import QuoteError, quote, with_best_discount
+from .query_plan import plan_queryset
+from .replicas import ReplicaReadMixin
+from .search import search
+from .uploads import (ChunkError, chunk_max_size, claim_parts, discard_parts, open_assembled_file,
+                      parse_content_range, release_parts, session_expires_at, upload_max_open_bytes,
+                      upload_max_open_sessions, write_chunk)
 from .models import (TeacherInfo, Certificate, Article, CourseCategory, Course,
-                     Discount, Review, FaqCategory, Faq, Application)
+                     Discount, Review, FaqCategory, Faq, Application, UploadSession,
+                     CourseCategoryStats)
 from .serializers import (TeacherInfoSerializer, CertificateSerializer, ArticleSerializer,
-                          CourseCategorySerializer, CourseSerializer, DiscountSerializer,
-                          ReviewSerializer, FaqCategorySerializer, FaqSerializer, ApplicationSerializer)
+                          CourseCategorySerializer, CourseCategoryStatsSerializer, CourseSerializer,
+                          DiscountSerializer, ReviewSerializer, FaqCategorySerializer, FaqSerializer, ApplicationSerializer,
+                          ApplicationIntakeSerializer, PriceQuoteRequestSerializer, PriceQuoteSerializer,
+                          SearchQuerySerializer, SearchResultSerializer,
+                          UploadSessionSerializer, UploadFinalizeSerializer)
+
+fields_parameter = openapi.Parameter(
+    'fields',
+    openapi.IN_QUERY,
+    description='Comma-separated fields to render, dotted names select fields of nested objects',
+    type=openapi.TYPE_STRING,
+)
+expand_parameter = openapi.Parameter(
+    'expand',
+    openapi.IN_QUERY,
+    description='Comma-separated relations to inline, other relations are rendered as ids',
+    type=openapi.TYPE_STRING,
+)
+idempotency_key_parameter = openapi.Parameter(
+    IDEMPOTENCY_HEADER,
+    openapi.IN_HEADER,
+    description='Unique key of this submission, a retry with the same key gets the first response back',
+    type=openapi.TYPE_STRING,
+    required=False,
+)
 
 
-class TeacherInfoViewSet(viewsets.GenericViewSet):
-    authentication_classes=[JWTAuthentication]
+class TeacherInfoViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    authentication_classes=[ClaimsJWTAuthentication]
     queryset = TeacherInfo.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (TeacherInfo,)
     parser_classes = (MultiPartParser, FormParser)
     
     def get_permissions(self):
@@ -31,9 +81,15 @@ class TeacherInfoViewSet(viewsets.GenericViewSet):
         responses={
             200: TeacherInfoSerializer(many=True)
         },
+        manual_parameters=[fields_parameter],
     )
+    @conditional_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = TeacherInfoSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
         serializer = TeacherInfoSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -43,7 +99,9 @@ class TeacherInfoViewSet(viewsets.GenericViewSet):
             200: TeacherInfoSerializer(),
             404: 'Not found',
         },
+        manual_parameters=[fields_parameter],
     )
+    @conditional_response
     def retrieve(self, request, pk=None):
         teacher_info = self.get_object()
         serializer = TeacherInfoSerializer(teacher_info, context={'request': request})
@@ -92,13 +150,15 @@ class TeacherInfoViewSet(viewsets.GenericViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
 
-class CertificateViewSet(viewsets.GenericViewSet):
-    authentication_classes=[JWTAuthentication]
+class CertificateViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    authentication_classes=[ClaimsJWTAuthentication]
     queryset = Certificate.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (Certificate,)
     parser_classes = (MultiPartParser, FormParser)
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'download']:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAdminOrOwnerTeacher]
@@ -110,8 +170,13 @@ class CertificateViewSet(viewsets.GenericViewSet):
             200: CertificateSerializer(many=True)
         },
     )
+    @conditional_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = CertificateSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
         serializer = CertificateSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -122,10 +187,28 @@ class CertificateViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @conditional_response
     def retrieve(self, request, pk=None):
         certificate = self.get_object()
         serializer = CertificateSerializer(certificate, context={'request': request})
         return Response(serializer.data)
+
+    @swagger_auto_schema(
+        tags=['Certificates'],
+        responses={
+            200: 'Certificate file',
+            206: 'Requested byte range of the certificate file',
+            304: 'Not modified',
+            404: 'Not found',
+            416: 'Range not satisfiable',
+        },
+    )
+    @action(detail=True, methods=['get'], renderer_classes=[PassthroughRenderer])
+    def download(self, request, pk=None):
+        certificate = self.get_object()
+        if not certificate.file:
+            raise NotFound('Certificate has no file.')
+        return file_download_response(request, certificate.file)
     
     @swagger_auto_schema(
         tags=['Certificates'],
@@ -139,7 +222,9 @@ class CertificateViewSet(viewsets.GenericViewSet):
             401: 'Unauthorized',
             403: 'Forbidden',
         },
+        manual_parameters=[idempotency_key_parameter],
     )
+    @idempotent_response
     def create(self, request, *args, **kwargs):
         serializer = CertificateSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
@@ -169,10 +254,12 @@ class CertificateViewSet(viewsets.GenericViewSet):
             return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
 
-class ArticleViewSet(viewsets.GenericViewSet):
+class ArticleViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]  
     queryset = Article.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (Article,)
     
     @swagger_auto_schema(
         tags=['Articles'],
@@ -180,8 +267,13 @@ class ArticleViewSet(viewsets.GenericViewSet):
             200: ArticleSerializer(many=True)
         },
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ArticleSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
         serializer = ArticleSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -192,16 +284,24 @@ class ArticleViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @cache_response
     def retrieve(self, request, pk=None):
         article = self.get_object()
         serializer = ArticleSerializer(article, context={'request': request})
         return Response(serializer.data)
 
 
-class CourseCategoryViewSet(viewsets.GenericViewSet):
+class CourseCategoryViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]
     queryset = CourseCategory.objects.all()
+    pagination_class = KeysetPagination
+
+    @property
+    def cache_dependencies(self):
+        if self.action == 'stats':
+            return (CourseCategory, CourseCategoryStats)
+        return (CourseCategory,)
     
     @swagger_auto_schema(
         tags=['CourseCategories'],
@@ -209,9 +309,14 @@ class CourseCategoryViewSet(viewsets.GenericViewSet):
             200: CourseCategorySerializer(many=True)
         },
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = CourseCategorySerializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = CourseCategorySerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = CourseCategorySerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -221,16 +326,32 @@ class CourseCategoryViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @cache_response
     def retrieve(self, request, pk=None):
         course_category = self.get_object()
-        serializer = CourseCategorySerializer(course_category)
+        serializer = CourseCategorySerializer(course_category, context={'request': request})
+        return Response(serializer.data)
+
+    @swagger_auto_schema(
+        tags=['CourseCategories'],
+        responses={
+            200: CourseCategoryStatsSerializer(many=True)
+        },
+    )
+    @action(detail=False, pagination_class=None)
+    @cache_response
+    def stats(self, request):
+        stats = CourseCategoryStats.objects.select_related('category').order_by('-category__name')
+        serializer = CourseCategoryStatsSerializer(stats, many=True)
         return Response(serializer.data)
 
 
-class DiscountViewSet(viewsets.GenericViewSet):
+class DiscountViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]
     queryset = Discount.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (Discount,)
     
     @swagger_auto_schema(
         tags=['Discounts'],
@@ -238,9 +359,14 @@ class DiscountViewSet(viewsets.GenericViewSet):
             200: DiscountSerializer(many=True)
         },
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = DiscountSerializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = DiscountSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = DiscountSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -250,16 +376,21 @@ class DiscountViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @cache_response
     def retrieve(self, request, pk=None):
         discount = self.get_object()
-        serializer = DiscountSerializer(discount)
+        serializer = DiscountSerializer(discount, context={'request': request})
         return Response(serializer.data)
     
     
-class ReviewViewSet(viewsets.GenericViewSet):
+class ReviewViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'reviews'
     queryset = Review.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (Review, Course)
     
     @swagger_auto_schema(
         tags=['Reviews'],
@@ -267,9 +398,14 @@ class ReviewViewSet(viewsets.GenericViewSet):
             200: ReviewSerializer(many=True)
         },
     )
+    @conditional_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = ReviewSerializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ReviewSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = ReviewSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -279,9 +415,10 @@ class ReviewViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @conditional_response
     def retrieve(self, request, pk=None):
         review = self.get_object()
-        serializer = ReviewSerializer(review)
+        serializer = ReviewSerializer(review, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -294,7 +431,9 @@ class ReviewViewSet(viewsets.GenericViewSet):
             ),
             400: 'Bad request',
         },
+        manual_parameters=[idempotency_key_parameter],
     )
+    @idempotent_response
     def create(self, request, *args, **kwargs):
         serializer = ReviewSerializer(data=request.data)
         if serializer.is_valid():
@@ -306,10 +445,12 @@ class ReviewViewSet(viewsets.GenericViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     
-class FaqCategoryViewSet(viewsets.GenericViewSet):
+class FaqCategoryViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]
     queryset = FaqCategory.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (FaqCategory,)
     
     @swagger_auto_schema(
         tags=['FaqCategories'],
@@ -317,9 +458,14 @@ class FaqCategoryViewSet(viewsets.GenericViewSet):
             200: FaqCategorySerializer(many=True)
         },
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = FaqCategorySerializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = FaqCategorySerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = FaqCategorySerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -329,16 +475,22 @@ class FaqCategoryViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @cache_response
     def retrieve(self, request, pk=None):
         faq_category = self.get_object()
-        serializer = FaqCategorySerializer(faq_category)
+        serializer = FaqCategorySerializer(faq_category, context={'request': request})
         return Response(serializer.data)
     
     
-class FaqViewSet(viewsets.GenericViewSet):
+class FaqViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]
     queryset = Faq.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (Faq, FaqCategory)
+
+    def get_queryset(self):
+        return plan_queryset(super().get_queryset(), FaqSerializer(context={'request': self.request}))
     
     @swagger_auto_schema(
         tags=['Faqs'],
@@ -346,9 +498,14 @@ class FaqViewSet(viewsets.GenericViewSet):
             200: FaqSerializer(many=True)
         },
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = FaqSerializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = FaqSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = FaqSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -358,16 +515,21 @@ class FaqViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @cache_response
     def retrieve(self, request, pk=None):
         faq = self.get_object()
-        serializer = FaqSerializer(faq)
+        serializer = FaqSerializer(faq, context={'request': request})
         return Response(serializer.data)
     
     
-class ApplicationViewSet(viewsets.GenericViewSet):
+class ApplicationViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'applications'
     queryset = Application.objects.all()
+    pagination_class = KeysetPagination
+    cache_dependencies = (Application, Course)
     
     @swagger_auto_schema(
         tags=['Applications'],
@@ -375,9 +537,14 @@ class ApplicationViewSet(viewsets.GenericViewSet):
             200: ApplicationSerializer(many=True)
         },
     )
+    @conditional_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = ApplicationSerializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ApplicationSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = ApplicationSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -387,9 +554,10 @@ class ApplicationViewSet(viewsets.GenericViewSet):
             404: 'Not found',
         },
     )
+    @conditional_response
     def retrieve(self, request, pk=None):
         application = self.get_object()
-        serializer = ApplicationSerializer(application)
+        serializer = ApplicationSerializer(application, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -400,10 +568,27 @@ class ApplicationViewSet(viewsets.GenericViewSet):
                 description='Application was created',
                 schema=ApplicationSerializer,
             ),
+            202: openapi.Response(
+                description='Application was accepted and will be saved shortly (APPLICATION_INTAKE_BUFFERED), '
+                            'status_url and the Location header tell when',
+                schema=ApplicationSerializer,
+            ),
             400: 'Bad request',
         },
+        manual_parameters=[idempotency_key_parameter],
     )
+    @idempotent_response
     def create(self, request, *args, **kwargs):
+        if getattr(settings, 'APPLICATION_INTAKE_BUFFERED', False):
+            serializer = ApplicationIntakeSerializer(data=request.data)
+            if serializer.is_valid():
+                serializer.save()
+                status_url = request.build_absolute_uri(
+                    reverse('applications-status', args=[serializer.data['id']]))
+                return Response({**serializer.data, 'status_url': status_url}, status=status.HTTP_202_ACCEPTED,
+                                headers={'Location': status_url})
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
         serializer = ApplicationSerializer(data=request.data)
         if serializer.is_valid():
             try:
@@ -413,21 +598,66 @@ class ApplicationViewSet(viewsets.GenericViewSet):
                 return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @swagger_auto_schema(
+        tags=['Applications'],
+        responses={
+            200: openapi.Response(
+                description="'pending' until a buffered application is saved, then 'saved' with its url, "
+                            "or 'rejected' with the reason it could not be saved",
+                schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                    'id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                    'status': openapi.Schema(type=openapi.TYPE_STRING, enum=['pending', 'saved', 'rejected']),
+                    'url': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_URI),
+                    'reason': openapi.Schema(type=openapi.TYPE_STRING),
+                }),
+            ),
+            404: 'Not found',
+        },
+    )
+    @action(detail=True, url_path='status', url_name='status')
+    def intake_status(self, request, pk=None):
+        try:
+            pk = uuid.UUID(pk)
+        except ValueError:
+            raise NotFound()
+        state, reason = application_status(pk)
+        if state is None:
+            raise NotFound()
+        data = {'id': str(pk), 'status': state}
+        if state == 'saved':
+            data['url'] = request.build_absolute_uri(reverse('applications-detail', args=[pk]))
+        elif state == 'rejected':
+            data['reason'] = reason
+        return Response(data)
+
 
-class CourseViewSet(viewsets.GenericViewSet):
+class CourseViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
     authentication_classes=[]
     permission_classes = [AllowAny]
     queryset = Course.objects.all()
+    pagination_class = KeysetPagination
+    # Discount feeds best_price
+    cache_dependencies = (Course, CourseCategory, TeacherInfo, User, Discount)
+
+    def get_queryset(self):
+        queryset = with_best_discount(super().get_queryset())
+        return plan_queryset(queryset, CourseSerializer(context={'request': self.request}))
     
     @swagger_auto_schema(
         tags=['Courses'],
         responses={
             200: CourseSerializer(many=True)
         },
+        manual_parameters=[fields_parameter, expand_parameter],
     )
+    @cache_response
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
-        serializer = CourseSerializer(queryset, many=True)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = CourseSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        serializer = CourseSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -436,9 +666,238 @@ class CourseViewSet(viewsets.GenericViewSet):
             200: CourseSerializer(),
             404: 'Not found',
         },
+        manual_parameters=[fields_parameter, expand_parameter],
     )
+    @cache_response
     def retrieve(self, request, pk=None):
         course = self.get_object()
-        serializer = CourseSerializer(course)
+        serializer = CourseSerializer(course, context={'request': request})
         return Response(serializer.data)
-    
\ No newline at end of file
+
+    @swagger_auto_schema(
+        tags=['Courses'],
+        request_body=PriceQuoteRequestSerializer,
+        responses={
+            200: PriceQuoteSerializer(many=True),
+            400: 'Bad request',
+        },
+    )
+    @action(detail=False, methods=['post'], pagination_class=None)
+    def quote(self, request):
+        serializer = PriceQuoteRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            quotes = quote(serializer.validated_data['items'])
+        except QuoteError as e:
+            return Response({'items': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'items': PriceQuoteSerializer(quotes, many=True).data})
+    
+
+class SearchViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    authentication_classes=[]
+    permission_classes = [AllowAny]
+    pagination_class = None
+    cache_dependencies = (Course, Article, Faq)
+
+    @swagger_auto_schema(
+        tags=['Search'],
+        query_serializer=SearchQuerySerializer,
+        responses={
+            200: SearchResultSerializer(many=True),
+            400: 'Bad request',
+        },
+    )
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        query_serializer = SearchQuerySerializer(data=request.query_params)
+        if not query_serializer.is_valid():
+            return Response(query_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = search(
+            query_serializer.validated_data['q'],
+            kinds=sorted(query_serializer.validated_data.get('type', ())),
+            limit=query_serializer.validated_data['limit'],
+        )
+        return Response(SearchResultSerializer(results, many=True).data)
+
+
+content_range_parameter = openapi.Parameter(
+    'Content-Range',
+    openapi.IN_HEADER,
+    description='Position of the chunk in the file, "bytes start-end/size"',
+    type=openapi.TYPE_STRING,
+    required=True,
+)
+
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """
+    Resumable uploads: create a session, PUT the file in order as raw
+    chunks with a Content-Range header, then finalize it into a
+    certificate or a teacher photo. After a dropped connection the client
+    reads ``received`` and continues from there. A session expires
+    ``UPLOAD_SESSION_TIMEOUT`` seconds after its last chunk.
+    """
+    authentication_classes=[ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrTeacher]
+    queryset = UploadSession.objects.all()
+
+    def get_queryset(self):
+        return super().get_queryset().filter(owner_id=self.request.user.pk, expires_at__gt=timezone.now())
+
+    @swagger_auto_schema(
+        tags=['Uploads'],
+        request_body=UploadSessionSerializer,
+        responses={
+            201: UploadSessionSerializer(),
+            400: 'Bad request',
+            401: 'Unauthorized',
+            403: 'Forbidden',
+            409: 'Too many open uploads',
+        },
+    )
+    def create(self, request, *args, **kwargs):
+        serializer = UploadSessionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # the transaction takes the write lock first, so concurrent creates
+        # of one user are counted one after the other
+        with transaction.atomic():
+            open_uploads = self.get_queryset().aggregate(sessions=Count('pk'), size=Sum('size'))
+            if (open_uploads['sessions'] >= upload_max_open_sessions()
+                    or (open_uploads['size'] or 0) + serializer.validated_data['size'] > upload_max_open_bytes()):
+                return Response({'detail': 'Too many open uploads, finish or discard one first.'},
+                                status=status.HTTP_409_CONFLICT)
+            serializer.save(owner_id=request.user.pk, expires_at=session_expires_at())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        tags=['Uploads'],
+        responses={
+            200: UploadSessionSerializer(),
+            401: 'Unauthorized',
+            404: 'Not found',
+        },
+    )
+    def retrieve(self, request, pk=None):
+        session = self.get_object()
+        return Response(UploadSessionSerializer(session).data)
+
+    @swagger_auto_schema(
+        tags=['Uploads'],
+        request_body=no_body,
+        manual_parameters=[content_range_parameter],
+        responses={
+            200: UploadSessionSerializer(),
+            400: 'Bad request',
+            401: 'Unauthorized',
+            404: 'Not found',
+            409: 'Chunk does not start at the received offset',
+            413: 'Chunk too large',
+        },
+    )
+    def update(self, request, pk=None):
+        session = self.get_object()
+        try:
+            start, end, total = parse_content_range(request.META.get('HTTP_CONTENT_RANGE'))
+        except ChunkError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        length = end - start + 1
+        if total != session.size or end >= session.size:
+            return Response({'detail': 'Content-Range does not match the upload size.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if length > chunk_max_size():
+            return Response({'detail': f'Chunks larger than {chunk_max_size()} bytes are not accepted.'},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if start != session.received:
+            return Response({'detail': 'Chunk does not start at the received offset.', 'received': session.received},
+                            status=status.HTTP_409_CONFLICT)
+        if request.META.get('CONTENT_LENGTH') != str(length):
+            return Response({'detail': 'Content-Length does not match the Content-Range.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            write_chunk(session, request.stream, start, length)
+        except ChunkError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # a concurrent request may have accepted the same chunk first
+        expires_at = session_expires_at()
+        if not UploadSession.objects.filter(pk=session.pk, received=start).update(received=end + 1,
+                                                                                  expires_at=expires_at):
+            session.refresh_from_db()
+            return Response({'detail': 'Chunk does not start at the received offset.', 'received': session.received},
+                            status=status.HTTP_409_CONFLICT)
+        session.received, session.expires_at = end + 1, expires_at
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        tags=['Uploads'],
+        responses={
+            204: 'Upload was discarded',
+            401: 'Unauthorized',
+            404: 'Not found',
+        },
+    )
+    def destroy(self, request, pk=None):
+        session = self.get_object()
+        discard_parts(session)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @swagger_auto_schema(
+        tags=['Uploads'],
+        request_body=UploadFinalizeSerializer,
+        responses={
+            201: openapi.Response(description='Certificate was created', schema=CertificateSerializer),
+            200: openapi.Response(description='TeacherInfo photo was updated', schema=TeacherInfoSerializer),
+            400: 'Bad request',
+            401: 'Unauthorized',
+            403: 'Forbidden',
+            404: 'Not found',
+            409: 'Upload is not complete or already being finalized',
+        },
+    )
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        session = self.get_object()
+        if not session.is_complete:
+            return Response({'detail': 'Upload is not complete.', 'received': session.received},
+                            status=status.HTTP_409_CONFLICT)
+        serializer = UploadFinalizeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        teacher = serializer.validated_data['teacher']
+        if not IsAdminOrOwnerTeacher().has_object_permission(request, self, teacher):
+            raise PermissionDenied()
+        # the part file is moved aside, so a concurrent finalize of the
+        # same session stops here instead of reading a file being moved
+        if not claim_parts(session):
+            return Response({'detail': 'Upload is already being finalized.'}, status=status.HTTP_409_CONFLICT)
+
+        try:
+            with open_assembled_file(session) as file:
+                if session.target == 'teacher_photo':
+                    try:
+                        with Image.open(file) as image:
+                            image.verify()
+                    except Exception:
+                        release_parts(session)
+                        return Response({'detail': 'Upload is not a valid image.'},
+                                        status=status.HTTP_400_BAD_REQUEST)
+                    file.seek(0)
+                    teacher.photo.save(session.filename, file)
+                    response = Response(TeacherInfoSerializer(teacher, context={'request': request}).data,
+                                        status=status.HTTP_200_OK)
+                else:
+                    certificate = Certificate(teacher=teacher)
+                    certificate.file.save(session.filename, file)
+                    response = Response(CertificateSerializer(certificate, context={'request': request}).data,
+                                        status=status.HTTP_201_CREATED)
+        except Exception:
+            release_parts(session)
+            raise
+
+        discard_parts(session)
+        session.delete()
+        return response
@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api_product.replicas.ReplicaStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,11 +65,128 @@ WSGI_APPLICATION = 'api_project.wsgi.application'
 # Database
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'utilities.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# IMMEDIATE transactions take the write lock up front, so a transaction
+# that reads before writing waits for busy_timeout instead of failing with
+# "database is locked" when another worker writes
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
+# read replicas: aliases of DATABASES entries that serve the list/retrieve
+# actions, e.g. {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR /
+# 'replica.sqlite3'} refreshed with manage.py refresh_replicas. A replica
+# older than the last change of a view's cache_dependencies is skipped, and
+# a client reads from default for REPLICA_STICKY_SECONDS after it wrote.
+DATABASE_ROUTERS = ['api_product.replicas.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS = 5
+
+# applied by utilities.sqlite to every new connection: WAL lets readers go
+# on while a gunicorn worker writes, synchronous=NORMAL is durable in WAL
+# mode except for the last commits on power loss, cache_size is in KiB
+# when negative
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+
+# Cache
+# file based, so every gunicorn worker sees the same entries and invalidations,
+# with a lock per key for the throttles' read-modify-write
+CACHES = {
+    'default': {
+        'BACKEND': 'utilities.cache.LockingFileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# token bucket rates of the anonymous endpoints per client, '<scope>.read'
+# for GET/HEAD/OPTIONS and '<scope>.write' for the rest, a scope without a
+# rate is not throttled
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_RATES = {
+    'reviews.read': '120/min',
+    'reviews.write': '10/hour',
+    'applications.read': '120/min',
+    'applications.write': '20/hour',
+    'users.read': '120/min',
+}
+
+# the platform router appends the address it got the request from to
+# X-Forwarded-For, so only that last entry identifies a client to the
+# throttles and replica stickiness, whatever the client sent itself
+REST_FRAMEWORK = {
+    'NUM_PROXIES': 1,
+}
+
+# Idempotency-Key: first responses are kept for a day in their IdempotencyLock
+# row, a retry waits up to IDEMPOTENCY_WAIT_TIMEOUT seconds for a request still
+# in flight, which holds the row for at most IDEMPOTENCY_LOCK_TIMEOUT seconds.
+# Expired rows are removed by manage.py discard_expired_idempotency_keys
+IDEMPOTENCY_KEY_TIMEOUT = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+IDEMPOTENCY_WAIT_TIMEOUT = 10
+
+# user claims (id, username, role, is_staff, is_active) for claims-based auth,
+# in the shared cache so a change saved by one worker is forgotten by all of
+# them, USER_CACHE_TIMEOUT bounds the staleness of changes made without
+# User.save(), e.g. queryset.update()
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = 60
+
+# Background tasks and media
+BACKGROUND_WORKERS = 2
+IMAGE_VARIANT_WIDTHS = (80, 160, 320, 640, 1280)
+# removed media files are deleted after commit, in batches of up to
+# MEDIA_DELETE_BATCH_SIZE files collected over MEDIA_DELETE_BATCH_DELAY seconds
+MEDIA_DELETE_BATCH_SIZE = 100
+MEDIA_DELETE_BATCH_DELAY = 0.5
+
+# file downloads: None serves the bytes from the worker, 'x-accel-redirect'
+# hands them to nginx through an internal location aliasing MEDIA_ROOT,
+# 'x-sendfile' to apache/lighttpd
+DOWNLOAD_OFFLOAD = None
+DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
+# resumable uploads: chunks are assembled here, outside MEDIA_ROOT
+UPLOAD_SESSION_DIR = os.path.join(BASE_DIR, 'uploads')
+UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+UPLOAD_CHUNK_MAX_SIZE = 8 * 1024 * 1024
+# a user keeps at most UPLOAD_MAX_OPEN_SESSIONS sessions of up to
+# UPLOAD_MAX_OPEN_BYTES in total, a session expires UPLOAD_SESSION_TIMEOUT
+# seconds after its last chunk and is removed by manage.py
+# discard_expired_uploads
+UPLOAD_SESSION_TIMEOUT = 24 * 60 * 60
+UPLOAD_MAX_OPEN_SESSIONS = 5
+UPLOAD_MAX_OPEN_BYTES = 2 * UPLOAD_MAX_SIZE
+
+# buffered application intake for enrollment campaigns: applications are
+# acknowledged with 202 once journaled here and saved in batches, a batch
+# failing APPLICATION_INTAKE_MAX_ATTEMPTS times is quarantined and
+# applications that cannot be saved go to intake/dead-letter.jsonl
+APPLICATION_INTAKE_BUFFERED = False
+APPLICATION_INTAKE_DIR = os.path.join(BASE_DIR, 'intake')
+APPLICATION_INTAKE_BATCH_SIZE = 500
+APPLICATION_INTAKE_FLUSH_INTERVAL = 1.0
+APPLICATION_INTAKE_MAX_ATTEMPTS = 3
+APPLICATION_INTAKE_FSYNC = True
+APPLICATION_COURSE_CACHE_TIMEOUT = 60
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
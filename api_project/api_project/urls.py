@@ -1,3 +1,4 @@
+import posixpath
 from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
@@ -6,6 +7,9 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from django.conf import settings
 from django.conf.urls.static import static
+from django.http import Http404
+from django.views.static import serve
+from api_product.models import Certificate
 
 schema_view = get_schema_view(
    openapi.Info(
@@ -27,4 +31,12 @@ urlpatterns = [
    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='presentation'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+def serve_media(request, path, **kwargs):
+   # certificates are only served by the certificates download action
+   if posixpath.normpath(path).lstrip('/').startswith(Certificate.file.field.upload_to):
+      raise Http404
+   return serve(request, path, **kwargs)
+
+
+urlpatterns += static(settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT)
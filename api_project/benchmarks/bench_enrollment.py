@@ -0,0 +1,37 @@
+"""
+Enrolling a cohort of students into a course through ``Course.students``,
+which runs the ``validate_students`` role check before the insert.
+
+    python -m benchmarks.bench_enrollment [students]
+"""
+import sys
+
+from benchmarks.utils import setup, test_database, timer
+
+setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+
+def main(students):
+    from api_authentication.models import User
+    from api_product.models import Course, CourseCategory
+
+    category = CourseCategory.objects.create(name='Benchmark')
+    course = Course.objects.create(name='Benchmark', price_for_one=100, price_for_many=80,
+                                   course_category=category)
+    cohort = User.objects.bulk_create(
+        User(username=f'student{i}', role='student', phone_number=f'+37529{i:07d}')
+        for i in range(students)
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        with timer('enroll cohort', students):
+            course.students.add(*cohort)
+    print(f'{len(queries)} queries')
+
+
+if __name__ == '__main__':
+    with test_database():
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,120 @@
+"""
+The hot list and admin filter queries of api_product with the indexes of
+migration 0012, then again with those indexes dropped.
+
+    python -m benchmarks.bench_indexes [rows]
+"""
+import datetime
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.utils import setup, test_database, timer
+
+setup()
+
+from django.db import connection  # noqa: E402
+
+BATCH = 5000
+SAMPLES = 50
+
+# table -> indexed columns added by migration 0012
+INDEXES = {
+    'api_product_article': (['creation_date', 'id'],),
+    'api_product_course': (['name', 'id'], ['price_for_one'], ['price_for_many'], ['study_hours']),
+    'api_product_discount': (['percent', 'id'],),
+    'api_product_review': (['creation_date', 'id'],),
+    'api_product_application': (['start_date', 'id'],),
+}
+
+
+def create_rows(rows):
+    from api_product.models import Application, Article, Course, CourseCategory, Discount, Review
+
+    random.seed(0)
+    today = datetime.date.today()
+
+    def day():
+        return today - datetime.timedelta(days=random.randint(0, 3650))
+
+    category = CourseCategory.objects.create(name='Benchmark')
+    courses = Course.objects.bulk_create(
+        Course(name=f'Course {random.random()}', price_for_one=random.randint(50, 500),
+               price_for_many=random.randint(30, 400), study_hours=random.randint(10, 200),
+               course_category=category)
+        for _ in range(rows // 10)
+    )
+    Discount.objects.bulk_create(Discount(percent=random.randint(0, 99), description='-') for _ in range(100))
+    for start in range(0, rows, BATCH):
+        size = min(BATCH, rows - start)
+        Article.objects.bulk_create(Article(title='Article', content='-', creation_date=day()) for _ in range(size))
+        Review.objects.bulk_create(
+            Review(author='Student', content='-', course=random.choice(courses), creation_date=day())
+            for _ in range(size)
+        )
+        Application.objects.bulk_create(
+            Application(name='Name', surname='Surname', phone_number='+375445768788',
+                        course=random.choice(courses), start_date=day())
+            for _ in range(size)
+        )
+
+
+def hot_queries():
+    from api_product.models import Application, Article, Course, Review
+    from api_product.pricing import with_best_discount
+
+    middle = datetime.date.today() - datetime.timedelta(days=1825)
+    return {
+        'courses page': lambda: list(with_best_discount(Course.objects.order_by('-name', '-id'))[:21]),
+        'articles page': lambda: list(Article.objects.order_by('-creation_date', '-id')[:21]),
+        'reviews page': lambda: list(Review.objects.order_by('-creation_date', '-id')[:21]),
+        'reviews page past a cursor': lambda: list(
+            Review.objects.filter(creation_date__lt=middle).order_by('-creation_date', '-id')[:21]
+        ),
+        'applications page': lambda: list(Application.objects.order_by('start_date', 'id')[:21]),
+        'admin price_for_one filter choices': lambda: list(
+            Course.objects.order_by('price_for_one').values_list('price_for_one', flat=True).distinct()
+        ),
+        'admin study_hours filter': lambda: list(Course.objects.filter(study_hours=100)[:100]),
+        'admin applications by start date': lambda: Application.objects.filter(start_date__gte=middle).count(),
+    }
+
+
+def measure(queries):
+    medians = {}
+    for label, query in queries.items():
+        samples = []
+        for _ in range(SAMPLES):
+            start = time.perf_counter()
+            query()
+            samples.append(time.perf_counter() - start)
+        medians[label] = statistics.median(samples)
+    return medians
+
+
+def drop_indexes():
+    with connection.cursor() as cursor:
+        for table, columns in INDEXES.items():
+            constraints = connection.introspection.get_constraints(cursor, table)
+            for name, constraint in constraints.items():
+                if constraint['index'] and not constraint['unique'] and constraint['columns'] in columns:
+                    cursor.execute(f'DROP INDEX "{name}"')
+
+
+def main(rows):
+    with timer('create rows', rows * 3):
+        create_rows(rows)
+    queries = hot_queries()
+    indexed = measure(queries)
+    drop_indexes()
+    unindexed = measure(queries)
+
+    print(f'{"median":<45} {"indexed":>10} {"unindexed":>10}')
+    for label in queries:
+        print(f'{label:<45} {indexed[label] * 1000:7.2f} ms {unindexed[label] * 1000:7.2f} ms')
+
+
+if __name__ == '__main__':
+    with test_database():
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,64 @@
+"""
+Application submissions: ApplicationViewSet.create saving each application
+in its own INSERT versus the buffered intake, which journals it and saves
+the batch with bulk_create when flushed.
+
+Submissions are made one after another through the test client, so the
+lock contention of concurrent writers is not part of the numbers.
+
+    python -m benchmarks.bench_intake [applications]
+"""
+import shutil
+import sys
+import tempfile
+
+from benchmarks.utils import setup, test_database, timer
+
+setup()
+
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+
+def submit(client, course, applications):
+    data = {'name': 'Bench', 'surname': 'Applicant', 'phone_number': '+375445768788',
+            'start_date': timezone.now().date(), 'course': str(course.id)}
+    for _ in range(applications):
+        response = client.post(reverse('applications-list'), data)
+        assert response.status_code in (201, 202), response.content
+
+
+def main(applications):
+    from api_product.intake import application_intake
+    from api_product.models import Application, Course, CourseCategory
+
+    category = CourseCategory.objects.create(name='Benchmark')
+    course = Course.objects.create(name='Benchmark', price_for_one=100, price_for_many=80,
+                                   course_category=category)
+    client = APIClient()
+
+    with timer('create, one INSERT per request', applications):
+        submit(client, course, applications)
+
+    # the flusher thread is not started, the batch is flushed once at the end
+    application_intake._start_worker = lambda: None
+    intake_dir = tempfile.mkdtemp()
+    try:
+        for fsync in (True, False):
+            with override_settings(APPLICATION_INTAKE_BUFFERED=True, APPLICATION_INTAKE_DIR=intake_dir,
+                                   APPLICATION_INTAKE_FSYNC=fsync):
+                with timer(f'buffered intake, fsync={fsync}', applications):
+                    submit(client, course, applications)
+                with timer('  flush with bulk_create', applications):
+                    application_intake.flush()
+    finally:
+        shutil.rmtree(intake_dir, ignore_errors=True)
+    assert Application.objects.count() == applications * 3
+
+
+if __name__ == '__main__':
+    # every submission comes from the same client
+    with test_database(), override_settings(THROTTLE_RATES={}):
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,44 @@
+"""
+Login throughput: LoginView minting tokens in-process versus the previous
+flow, where LoginView authenticated and then called token-obtain-pair,
+which authenticated the same password a second time.
+
+The old flow is replayed through the test client, so it leaves out the
+loopback HTTP hop and the second worker it kept busy. Its numbers are a
+lower bound on what the old flow actually cost.
+
+    python -m benchmarks.bench_login [logins]
+"""
+import sys
+
+from benchmarks.utils import setup, test_database, timer
+
+setup()
+
+from django.contrib.auth import authenticate  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+
+def main(logins):
+    from api_authentication.models import User
+
+    User.objects.create_user(username='bench', password='bench-password', role='student')
+    credentials = {'username': 'bench', 'password': 'bench-password'}
+
+    with timer('in-process tokens (LoginView)', logins):
+        for _ in range(logins):
+            response = APIClient().post(reverse('login'), credentials, format='json')
+            assert response.status_code == 200, response.content
+
+    with timer('login + token-obtain-pair round trip', logins):
+        for _ in range(logins):
+            # LoginSerializer.validate, then the loopback token request
+            assert authenticate(**credentials) is not None
+            response = APIClient().post(reverse('token-obtain-pair'), credentials, format='json')
+            assert response.status_code == 200, response.content
+
+
+if __name__ == '__main__':
+    with test_database():
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
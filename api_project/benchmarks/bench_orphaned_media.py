@@ -0,0 +1,59 @@
+"""
+Collecting orphaned media from a temporary MEDIA_ROOT holding one
+certificate per row plus as many files no row refers to.
+
+    python -m benchmarks.bench_orphaned_media [files]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.utils import setup, test_database, timer
+
+setup()
+
+from django.core.files.storage import default_storage  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+
+def main(files):
+    from api_authentication.models import User
+    from api_product.media import find_orphaned_files
+    from api_product.models import Certificate, TeacherInfo
+
+    teacher = TeacherInfo.objects.create(
+        user=User.objects.create_user(username='teacher', password='password', role='teacher'),
+        education='PhD', experience='10 years'
+    )
+    directory = default_storage.path('certificates')
+    modified = time.time() - 48 * 3600
+    for i in range(files):
+        for name in (f'kept{i}.pdf', f'lost{i}.pdf'):
+            path = os.path.join(directory, f'{i % 100:02d}', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb'):
+                pass
+            os.utime(path, (modified, modified))
+    Certificate.objects.bulk_create(
+        Certificate(file=f'certificates/{i % 100:02d}/kept{i}.pdf', teacher=teacher) for i in range(files)
+    )
+
+    tracemalloc.start()
+    with timer('find orphaned files', files * 2):
+        orphans = sum(len(batch) for batch in find_orphaned_files(default_storage, min_age=3600))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert orphans == files, orphans
+    print(f'{orphans} orphans, peak {peak / 1024:.0f} KiB traced')
+
+
+if __name__ == '__main__':
+    media_root = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=media_root), test_database():
+            main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
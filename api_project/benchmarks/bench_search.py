@@ -0,0 +1,90 @@
+"""
+Search latency on a synthetic corpus of courses, articles and FAQs: the
+ranked FTS5 query alone, and a full uncached request to /api/prod/search/.
+
+    python -m benchmarks.bench_search [documents]
+"""
+import random
+import statistics
+import string
+import sys
+import time
+
+from benchmarks.utils import setup, test_database, timer
+
+setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+random.seed(0)
+WORDS = [''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 9))) for _ in range(20000)]
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+BATCH = 5000
+
+
+def text(words):
+    return ' '.join(random.choices(WORDS, WEIGHTS, k=words))
+
+
+def create_corpus(documents):
+    from api_product.models import Article, CourseCategory, Course, FaqCategory, Faq
+    from api_product.search import rebuild_index
+
+    category = CourseCategory.objects.create(name='Benchmark')
+    faq_category = FaqCategory.objects.create(name='Benchmark')
+    for start in range(0, documents, BATCH):
+        size = min(BATCH, documents - start)
+        Course.objects.bulk_create(
+            Course(name=text(3), description=text(60), curriculum=text(40), price_for_one=100,
+                   price_for_many=80, course_category=category)
+            for _ in range(size * 3 // 10)
+        )
+        Article.objects.bulk_create(
+            Article(title=text(6), content=text(200)) for _ in range(size * 6 // 10)
+        )
+        Faq.objects.bulk_create(
+            Faq(question=text(8), answer=text(30), faq_category=faq_category)
+            for _ in range(size - size * 3 // 10 - size * 6 // 10)
+        )
+    return rebuild_index()
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95)]
+    print(f'{label:<45} median {statistics.median(samples) * 1000:6.2f} ms  p95 {p95 * 1000:6.2f} ms')
+
+
+def main(documents):
+    from api_product.search import search
+
+    with timer('index corpus', documents):
+        indexed = create_corpus(documents)
+    assert indexed == documents
+
+    queries = [text(random.randint(1, 3)) for _ in range(200)]
+    queries += [random.choice(WORDS)[:3] for _ in range(50)]
+
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - start)
+    report('search()', samples)
+
+    client = APIClient()
+    samples = []
+    for query in queries:
+        caches['default'].clear()
+        start = time.perf_counter()
+        response = client.get(reverse('search-list'), {'q': query})
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.content
+    report('GET /api/prod/search/ (uncached)', samples)
+
+
+if __name__ == '__main__':
+    with test_database():
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,129 @@
+"""
+Mixed read/write traffic from several processes, like gunicorn workers,
+against one SQLite file: first with the default rollback journal and
+deferred transactions, then with SQLITE_PRAGMAS and IMMEDIATE transactions.
+
+    python -m benchmarks.bench_sqlite_concurrency [workers] [operations per worker]
+"""
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.utils import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import OperationalError, connection, transaction  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+WRITE_RATIO = 0.2
+
+PROFILES = {
+    'rollback journal, deferred': ({}, None),
+    'WAL + pragmas, immediate': (settings.SQLITE_PRAGMAS, 'IMMEDIATE'),
+}
+
+CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'} for alias in settings.CACHES
+}
+
+
+def use_database(name, pragmas, transaction_mode):
+    connection.close()
+    connection.settings_dict.update(NAME=name, CONN_MAX_AGE=None)
+    settings.SQLITE_PRAGMAS = pragmas
+    settings.SQLITE_TRANSACTION_MODE = transaction_mode
+
+
+def create_database(directory):
+    from api_product.models import Course, CourseCategory, Review
+
+    name = os.path.join(directory, 'template.sqlite3')
+    use_database(name, {}, None)
+    call_command('migrate', verbosity=0)
+    category = CourseCategory.objects.create(name='Benchmark')
+    courses = Course.objects.bulk_create(
+        Course(name=f'Course {i}', price_for_one=100, price_for_many=80, course_category=category)
+        for i in range(100)
+    )
+    Review.objects.bulk_create(
+        Review(author='Student', content='-', course=random.choice(courses)) for _ in range(10000)
+    )
+    connection.close()
+    return name
+
+
+def worker(name, pragmas, transaction_mode, operations, seed, results):
+    from api_product.models import Course, Review
+
+    use_database(name, pragmas, transaction_mode)
+    random.seed(seed)
+    course_ids = list(Course.objects.values_list('pk', flat=True))
+    reads, writes, errors = [], [], 0
+    for _ in range(operations):
+        start = time.perf_counter()
+        try:
+            if random.random() < WRITE_RATIO:
+                # reads then writes in one transaction, like a validated create
+                with transaction.atomic():
+                    course = Course.objects.get(pk=random.choice(course_ids))
+                    Review.objects.create(author='Student', content='-', course=course)
+                writes.append(time.perf_counter() - start)
+            else:
+                list(Review.objects.order_by('-creation_date', '-id')[:20])
+                list(Course.objects.order_by('-name', '-id')[:20])
+                reads.append(time.perf_counter() - start)
+        except OperationalError:
+            errors += 1
+    connection.close()
+    results.put((reads, writes, errors))
+
+
+def p95(samples):
+    return sorted(samples)[int(len(samples) * 0.95)] * 1000 if samples else float('nan')
+
+
+def run(label, template, directory, workers, operations):
+    pragmas, transaction_mode = PROFILES[label]
+    name = os.path.join(directory, f'{len(os.listdir(directory))}.sqlite3')
+    shutil.copy(template, name)
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(name, pragmas, transaction_mode, operations, seed, results))
+        for seed in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    reads = [sample for result in collected for sample in result[0]]
+    writes = [sample for result in collected for sample in result[1]]
+    errors = sum(result[2] for result in collected)
+    done = len(reads) + len(writes)
+    print(f'{label:<30} {done / elapsed:8.1f} ops/s  read p95 {p95(reads):7.2f} ms  '
+          f'write p95 {p95(writes):7.2f} ms  {errors} locked')
+
+
+def main(workers, operations):
+    with tempfile.TemporaryDirectory() as directory, override_settings(CACHES=CACHES):
+        template = create_database(directory)
+        print(f'{workers} workers x {operations} operations, {WRITE_RATIO:.0%} writes')
+        for label in PROFILES:
+            run(label, template, directory, workers, operations)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 500)
@@ -0,0 +1,120 @@
+"""
+Per-request cost of TokenBucketThrottle with several processes, like
+gunicorn workers, sharing one SQLite file and the file-based cache: review
+list requests with and without the throttle, and throttle checks alone on
+one bucket, which must let exactly its capacity through.
+
+    python -m benchmarks.bench_throttling [workers] [requests per worker]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.utils import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+CAPACITY = 1000
+
+
+class View:
+    throttle_scope = 'bench'
+
+
+def use_database(name):
+    connection.close()
+    connection.settings_dict.update(NAME=name, CONN_MAX_AGE=None)
+
+
+def create_database(directory):
+    from api_product.models import Course, CourseCategory, Review
+
+    name = os.path.join(directory, 'bench.sqlite3')
+    use_database(name)
+    call_command('migrate', verbosity=0)
+    category = CourseCategory.objects.create(name='Benchmark')
+    course = Course.objects.create(name='Course', price_for_one=100, price_for_many=80, course_category=category)
+    Review.objects.bulk_create(Review(author='Student', content='-', course=course) for _ in range(5))
+    connection.close()
+    return name
+
+
+def list_worker(name, rates, requests, seed, results):
+    from rest_framework.test import APIClient
+
+    use_database(name)
+    client = APIClient(REMOTE_ADDR=f'10.0.{seed}.1')
+    samples, errors = [], 0
+    with override_settings(THROTTLE_RATES=rates):
+        for _ in range(requests):
+            start = time.perf_counter()
+            # a new query string each time, so the response cache is missed
+            status_code = client.get(reverse('reviews-list'), {'n': time.perf_counter_ns()}).status_code
+            samples.append(time.perf_counter() - start)
+            errors += status_code != 200
+    connection.close()
+    results.put((samples, errors))
+
+
+def check_worker(requests, results):
+    from rest_framework.test import APIRequestFactory
+    from utilities.throttling import TokenBucketThrottle
+
+    request = APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+    samples, allowed = [], 0
+    with override_settings(THROTTLE_RATES={'bench.read': f'{CAPACITY}/day'}):
+        for _ in range(requests):
+            start = time.perf_counter()
+            allowed += TokenBucketThrottle().allow_request(request, View())
+            samples.append(time.perf_counter() - start)
+    results.put((samples, allowed))
+
+
+def run(label, target, args, workers):
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=target, args=(*args(seed), results)) for seed in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(sample for result in collected for sample in result[0])
+    p95 = samples[int(len(samples) * 0.95)] * 1000
+    print(f'{label:<30} {len(samples) / elapsed:8.1f} ops/s  p95 {p95:6.2f} ms  '
+          f'{sum(result[1] for result in collected)}', end='')
+    return collected
+
+
+def main(workers, requests):
+    settings.ALLOWED_HOSTS = ['testserver']
+    setup_test_environment()
+    with tempfile.TemporaryDirectory() as directory:
+        name = create_database(directory)
+        print(f'{workers} workers x {requests} requests')
+        rates = {'reviews.read': f'{requests * workers * 10}/min'}
+        for label, throttle_rates in (('review list, no throttle', {}), ('review list, throttled', rates)):
+            caches['default'].clear()
+            run(label, list_worker, lambda seed: (name, throttle_rates, requests, seed), workers)
+            print(' errors')
+
+        caches['default'].clear()
+        run('throttle check, one bucket', check_worker, lambda seed: (requests,), workers)
+        print(f' allowed of {CAPACITY}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 500)
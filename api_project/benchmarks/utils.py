@@ -0,0 +1,37 @@
+import contextlib
+import os
+import time
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_project.settings')
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    """
+    Runs the benchmark against a throwaway test database, never db.sqlite3.
+    """
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextlib.contextmanager
+def timer(label, operations):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f'{label:<45} {operations:>7} ops  {elapsed:8.3f} s  {operations / elapsed:10.1f} ops/s')
@@ -0,0 +1,27 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import override_settings
+from django.utils.module_loading import import_string
+
+
+@pytest.fixture(scope='session', autouse=True)
+def cache_directories(tmp_path_factory):
+    # file based caches get a temporary directory, so clearing them leaves
+    # the cache of a local development server alone
+    location = tmp_path_factory.mktemp('cache')
+    test_caches = {
+        alias: dict(config, LOCATION=str(location / alias))
+        if issubclass(import_string(config['BACKEND']), FileBasedCache) else config
+        for alias, config in settings.CACHES.items()
+    }
+    with override_settings(CACHES=test_caches):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(cache_directories):
+    for cache in caches.all():
+        cache.clear()
+    yield
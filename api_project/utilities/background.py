@@ -0,0 +1,39 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+    thread_name_prefix='background',
+)
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__qualname__)
+    finally:
+        connection.close()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Runs ``func`` in a worker thread of this process once the current
+    transaction commits, so it sees the committed rows and never runs for
+    a rolled back change.
+
+    With ``settings.BACKGROUND_TASKS_EAGER`` the task runs inline on commit
+    instead, which keeps tests deterministic.
+    """
+    def submit():
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            func(*args, **kwargs)
+        else:
+            _executor.submit(_run, func, args, kwargs)
+    transaction.on_commit(submit)
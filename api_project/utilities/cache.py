@@ -0,0 +1,50 @@
+import contextlib
+import itertools
+import os
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+class LockingFileBasedCache(FileBasedCache):
+    """
+    FileBasedCache with ``lock(key)``, held across processes while a value
+    is read and written back, and ``add``/``incr`` made atomic with it.
+
+    Keys are locked with one of ``lock_stripes`` lock files, so unrelated
+    keys may wait for each other briefly but the lock files never pile up.
+    The cache files are counted for culling every ``cull_every`` sets
+    instead of listing the directory on each one, so ``MAX_ENTRIES`` may be
+    overshot by that many entries per process.
+    """
+    lock_stripes = 64
+    cull_every = 100
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._sets = itertools.count()
+
+    @contextlib.contextmanager
+    def lock(self, key, version=None):
+        digest = os.path.basename(self._key_to_file(key, version))
+        directory = os.path.join(self._dir, 'locks')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'{int(digest[:8], 16) % self.lock_stripes}.lock'), 'ab') as file:
+            locks.lock(file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(file)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.lock(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.lock(key, version):
+            return super().incr(key, delta, version)
+
+    def _cull(self):
+        if next(self._sets) % self.cull_every == 0:
+            super()._cull()
@@ -0,0 +1,138 @@
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class PassthroughRenderer(JSONRenderer):
+    """
+    Lets a file download action answer any Accept header. The action
+    returns a ready file response, only error details are rendered, as JSON.
+    """
+    media_type = '*/*'
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return super().render(data, 'application/json', renderer_context)
+
+
+def parse_range(header, size):
+    """
+    Returns ``(start, end)`` (inclusive) of a single ``bytes=`` range,
+    ``None`` when the header should be ignored (absent, malformed or
+    several ranges, which are answered with the full file), and raises
+    ``ValueError`` when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def _iter_file_range(file, start, length):
+    file.seek(start)
+    while length > 0:
+        chunk = file.read(min(CHUNK_SIZE, length))
+        if not chunk:
+            break
+        length -= len(chunk)
+        yield chunk
+
+
+def file_download_response(request, field_file, filename=None):
+    """
+    Serves a stored file with ETag/Last-Modified validators, answering
+    If-None-Match/If-Modified-Since with 304 and single byte ranges with
+    206.
+
+    With ``settings.DOWNLOAD_OFFLOAD`` only the headers are produced and
+    the front proxy sends the bytes, Range requests included.
+    """
+    storage = field_file.storage
+    name = field_file.name
+    try:
+        size = storage.size(name)
+        last_modified = storage.get_modified_time(name).timestamp()
+    except (FileNotFoundError, NotImplementedError):
+        raise NotFound('File not found.')
+
+    etag = quote_etag(hashlib.md5(f'{name}:{size}:{last_modified}'.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is not None:
+        return response
+
+    filename = filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    offload = getattr(settings, 'DOWNLOAD_OFFLOAD', None)
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            accel_prefix = getattr(settings, 'DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = accel_prefix + quote(name)
+        else:
+            response['X-Sendfile'] = storage.path(name)
+    else:
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range is not None and not _if_range_matches(request, etag, last_modified):
+            byte_range = None
+
+        if byte_range is None:
+            response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            file = storage.open(name, 'rb')
+            response = StreamingHttpResponse(
+                _iter_file_range(file, start, end - start + 1), status=206, content_type=content_type
+            )
+            # closed with the response, also when the client goes away before the first chunk
+            response._resource_closers.append(file.close)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,190 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the model ordering with the primary key as a
+    tiebreaker, so every page is fetched with an indexed range condition
+    instead of an OFFSET.
+
+    The plain list response is kept for clients that send neither
+    ``cursor`` nor ``page_size``.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_ordering_fields(queryset)
+        values, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering_fields(self, queryset):
+        model = queryset.model
+        ordering = list(self.ordering or queryset.query.order_by or model._meta.ordering)
+        fields = []
+        for name in ordering:
+            descending = name.startswith('-')
+            field = model._meta.get_field(name.lstrip('-'))
+            if field.primary_key:
+                break
+            fields.append((field, descending))
+        tiebreaker_descending = fields[-1][1] if fields else False
+        fields.append((model._meta.pk, tiebreaker_descending))
+        return fields
+
+    def order_by(self, reverse):
+        return [
+            ('-' if descending != reverse else '') + field.attname
+            for field, descending in self.fields
+        ]
+
+    def keyset_filter(self, values, reverse):
+        condition = Q()
+        for position, (field, descending) in enumerate(self.fields):
+            clause = self.after(field, values[position], descending != reverse)
+            if clause is None:
+                continue
+            for index, (previous_field, _) in enumerate(self.fields[:position]):
+                # a None value is turned into an isnull lookup
+                clause &= Q(**{previous_field.attname: values[index]})
+            condition |= clause
+        return condition
+
+    @staticmethod
+    def after(field, value, descending):
+        """
+        Returns the condition for the values of ``field`` that come after
+        ``value``, or None if none do. NULLs are placed like SQLite orders
+        them: before every value ascending, after every value descending.
+        """
+        if value is None:
+            return None if descending else Q(**{f'{field.attname}__isnull': False})
+        clause = Q(**{f'{field.attname}__{"lt" if descending else "gt"}': value})
+        if descending and field.null:
+            clause |= Q(**{f'{field.attname}__isnull': True})
+        return clause
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        position = {
+            'v': [self.cursor_value(getattr(instance, field.attname)) for field, _ in self.fields],
+            'r': reverse,
+        }
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    @staticmethod
+    def cursor_value(value):
+        # full precision, unlike DjangoJSONEncoder which drops microseconds
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, (uuid.UUID, decimal.Decimal)):
+            return str(value)
+        return value
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = position['v']
+            if len(values) != len(self.fields):
+                raise ValueError
+            values = [field.to_python(value) for (field, _), value in zip(self.fields, values)]
+            return values, bool(position.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,81 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class DynamicFieldsMixin:
+    """
+    Lets the client choose what a serializer renders.
+
+    ``?fields=id,name,teachers.photo`` keeps only the listed fields; dotted
+    names restrict the fields of a nested serializer that uses this mixin.
+    ``?expand=teachers`` inlines only the listed ``Meta.expandable_fields``
+    and renders the other expandable relations as primary keys. Without the
+    parameters every field is rendered and every relation is inlined.
+
+    Only the root serializer reads the query parameters, nested serializers
+    get their part of the selection from their parent. Writes ignore them,
+    so every field is still validated and saved.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, expand = self.get_field_selection()
+
+        if requested is not None:
+            for name in list(fields):
+                if name not in requested:
+                    fields.pop(name)
+
+        if expand is not None:
+            for name in getattr(self.Meta, 'expandable_fields', ()):
+                if name in fields and name not in expand:
+                    fields[name] = self.collapse_field(fields[name])
+
+        for name, field in fields.items():
+            nested_requested = requested.get(name) if requested else None
+            target = field.child if isinstance(field, serializers.ListSerializer) else field
+            if nested_requested and isinstance(target, DynamicFieldsMixin):
+                target._field_selection = (nested_requested, None)
+        return fields
+
+    def get_field_selection(self):
+        if hasattr(self, '_field_selection'):
+            return self._field_selection
+
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        request = self.context.get('request')
+        if parent is not None or request is None or request.method not in SAFE_METHODS:
+            return None, None
+
+        query_params = getattr(request, 'query_params', request.GET)
+        requested = expand = None
+        fields_param = query_params.get(self.fields_query_param)
+        if fields_param:
+            requested = parse_field_names(fields_param)
+        expand_param = query_params.get(self.expand_query_param)
+        if expand_param is not None:
+            expand = {name.strip() for name in expand_param.split(',') if name.strip()}
+        return requested, expand
+
+    @staticmethod
+    def collapse_field(field):
+        many = isinstance(field, serializers.ListSerializer)
+        return serializers.PrimaryKeyRelatedField(many=many, read_only=True)
+
+
+def parse_field_names(value):
+    """
+    Turns ``'id,teachers.photo,teachers.id'`` into
+    ``{'id': {}, 'teachers': {'photo': {}, 'id': {}}}``.
+    """
+    tree = {}
+    for name in value.split(','):
+        node = tree
+        for part in name.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
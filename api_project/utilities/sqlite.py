@@ -0,0 +1,21 @@
+import re
+
+from django.conf import settings
+
+PRAGMA_RE = re.compile(r'^\w+$')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver that applies ``settings.SQLITE_PRAGMAS``
+    to every new SQLite connection, in order. ``journal_mode`` is stored in
+    the database file, the others last as long as the connection.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if not PRAGMA_RE.match(name) or not PRAGMA_RE.match(str(value).lstrip('-')):
+                raise ValueError(f'Invalid SQLite pragma {name}={value!r}')
+            cursor.execute(f'PRAGMA {name} = {value}')
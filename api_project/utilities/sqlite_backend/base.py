@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The SQLite backend, opening transactions with ``BEGIN
+    <settings.SQLITE_TRANSACTION_MODE>``. Django 5.1 has
+    ``OPTIONS['transaction_mode']`` for this, the pinned 5.0 does not.
+    """
+    def _start_transaction_under_autocommit(self):
+        mode = getattr(settings, 'SQLITE_TRANSACTION_MODE', None)
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
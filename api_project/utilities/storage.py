@@ -0,0 +1,75 @@
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class FileDeletionQueue:
+    """
+    Deletes stored files in a background thread of this process, in
+    batches of up to ``MEDIA_DELETE_BATCH_SIZE`` files collected over
+    ``MEDIA_DELETE_BATCH_DELAY`` seconds.
+
+    Files still queued when the process exits are left behind.
+    """
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def put(self, storage, names):
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            self.delete_batch([(storage, name) for name in names])
+            return
+        for name in names:
+            self._queue.put((storage, name))
+        self._start_worker()
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='media-deletion', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self.delete_batch(self._next_batch())
+
+    def _next_batch(self):
+        batch_size = getattr(settings, 'MEDIA_DELETE_BATCH_SIZE', 100)
+        deadline = time.monotonic() + getattr(settings, 'MEDIA_DELETE_BATCH_DELAY', 0.5)
+        batch = [self._queue.get()]
+        while len(batch) < batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def delete_batch(self, batch):
+        for storage, name in batch:
+            try:
+                storage.delete(name)
+            except Exception:
+                logger.exception('Could not delete %s', name)
+
+
+deletion_queue = FileDeletionQueue()
+
+
+def delete_files_on_commit(storage, names):
+    """
+    Queues the stored files for deletion once the current transaction
+    commits, nothing is deleted when it rolls back.
+    """
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: deletion_queue.put(storage, names))
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# for caches without lock(), enough for those that live in one process
+_process_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """
+    Returns ``(requests, seconds)`` of a DRF-style rate such as ``'30/min'``.
+    """
+    requests, period = rate.split('/')
+    return int(requests), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per client and ``view.throttle_scope``, with separate
+    ``<scope>.read`` and ``<scope>.write`` rates in ``settings.THROTTLE_RATES``.
+    A rate of ``'30/min'`` holds up to 30 tokens and adds one every two
+    seconds, so bursts up to the full rate are allowed. Scopes without a
+    rate are not throttled.
+
+    The bucket is kept as its theoretical arrival time (GCRA), a single
+    value in the ``THROTTLE_CACHE_ALIAS`` cache that every worker shares.
+    That gives the exact time until the next token for ``Retry-After``.
+    The value is read and written back under the ``lock(key)`` of the
+    cache, see utilities.cache.LockingFileBasedCache, so parallel requests
+    of one client never take more tokens than the bucket holds.
+    """
+    cache_format = 'throttle:{scope}:{ident}'
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def lock(self, cache, key):
+        if hasattr(cache, 'lock'):
+            return cache.lock(key)
+        return _process_lock
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return None
+        return f'{scope}.{"read" if request.method in SAFE_METHODS else "write"}'
+
+    def get_client_ident(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user-{user.pk}'
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = getattr(settings, 'THROTTLE_RATES', {}).get(scope) if scope else None
+        if rate is None:
+            return True
+
+        requests, period = parse_rate(rate)
+        interval = period / requests
+        # a bucket of ``requests`` tokens, the first one is always there
+        tolerance = interval * (requests - 1)
+
+        cache = self.get_cache()
+        key = self.cache_format.format(scope=scope, ident=self.get_client_ident(request))
+        with self.lock(cache, key):
+            now = time.time()
+            arrival = max(cache.get(key, now), now)
+            if arrival - now > tolerance:
+                # rounded so float noise does not add a second to Retry-After
+                self.retry_after = round(arrival - tolerance - now, 3)
+                return False
+
+            arrival += interval
+            cache.set(key, arrival, max(1, int(arrival - now) + 1))
+        return True
+
+    def wait(self):
+        return self.retry_after